@@ -0,0 +1,37 @@
+import random
+from itertools import accumulate
+from book import Book
+
+# Generador de catálogos sintéticos para los benchmarks
+SYLLABLES = ['la', 'el', 'de', 'mar', 'sol', 'ca', 'sa', 'no', 'che', 'ri', 'to', 'ven', 'tu', 'ra',
+             'qui', 'jo', 'te', 'go', 'ba', 'lle', 'pe', 'dro', 'ma', 'ña', 'cien', 'a', 'ños']
+GENRES = ['novela', 'novela/historica', 'novela/policiaca', 'novela/romantica', 'poesia', 'ensayo',
+          'ciencia ficcion', 'teatro', 'infantil', 'biografia', 'historia', 'filosofia']
+
+
+def random_word(rng, min_syllables=2, max_syllables=4):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(min_syllables, max_syllables)))
+
+
+def random_title(rng):
+    return ' '.join(random_word(rng) for _ in range(rng.randint(1, 4))).capitalize()
+
+
+def zipf_weights(count, exponent=1.1):
+    # Pesos acumulados de una distribución de Zipf: pocos valores concentran la mayoría
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def generate_books(count, seed=42):
+    """Genera count libros con títulos únicos y autores y géneros sesgados (Zipf)."""
+    rng = random.Random(seed)
+    authors = [f"{random_word(rng).capitalize()} {random_word(rng).capitalize()}"
+               for _ in range(max(10, count // 20))]
+    author_weights = zipf_weights(len(authors))
+    genre_weights = zipf_weights(len(GENRES), exponent=1.3)
+    for i in range(count):
+        # Sufijo con el índice para que los títulos sean únicos
+        yield Book(f"{random_title(rng)} {i}",
+                   rng.choices(authors, cum_weights=author_weights)[0],
+                   rng.choices(GENRES, cum_weights=genre_weights)[0],
+                   rng.randint(1500, 2024), "", "")
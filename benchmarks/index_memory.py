@@ -0,0 +1,104 @@
+"""Contabilidad de memoria: bytes por libro indexado en cada índice de main.py.
+
+Uso: python -m benchmarks.index_memory [--sizes 10000 100000] [--per-book] [--cover-bytes 4096] [--blobs]
+
+Carga un catálogo sintético con main.add_books (o main.add_book con --per-book)
+y recorre cada estructura sumando sys.getsizeof de todos los objetos alcanzables.
+Los libros y sus atributos se cuentan aparte, una sola vez, porque todos los
+índices los comparten; el total de índices tampoco cuenta dos veces lo compartido.
+Con --cover-bytes cada libro lleva una portada distinta de ese tamaño; con
+--blobs portada y vista previa van a un BlobStore temporal, como con
+--data-dir, y la memoria del almacén (sin su caché) se informa aparte.
+"""
+import argparse
+import gc
+import logging
+import sys
+import tempfile
+import types
+from blobstore import BlobStore
+from benchmarks.catalog import generate_books
+import main
+
+INDEXES = ('title_trie', 'author_trie', 'title_bst', 'rb_tree', 'hash_table',
+           'nary_tree', 'bplus_tree', 'graph', 'book_store', 'text_index')
+# Partes del índice de texto que se informan por separado
+TEXT_INDEX_PARTS = ('postings', 'vocabulary', 'docs', 'lengths', '_doc_ids')
+# Objetos compartidos con el resto del programa que no pertenecen al índice
+SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                 types.MethodType, logging.Logger, BlobStore)
+
+
+def deep_size(root, seen):
+    """Suma el tamaño de los objetos alcanzables desde root que no estén en seen."""
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SKIPPED_TYPES):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total
+
+
+def book_sizes(books):
+    seen = set()
+    return sum(deep_size(book, seen) for book in books), seen
+
+
+def run(sizes, per_book, cover_bytes, blobs):
+    for size in sizes:
+        main.reset_indexes()
+        directory = tempfile.TemporaryDirectory() if blobs else None
+        main.blob_store = BlobStore(directory.name) if blobs else None
+        books = list(generate_books(size))
+        if cover_bytes:
+            for i, book in enumerate(books):
+                book.portada = f"{i:0{cover_bytes}d}"
+        if per_book:
+            for book in books:
+                main.add_book(book)
+        else:
+            main.add_books(books)
+        books_bytes, book_objects = book_sizes(books)
+        print(f"{size} libros ({'add_book' if per_book else 'add_books'})")
+        print(f"  {'libros (compartidos)':22s} {books_bytes / size:10.1f} bytes/libro")
+        shared = set(book_objects)
+        total = 0
+        for name in INDEXES:
+            index_bytes = deep_size(getattr(main, name), set(book_objects))
+            total += deep_size(getattr(main, name), shared)
+            print(f"  {name:22s} {index_bytes / size:10.1f} bytes/libro")
+        text_index = main.text_index
+        for part in TEXT_INDEX_PARTS:
+            part_bytes = deep_size(getattr(text_index, part), set(book_objects))
+            print(f"    {'text_index.' + part.lstrip('_'):20s} {part_bytes / size:10.1f} bytes/libro")
+        print(f"    {'términos':20s} {len(text_index.postings) / size:10.1f} por libro")
+        print(f"  {'total de índices':22s} {total / size:10.1f} bytes/libro")
+        if blobs:
+            store = main.blob_store
+            store_bytes = sum(sys.getsizeof(part) for part in
+                              (store._digests, store._offsets, store._lengths, store._kinds, store._by_digest))
+            store_bytes += sum(sys.getsizeof(digest) for digest in store._by_digest)
+            print(f"  {'almacén de contenidos':22s} {store_bytes / size:10.1f} bytes/libro "
+                  f"({store.stats()['bytes'] / size:.1f} en disco)")
+            store.close()
+            main.blob_store = None
+            directory.cleanup()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--per-book', action='store_true', help='usar main.add_book en lugar de main.add_books')
+    parser.add_argument('--cover-bytes', type=int, default=0, help='tamaño de la portada sintética de cada libro')
+    parser.add_argument('--blobs', action='store_true', help='guardar portada y vista previa en un BlobStore')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    run(args.sizes, args.per_book, args.cover_bytes, args.blobs)
+
+
+if __name__ == '__main__':
+    main_cli()
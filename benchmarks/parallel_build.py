@@ -0,0 +1,74 @@
+"""Tiempo de importación de un catálogo con main.add_books según el número de procesos.
+
+Uso: python -m benchmarks.parallel_build [--sizes 100000 1000000] [--workers 1 4 8 32]
+
+Con 1 proceso se usa la carga secuencial; con más, ParallelIndexBuilder. La
+parte que sigue en el proceso principal (árboles, tabla hash, grafo, almacén
+columnar y la deserialización de lo que construyen los procesos) acota la
+aceleración; el tiempo de CPU del proceso principal se informa aparte.
+
+Después de cada construcción se compara el orden de los resultados de cada
+índice con el de la carga secuencial: deben ser idénticos, incluido el orden
+entre libros empatados (mismo año, mismo título).
+"""
+import argparse
+import logging
+import os
+import time
+from benchmarks.catalog import generate_books
+import main
+
+
+def index_orders(books):
+    """Orden en que cada índice devuelve los libros, como posiciones en books."""
+    position = {id(book): i for i, book in enumerate(books)}
+    orders = {
+        'title_bst': main.title_bst.in_order_traversal(),
+        'rb_tree': main.rb_tree.in_order_traversal(),
+        'bplus_tree': main.bplus_tree.in_order_traversal(),
+        'nary_tree': main.nary_tree.iter_books(),
+        'book_store': main.book_store.books,
+    }
+    for year in range(1500, 2025, 25):
+        orders[f'año {year}'] = main.search_books('año', year)
+    for query in ('a', 'ma', 'el', 'sol'):
+        orders[f'titulo {query}'] = main.search_books('titulo', query)
+        orders[f'autor {query}'] = main.search_books('autor', query)
+        orders[f'texto {query}'] = main.search_books('texto', query)
+    return {name: [position[id(book)] for book in found] for name, found in orders.items()}
+
+
+def run(sizes, workers_list):
+    for size in sizes:
+        books = list(generate_books(size))
+        print(f"{size} libros ({os.cpu_count()} núcleos)")
+        baseline = None
+        expected = None
+        for workers in workers_list:
+            main.reset_indexes()
+            start = time.perf_counter()
+            cpu = time.process_time()
+            main.add_books(books, workers=workers)
+            elapsed = time.perf_counter() - start
+            cpu = time.process_time() - cpu
+            baseline = baseline or elapsed
+            print(f"  {workers:3d} procesos {elapsed:8.2f} s (x{baseline / elapsed:.1f}), "
+                  f"CPU del proceso principal {cpu:.2f} s")
+            orders = index_orders(books)
+            expected = expected or orders
+            different = [name for name in orders if orders[name] != expected[name]]
+            if different:
+                raise AssertionError(f"{workers} procesos: orden distinto al secuencial en {', '.join(different)}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    run(args.sizes, args.workers)
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,100 @@
+"""Compara el motor de ordenamiento de sorting.py con las implementaciones recursivas anteriores.
+
+Uso: python -m benchmarks.sorting_engine [--sizes 10000 100000]
+Cada algoritmo ordena por título catálogos ya ordenados, invertidos y aleatorios.
+"""
+import argparse
+import logging
+import random
+import time
+from benchmarks.catalog import generate_books
+from sorting import sort_by_key
+
+
+def legacy_quick_sort(books, key, low=0, high=None):
+    # quick_sort original: Lomuto recursivo con getattr por comparación
+    if high is None:
+        high = len(books) - 1
+    if low < high:
+        pi = legacy_partition(books, key, low, high)
+        legacy_quick_sort(books, key, low, pi - 1)
+        legacy_quick_sort(books, key, pi + 1, high)
+
+
+def legacy_partition(books, key, low, high):
+    pivot = getattr(books[high], key)
+    i = low - 1
+    for j in range(low, high):
+        if getattr(books[j], key) <= pivot:
+            i += 1
+            books[i], books[j] = books[j], books[i]
+    books[i + 1], books[high] = books[high], books[i + 1]
+    return i + 1
+
+
+def legacy_merge_sort(books, key):
+    # merge_sort original: recursivo, con copias L/R en cada nivel
+    if len(books) > 1:
+        mid = len(books) // 2
+        L = books[:mid]
+        R = books[mid:]
+        legacy_merge_sort(L, key)
+        legacy_merge_sort(R, key)
+        i = j = k = 0
+        while i < len(L) and j < len(R):
+            if getattr(L[i], key) < getattr(R[j], key):
+                books[k] = L[i]
+                i += 1
+            else:
+                books[k] = R[j]
+                j += 1
+            k += 1
+        while i < len(L):
+            books[k] = L[i]
+            i += 1
+            k += 1
+        while j < len(R):
+            books[k] = R[j]
+            j += 1
+            k += 1
+
+
+ALGORITHMS = [
+    ('quick_sort anterior', lambda books: legacy_quick_sort(books, 'title')),
+    ('merge_sort anterior', lambda books: legacy_merge_sort(books, 'title')),
+    ('introsort', lambda books: sort_by_key(books, 'title', algorithm='intro')),
+    ('merge ascendente', lambda books: sort_by_key(books, 'title', algorithm='merge')),
+    ('introsort multiclave', lambda books: sort_by_key(books, ('author', 'publication_year'), (False, True))),
+    ('sorted() de Python', lambda books: sorted(books, key=lambda book: book.title)),
+]
+
+
+def run(sizes):
+    for size in sizes:
+        books = list(generate_books(size))
+        random.Random(7).shuffle(books)
+        ordered = sorted(books, key=lambda book: book.title)
+        inputs = [('aleatorio', books), ('ordenado', ordered), ('invertido', ordered[::-1])]
+        print(f"{size} libros")
+        for name, sort in ALGORITHMS:
+            cells = []
+            for _, data in inputs:
+                start = time.perf_counter()
+                try:
+                    sort(list(data))
+                    cells.append(f"{(time.perf_counter() - start) * 1e3:10.1f} ms")
+                except RecursionError:
+                    cells.append(f"{'RecursionError':>13}")
+            print(f"  {name:22s}" + ''.join(f" | {label}: {cell}" for (label, _), cell in zip(inputs, cells)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    run(args.sizes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""Suite de benchmarks de todos los índices de trees.py, textindex.py, sorting.py y graph.py.
+
+Uso:
+    python -m benchmarks.suite [--sizes 10000 100000 1000000] [--output resultados.json]
+                               [--baseline benchmarks/baseline.json] [--tolerance 0.25]
+
+Cada caso mide una operación (inserción, búsqueda puntual, prefijo, rango,
+ordenamiento o relaciones) sobre un catálogo sintético con autores y géneros
+sesgados. Los resultados se escriben en JSON y, si se indica una línea base,
+se comparan caso por caso; la salida es 1 si algún caso empeora más que la tolerancia.
+Los casos que la línea base no tiene se listan como "sin línea base": al agregar
+un caso hay que regenerarla (--output benchmarks/baseline.json).
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import sys
+import time
+from benchmarks.catalog import generate_books
+from graph import Graph
+from sorting import quick_sort, merge_sort
+from textindex import TextIndex
+from trees import Trie, RadixTrie, TitleBST, RBTree, HashTable, NaryTree, BPlusTree
+
+DEFAULT_BASELINE = 'benchmarks/baseline.json'
+
+
+class Case:
+    def __init__(self, index, operation, func, ops):
+        self.index = index
+        self.operation = operation
+        self.func = func  # Ejecuta la operación completa; el tiempo se divide entre ops
+        self.ops = ops
+
+
+def build_cases(books, queries, rng):
+    """Genera los casos en orden; los de búsqueda usan las estructuras llenadas por los de inserción."""
+    sample = rng.sample(books, min(queries, len(books)))
+    titles = [book.title for book in sample]
+    prefixes = [book.title[:rng.randint(1, 4)] for book in sample]
+    years = [book.publication_year for book in sample]
+    genres = [book.genre for book in sample]
+    # Dos palabras del título y la mitad de otra, como al escribir en el buscador
+    words = [book.title.lower().split() for book in sample]
+    texts = [' '.join(w[:2] + [w[-1][:len(w[-1]) // 2 + 1]]) for w in words]
+    state = {}
+
+    def insert_into(name, factory, insert):
+        def run():
+            structure = factory()
+            for book in books:
+                insert(structure, book)
+            state[name] = structure
+        return run
+
+    def lookups(name, operation, keys):
+        def run():
+            structure = state[name]
+            for key in keys:
+                operation(structure, key)
+        return run
+
+    def genre_pages():
+        tree = state['NaryTree']
+        for genre in genres:
+            top = genre.split('/')[0]
+            pages = max(tree.count(top, subgenres=True) // 25, 1)
+            tree.page(top, rng.randrange(pages), 25)
+
+    def bplus_ranges():
+        tree = state['BPlusTree']
+        for year in years:
+            for _ in tree.range(year, year + 10):
+                pass
+
+    def rb_pages():
+        tree = state['RBTree']
+        pages = max(len(tree) // 25, 1)
+        for i in range(q):
+            tree.page(rng.randrange(pages), 25)
+
+    def same_author(name):
+        def run():
+            graph = state[name]
+            for title in titles:
+                for _ in graph.neighbors(title, 'same_author'):
+                    pass
+        return run
+
+    def sort_with(sort):
+        def run():
+            sort(list(books), 'title')
+        return run
+
+    n = len(books)
+    q = len(sample)
+    yield Case('Trie', 'insert', insert_into('Trie', Trie, lambda t, b: t.insert(b.title, b)), n)
+    yield Case('Trie', 'prefix_search_top10', lookups('Trie', lambda t, p: t.search(p, limit=10), prefixes), q)
+    yield Case('Trie', 'prefix_search_all', lookups('Trie', lambda t, p: t.search(p), prefixes[:10]), min(q, 10))
+    yield Case('RadixTrie', 'insert', insert_into('RadixTrie', RadixTrie, lambda t, b: t.insert(b.title, b)), n)
+    yield Case('RadixTrie', 'prefix_search_top10',
+               lookups('RadixTrie', lambda t, p: t.search(p, limit=10), prefixes), q)
+    yield Case('TitleBST', 'insert', insert_into('TitleBST', TitleBST, TitleBST.insert), n)
+    yield Case('TitleBST', 'point_lookup', lookups('TitleBST', TitleBST.search, titles), q)
+    yield Case('RBTree', 'insert', insert_into('RBTree', RBTree, RBTree.insert), n)
+    yield Case('RBTree', 'point_lookup', lookups('RBTree', RBTree.search, titles), q)
+    yield Case('RBTree', 'page_25', rb_pages, q)
+    yield Case('HashTable', 'insert', insert_into('HashTable', HashTable, HashTable.insert), n)
+    yield Case('HashTable', 'point_lookup', lookups('HashTable', HashTable.search, titles), q)
+    yield Case('NaryTree', 'insert', insert_into('NaryTree', NaryTree, NaryTree.insert), n)
+    yield Case('NaryTree', 'genre_lookup', lookups('NaryTree', NaryTree.search, genres), q)
+    yield Case('NaryTree', 'genre_page_25', genre_pages, q)
+    yield Case('NaryTree', 'genre_counts', lookups('NaryTree', lambda t, _: t.genre_counts(True), genres), q)
+    yield Case('BPlusTree', 'insert', insert_into('BPlusTree', BPlusTree, BPlusTree.insert), n)
+    yield Case('BPlusTree', 'point_lookup', lookups('BPlusTree', BPlusTree.search, years), q)
+    yield Case('BPlusTree', 'range_query_10y', bplus_ranges, q)
+    yield Case('TextIndex', 'insert', insert_into('TextIndex', TextIndex, TextIndex.add), n)
+    yield Case('TextIndex', 'search_top10',
+               lookups('TextIndex', lambda t, text: t.search(text, limit=10), texts), q)
+    yield Case('Graph', 'insert', insert_into('Graph', Graph, Graph.add_book), n)
+    yield Case('Graph', 'same_author_relations', same_author('Graph'), q)
+    yield Case('Graph', 'recommend', lookups('Graph', lambda g, t: g.recommend(t, 10), titles[:20]), min(q, 20))
+    yield Case('quick_sort', 'sort_title', sort_with(quick_sort), n)
+    yield Case('merge_sort', 'sort_title', sort_with(merge_sort), n)
+
+
+def run_suite(sizes, queries, seed):
+    results = []
+    for size in sizes:
+        books = list(generate_books(size, seed))
+        rng = random.Random(seed)
+        rng.shuffle(books)
+        for case in build_cases(books, queries, rng):
+            start = time.perf_counter()
+            case.func()
+            seconds = time.perf_counter() - start
+            result = {
+                'size': size,
+                'index': case.index,
+                'operation': case.operation,
+                'ops': case.ops,
+                'seconds': seconds,
+                'us_per_op': seconds / case.ops * 1e6,
+            }
+            results.append(result)
+            print(f"{size:>8} {case.index:<11} {case.operation:<22} {result['us_per_op']:12.2f} µs/op", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Imprime la razón contra la línea base y devuelve los casos que empeoraron."""
+    reference = {(r['size'], r['index'], r['operation']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        previous = reference.get((result['size'], result['index'], result['operation']))
+        if previous is None:
+            print(f"{result['size']:>8} {result['index']:<11} {result['operation']:<22}  sin línea base")
+            continue
+        ratio = result['us_per_op'] / previous['us_per_op'] if previous['us_per_op'] else float('inf')
+        flag = ''
+        if ratio > 1 + tolerance:
+            flag = '  REGRESIÓN'
+            regressions.append(result)
+        print(f"{result['size']:>8} {result['index']:<11} {result['operation']:<22} x{ratio:6.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=1000, help='consultas por caso de búsqueda')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='archivo JSON donde escribir los resultados')
+    parser.add_argument('--baseline', help=f'línea base JSON para comparar (p. ej. {DEFAULT_BASELINE})')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='empeoramiento relativo permitido')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    results = run_suite(args.sizes, args.queries, args.seed)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'queries': args.queries,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
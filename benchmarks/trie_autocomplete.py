@@ -0,0 +1,68 @@
+"""Compara la búsqueda por prefijo acotada (top-k) con la recolección completa del subárbol.
+
+Uso: python -m benchmarks.trie_autocomplete [--sizes 10000 100000] [--limit 10]
+"""
+import argparse
+import logging
+import time
+from benchmarks.catalog import generate_books
+from trees import Trie
+
+PREFIXES = ['e', 'la', 'mar', 'quijo']
+
+
+def legacy_collect(node):
+    # Recolección recursiva original de Trie._collect_books
+    books = []
+    if node.is_end_of_word:
+        books.extend(book for _, _, book in node.entries)
+    for child in node.children.values():
+        books.extend(legacy_collect(child))
+    return books
+
+
+def find_node(trie, prefix):
+    node = trie.root
+    for char in prefix.lower():
+        node = node.children.get(char)
+        if node is None:
+            return None
+    return node
+
+
+def time_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(sizes, limit, repeat):
+    for size in sizes:
+        trie = Trie(cache_size=limit)
+        for book in generate_books(size):
+            trie.insert(book.title, book)
+        print(f"{size} títulos")
+        for prefix in PREFIXES:
+            node = find_node(trie, prefix)
+            if node is None:
+                continue
+            full = time_call(lambda: legacy_collect(node), repeat)
+            lazy = time_call(lambda: trie.search(prefix, limit=limit * 2), repeat)
+            cached = time_call(lambda: trie.search(prefix, limit=limit), repeat)
+            print(f"  '{prefix}': completo {full * 1e3:9.3f} ms | perezoso k={limit * 2} {lazy * 1e3:7.3f} ms"
+                  f" | cacheado k={limit} {cached * 1e3:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    run(args.sizes, args.limit, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Compara la búsqueda aproximada sobre el Trie con la distancia de edición contra todos los títulos.
+
+Uso: python -m benchmarks.trie_fuzzy [--sizes 10000 100000] [--queries 5] [--max-edits 2]
+
+La fuerza bruta abandona cada título en cuanto la fila de Levenshtein supera
+max_edits, pero igual recorre todas las claves; el Trie poda subárboles enteros
+y su costo crece mucho más despacio que el número de títulos.
+"""
+import argparse
+import logging
+import random
+import time
+from benchmarks.catalog import generate_books
+from trees import Trie, RadixTrie
+
+VARIANTS = [('Trie', Trie), ('RadixTrie', RadixTrie)]
+
+
+def bounded_distance(query, key, max_edits):
+    # Levenshtein por filas; devuelve None en cuanto la distancia no puede quedar <= max_edits
+    row = list(range(len(query) + 1))
+    for char in key:
+        new_row = [row[0] + 1]
+        for j, query_char in enumerate(query, 1):
+            new_row.append(min(row[j] + 1, new_row[j - 1] + 1, row[j - 1] + (query_char != char)))
+        if min(new_row) > max_edits:
+            return None
+        row = new_row
+    return row[-1] if row[-1] <= max_edits else None
+
+
+def brute_force(titles, query, max_edits):
+    query = query.lower()
+    matches = []
+    for title in titles:
+        distance = bounded_distance(query, title.lower(), max_edits)
+        if distance is not None:
+            matches.append((distance, title))
+    return sorted(matches)
+
+
+def misspell(rng, title, edits):
+    # Aplica edits ediciones aleatorias (sustitución, inserción o borrado)
+    chars = list(title)
+    for _ in range(edits):
+        position = rng.randrange(len(chars))
+        operation = rng.choice(('sub', 'ins', 'del'))
+        if operation == 'sub':
+            chars[position] = rng.choice('abcdefghijklmnopqrstuvwxyz')
+        elif operation == 'ins':
+            chars.insert(position, rng.choice('abcdefghijklmnopqrstuvwxyz'))
+        elif len(chars) > 1:
+            del chars[position]
+    return ''.join(chars)
+
+
+def run(sizes, queries, max_edits, seed):
+    for size in sizes:
+        books = list(generate_books(size, seed))
+        titles = [book.title for book in books]
+        rng = random.Random(seed)
+        sample = [misspell(rng, rng.choice(titles), max_edits) for _ in range(queries)]
+        print(f"{size} títulos, {queries} consultas con {max_edits} ediciones")
+
+        start = time.perf_counter()
+        expected = [brute_force(titles, query, max_edits) for query in sample]
+        brute = (time.perf_counter() - start) / queries
+        print(f"  fuerza bruta {brute * 1e3:10.2f} ms/consulta")
+
+        for name, factory in VARIANTS:
+            trie = factory(cache_size=0)
+            for book in books:
+                trie.insert(book.title, book)
+            start = time.perf_counter()
+            results = [trie.fuzzy_search(query, max_edits) for query in sample]
+            elapsed = (time.perf_counter() - start) / queries
+            for found, reference in zip(results, expected):
+                if len(found) != len(reference):
+                    raise AssertionError(f"{name}: {len(found)} coincidencias, se esperaban {len(reference)}")
+            print(f"  {name:<10}   {elapsed * 1e3:10.2f} ms/consulta (x{brute / elapsed:.0f} más rápido)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=5)
+    parser.add_argument('--max-edits', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    run(args.sizes, args.queries, args.max_edits, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Informe de memoria: bytes por clave del Trie por carácter frente al Trie compacto (radix).
+
+Uso: python -m benchmarks.trie_memory [--sizes 10000 100000 1000000]
+Solo se mide la estructura del índice; los libros se crean antes de empezar a medir.
+Con 1M de títulos el Trie por carácter necesita varios GiB de RAM.
+"""
+import argparse
+import gc
+import logging
+import tracemalloc
+from benchmarks.catalog import generate_books
+from trees import Trie, RadixTrie
+
+VARIANTS = [
+    ('Trie (cache_size=10)', lambda: Trie(cache_size=10)),
+    ('Trie (cache_size=0)', lambda: Trie(cache_size=0)),
+    ('RadixTrie (cache_size=10)', lambda: RadixTrie(cache_size=10)),
+    ('RadixTrie (cache_size=0)', lambda: RadixTrie(cache_size=0)),
+]
+
+
+def measure(factory, books):
+    gc.collect()
+    tracemalloc.start()
+    trie = factory()
+    for book in books:
+        trie.insert(book.title, book)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del trie
+    return used
+
+
+def run(sizes):
+    for size in sizes:
+        books = list(generate_books(size))
+        key_bytes = sum(len(book.title) for book in books) / size
+        print(f"{size} títulos (longitud media {key_bytes:.1f} caracteres)")
+        for name, factory in VARIANTS:
+            used = measure(factory, books)
+            print(f"  {name:26s} {used / size:10.1f} bytes/clave  {used / 2**20:10.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    run(args.sizes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Almacén de contenidos (portadas y vistas previas) direccionado por hash
+#
+# Estructura del directorio:
+#   blobs.pack           contenidos concatenados, cada uno una sola vez
+#   blobs.idx            un registro <32sqqB por contenido: SHA-256, desplazamiento, longitud y tipo
+#
+# El SHA-256 se calcula sobre el tipo y los bytes, así que un texto y unos bytes
+# iguales no se confunden. El índice se escribe después del contenido: al abrir
+# se descartan los registros incompletos o que apuntan más allá del paquete.
+CACHE_BYTES = 32 * 1024 * 1024  # Tope de la caché LRU de contenidos decodificados
+_RECORD = struct.Struct('<32sqqB')
+_BYTES, _TEXT = 0, 1
+
+class BlobRef:
+    """Referencia liviana a un contenido del almacén; load() lo lee (o lo toma de la caché)."""
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def load(self):
+        return self.store.read(self.index)
+
+    @property
+    def digest(self):
+        return self.store.digest(self.index)
+
+    def __repr__(self):
+        return f"BlobRef({self.digest[:12]})"
+
+class BlobStore:
+    """Contenidos inmutables en un archivo de paquetes leído con mmap.
+
+    put() guarda un texto o unos bytes y devuelve un BlobRef; si el contenido
+    ya estaba no se vuelve a escribir. Los contenidos leídos se guardan en una
+    caché LRU acotada a cache_bytes, de modo que las portadas más consultadas
+    no tocan el disco y el resto no ocupa memoria.
+    """
+
+    def __init__(self, directory, cache_bytes=CACHE_BYTES):
+        self.directory = directory
+        self.cache_bytes = cache_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._digests = bytearray()  # SHA-256 concatenados, 32 bytes por contenido
+        self._offsets = array('q')
+        self._lengths = array('q')
+        self._kinds = bytearray()
+        self._by_digest = {}  # SHA-256 -> número de contenido
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # número de contenido -> (valor decodificado, bytes en el paquete)
+        self._cached_bytes = 0
+        self._map = None
+        self._pack = open(os.path.join(directory, 'blobs.pack'), 'a+b')
+        self._size = self._load_index()
+        self._pack.truncate(self._size)
+        self._index = open(os.path.join(directory, 'blobs.idx'), 'ab')
+        self._index.truncate(len(self._kinds) * _RECORD.size)
+        logger.info(f"Almacén de contenidos abierto en '{directory}' con {len(self)} contenidos.")
+
+    def __len__(self):
+        return len(self._kinds)
+
+    def _load_index(self):
+        pack_size = os.fstat(self._pack.fileno()).st_size
+        path = os.path.join(self.directory, 'blobs.idx')
+        data = b''
+        if os.path.exists(path):
+            with open(path, 'rb') as handle:
+                data = handle.read()
+        size = 0
+        for position in range(0, len(data) - _RECORD.size + 1, _RECORD.size):
+            digest, offset, length, kind = _RECORD.unpack_from(data, position)
+            if offset + length > pack_size:
+                logger.warning(f"Almacén '{self.directory}': se descartan registros de contenidos incompletos.")
+                break
+            self._append_entry(digest, offset, length, kind)
+            size = max(size, offset + length)
+        return size
+
+    def _append_entry(self, digest, offset, length, kind):
+        self._by_digest[digest] = len(self._kinds)
+        self._digests += digest
+        self._offsets.append(offset)
+        self._lengths.append(length)
+        self._kinds.append(kind)
+
+    def put(self, value):
+        """Guarda value (str o bytes) y devuelve su BlobRef; None se devuelve tal cual."""
+        if value is None:
+            return None
+        if isinstance(value, str):
+            data, kind = value.encode('utf-8'), _TEXT
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            data, kind = bytes(value), _BYTES
+        else:
+            raise TypeError(f"Contenido no admitido: {type(value).__name__}.")
+        digest = hashlib.sha256(bytes((kind,)) + data).digest()
+        with self._lock:
+            index = self._by_digest.get(digest)
+            if index is None:
+                index = len(self._kinds)
+                self._pack.write(data)
+                self._index.write(_RECORD.pack(digest, self._size, len(data), kind))
+                self._append_entry(digest, self._size, len(data), kind)
+                self._size += len(data)
+                metrics.increment('blob_store.write')
+        return BlobRef(self, index)
+
+    def ref(self, digest):
+        """BlobRef del contenido con ese SHA-256 en hexadecimal (p. ej. leído de una instantánea)."""
+        index = self._by_digest.get(bytes.fromhex(digest))
+        if index is None:
+            raise KeyError(f"Contenido {digest} no encontrado en '{self.directory}'.")
+        return BlobRef(self, index)
+
+    def digest(self, index):
+        return self._digests[index * 32:(index + 1) * 32].hex()
+
+    def read(self, index):
+        with self._lock:
+            cached = self._cache.get(index)
+            if cached is not None:
+                self._cache.move_to_end(index)
+                metrics.increment('blob_store.hit')
+                return cached[0]
+            offset, length = self._offsets[index], self._lengths[index]
+            if self._map is None or offset + length > len(self._map):
+                self._remap()
+            data = self._map[offset:offset + length]
+        metrics.increment('blob_store.miss')
+        value = data.decode('utf-8') if self._kinds[index] == _TEXT else data
+        with self._lock:
+            if index not in self._cache and length <= self.cache_bytes:
+                # Se descuenta la misma longitud que se sumó: len() de un texto cuenta
+                # caracteres, no bytes UTF-8, y dejaría el contador por encima del tope
+                self._cache[index] = (value, length)
+                self._cached_bytes += length
+                while self._cached_bytes > self.cache_bytes:
+                    _, (_, evicted) = self._cache.popitem(last=False)
+                    self._cached_bytes -= evicted
+        return value
+
+    def _remap(self):
+        # El paquete creció desde el último mapeo: se vuelca lo escrito y se mapea completo
+        self._pack.flush()
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._pack.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def flush(self):
+        """Hace durables los contenidos guardados; el paquete va a disco antes que el índice."""
+        with self._lock:
+            for handle in (self._pack, self._index):
+                handle.flush()
+                os.fsync(handle.fileno())
+
+    def stats(self):
+        return {'blobs': len(self), 'bytes': self._size, 'cached': len(self._cache),
+                'cached_bytes': self._cached_bytes}
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._pack.close()
+            self._index.close()
+            self._cache.clear()
@@ -1,8 +1,60 @@
+from blobstore import BlobRef
+
 class Book:
+    FIELDS = ('title', 'author', 'genre', 'publication_year', 'portada', 'vista_previa')
+    PAYLOAD_FIELDS = ('portada', 'vista_previa')  # Pueden guardarse como BlobRef y leerse al usarlos
+    __slots__ = ('title', 'author', 'genre', 'publication_year', '_portada', '_vista_previa')
+
     def __init__(self, title, author, genre, publication_year, portada, vista_previa):
         self.title = title
         self.author = author
         self.genre = genre
         self.publication_year = publication_year
         self.portada = portada  # Image of the book cover
-        self.vista_previa = vista_previa  # Preview fragment of the book
\ No newline at end of file
+        self.vista_previa = vista_previa  # Preview fragment of the book
+
+    @property
+    def portada(self):
+        value = self._portada
+        return value.load() if isinstance(value, BlobRef) else value
+
+    @portada.setter
+    def portada(self, value):
+        self._portada = value
+
+    @property
+    def vista_previa(self):
+        value = self._vista_previa
+        return value.load() if isinstance(value, BlobRef) else value
+
+    @vista_previa.setter
+    def vista_previa(self, value):
+        self._vista_previa = value
+
+    def stored(self, field):
+        """Valor tal como está guardado: para portada y vista_previa puede ser un BlobRef sin leer."""
+        return getattr(self, '_' + field if field in self.PAYLOAD_FIELDS else field)
+
+def checked_fields(fields):
+    """Copia de fields con los tipos comprobados, sin modificar nada del sistema.
+
+    El año debe ser entero (un texto como '1999' se convierte), título, autor y
+    género deben ser texto, y portada y vista previa texto o None: son los
+    valores que admiten los índices y el WAL. Lanza TypeError o ValueError.
+    """
+    unknown = set(fields) - set(Book.FIELDS)
+    if unknown:
+        raise ValueError(f"Atributos desconocidos: {', '.join(sorted(unknown))}.")
+    checked = dict(fields)
+    for field, value in fields.items():
+        if field == 'publication_year':
+            if isinstance(value, str):
+                try:
+                    checked[field] = int(value)
+                except ValueError:
+                    raise ValueError(f"Año de publicación no válido: {value!r}.") from None
+            elif isinstance(value, bool) or not isinstance(value, int):
+                raise TypeError(f"El año de publicación debe ser un entero, no {type(value).__name__}.")
+        elif not isinstance(value, str) and not (value is None and field in Book.PAYLOAD_FIELDS):
+            raise TypeError(f"El atributo '{field}' debe ser texto, no {type(value).__name__}.")
+    return checked
@@ -0,0 +1,194 @@
+import logging
+from bisect import bisect_left
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Almacén columnar de libros: identificadores enteros y columnas NumPy
+class BookStore:
+    """Catálogo en columnas para filtrar, contar y ordenar sin recorrer objetos Book.
+
+    Cada libro recibe un identificador entero consecutivo. Los años se guardan en
+    un arreglo int32; autor y género se codifican como enteros contra tablas de
+    diccionario; los títulos viven en una tabla de cadenas. Los filtros devuelven
+    arreglos de identificadores y books_for() los traduce a objetos Book.
+    Eliminar un libro solo marca su fila como muerta: los identificadores de los
+    demás no cambian y todas las consultas ignoran las filas muertas.
+    """
+
+    COLUMNS = ('title', 'author', 'genre', 'publication_year')
+
+    def __init__(self, capacity=1024):
+        self.books = []  # id -> Book
+        self.titles = []  # id -> título
+        self.authors = []  # código -> autor
+        self.genres = []  # código -> género
+        self._author_codes = {}
+        self._genre_codes = {}
+        self._years = np.empty(capacity, dtype=np.int32)
+        self._author_column = np.empty(capacity, dtype=np.int32)
+        self._genre_column = np.empty(capacity, dtype=np.int32)
+        self._alive = np.empty(capacity, dtype=bool)
+        self._rows = {}  # id(libro) -> identificador de su fila viva
+        self._title_order = None  # Orden por título de las filas vivas, calculado al pedirlo
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def years(self):
+        return self._years[:len(self.books)]
+
+    @property
+    def author_codes(self):
+        return self._author_column[:len(self.books)]
+
+    @property
+    def genre_codes(self):
+        return self._genre_column[:len(self.books)]
+
+    @property
+    def alive(self):
+        return self._alive[:len(self.books)]
+
+    def add(self, book):
+        return self.add_many((book,))[0]
+
+    def add_many(self, books):
+        """Agrega libros y devuelve el rango de identificadores asignados."""
+        books = list(books)
+        start = len(self.books)
+        self._reserve(start + len(books))
+        end = start + len(books)
+        self._years[start:end] = [book.publication_year for book in books]
+        self._author_column[start:end] = [self._encode(self.authors, self._author_codes, book.author) for book in books]
+        self._genre_column[start:end] = [self._encode(self.genres, self._genre_codes, book.genre) for book in books]
+        self._alive[start:end] = True
+        self._rows.update((id(book), row) for row, book in enumerate(books, start))
+        self.books.extend(books)
+        self.titles.extend(book.title for book in books)
+        self._title_order = None
+        return range(start, end)
+
+    def _reserve(self, capacity):
+        if capacity <= len(self._years):
+            return
+        size = max(capacity, 2 * len(self._years))
+        for name in ('_years', '_author_column', '_genre_column', '_alive'):
+            column = getattr(self, name)
+            grown = np.empty(size, dtype=column.dtype)
+            grown[:len(self.books)] = column[:len(self.books)]
+            setattr(self, name, grown)
+
+    def remove(self, book):
+        """Marca como muerta la fila de book; devuelve False si no estaba en el almacén."""
+        row = self._rows.pop(id(book), None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        self._title_order = None
+        return True
+
+    @staticmethod
+    def _encode(table, codes, value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(table)
+            table.append(value)
+        return code
+
+    def books_for(self, ids):
+        books = self.books
+        return [books[i] for i in ids.tolist()] if isinstance(ids, np.ndarray) else [books[i] for i in ids]
+
+    # Filtros vectorizados: devuelven máscaras booleanas combinables con & y |
+    def year_mask(self, year_from=None, year_to=None):
+        years = self.years
+        mask = np.ones(len(years), dtype=bool)
+        if year_from is not None:
+            mask &= years >= year_from
+        if year_to is not None:
+            mask &= years <= year_to
+        return mask
+
+    def genre_mask(self, genre, include_subgenres=True):
+        """Libros del género dado; con include_subgenres también 'genero/subgénero'."""
+        genre = genre.lower()
+        wanted = [code for code, name in enumerate(self.genres)
+                  if name.lower() == genre or (include_subgenres and name.lower().startswith(genre + '/'))]
+        return np.isin(self.genre_codes, wanted)
+
+    def author_mask(self, author):
+        code = self._author_codes.get(author)
+        if code is None:
+            return np.zeros(len(self.books), dtype=bool)
+        return self.author_codes == code
+
+    def filter(self, year_from=None, year_to=None, genre=None, author=None):
+        """Identificadores vivos que cumplen todos los filtros indicados."""
+        mask = self.year_mask(year_from, year_to) & self.alive
+        if genre is not None:
+            mask &= self.genre_mask(genre)
+        if author is not None:
+            mask &= self.author_mask(author)
+        return np.flatnonzero(mask)
+
+    def genre_counts(self):
+        counts = np.bincount(self.genre_codes[self.alive], minlength=len(self.genres))
+        return {genre: int(count) for genre, count in zip(self.genres, counts) if count}
+
+    def title_order(self):
+        if self._title_order is None:
+            titles = self.titles
+            self._title_order = np.array(sorted(np.flatnonzero(self.alive).tolist(), key=titles.__getitem__),
+                                         dtype=np.int64)
+        return self._title_order
+
+    def argsort(self, key, reverse=False, ids=None):
+        """Identificadores ordenados (estable) por la columna key; ids restringe a un subconjunto.
+
+        Sin ids se ordenan todas las filas vivas.
+        """
+        if key not in self.COLUMNS:
+            raise ValueError(f"Columna '{key}' no soportada por el almacén columnar.")
+        if ids is None:
+            ids = np.flatnonzero(self.alive)
+        if key == 'title':
+            # El rango de cada libro en el orden por título sirve de clave entera
+            order = self.title_order()
+            ranks = np.zeros(len(self.books), dtype=np.int64)
+            ranks[order] = np.arange(len(order))
+            column = ranks
+        elif key == 'publication_year':
+            column = self.years
+        else:
+            table = self.authors if key == 'author' else self.genres
+            codes = self.author_codes if key == 'author' else self.genre_codes
+            # Los códigos siguen el orden de aparición; se reemplazan por su rango alfabético
+            code_rank = np.empty(len(table), dtype=np.int64)
+            code_rank[np.array(sorted(range(len(table)), key=table.__getitem__), dtype=np.int64)] = np.arange(len(table))
+            column = code_rank[codes]
+        ids = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(-column[ids] if reverse else column[ids], kind='stable')
+        return ids[order]
+
+    def find(self, key, value):
+        """Menor identificador vivo con key == value, o None."""
+        if key == 'title':
+            order = self.title_order()
+            position = bisect_left(order, value, key=self.titles.__getitem__)
+            if position < len(order) and self.titles[order[position]] == value:
+                return int(order[position])
+            return None
+        if key == 'publication_year':
+            matches = np.flatnonzero((self.years == value) & self.alive)
+        elif key in ('author', 'genre'):
+            codes = self._author_codes if key == 'author' else self._genre_codes
+            code = codes.get(value)
+            if code is None:
+                return None
+            column = self.author_codes if key == 'author' else self.genre_codes
+            matches = np.flatnonzero((column == code) & self.alive)
+        else:
+            raise ValueError(f"Columna '{key}' no soportada por el almacén columnar.")
+        return int(matches[0]) if len(matches) else None
@@ -1,53 +1,285 @@
+import heapq
 import logging
+from itertools import islice
+from operator import itemgetter
 
-# Configuración del logger
-logging.basicConfig(level=logging.INFO)
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: solo lo necesita Graph.recommend_all
+    np = None
+from metrics import metrics
+
+# Configuración del logger: sin handlers propios; los mensajes por operación van a DEBUG
 logger = logging.getLogger(__name__)
 
+# Relaciones derivadas de atributos compartidos y el atributo que las define
+ATTRIBUTE_RELATIONS = {
+    'same_author': 'author',
+    'same_genre': 'genre',
+    'same_publication_year': 'publication_year',
+}
+
+# Pesos por defecto de cada relación al puntuar recomendaciones
+RELATION_WEIGHTS = {
+    'same_author': 3.0,
+    'same_genre': 1.0,
+    'same_publication_year': 0.5,
+}
+DEFAULT_EDGE_WEIGHT = 1.0  # Peso de las relaciones explícitas sin peso configurado
+
 # Implementación del Grafo para relaciones entre libros
 class Edge:
+    __slots__ = ('from_book', 'to_book', 'relation')
+
     def __init__(self, from_book, to_book, relation):
         self.from_book = from_book
         self.to_book = to_book
         self.relation = relation  # e.g., 'same_author', 'same_genre'
 
 class Graph:
+    """Grafo de libros con listas de adyacencia y cubetas invertidas por atributo.
+
+    Las relaciones por atributo compartido ('same_author', 'same_genre',
+    'same_publication_year') no se materializan como aristas: se obtienen de
+    las cubetas, de modo que dos libros del mismo autor quedan relacionados sin
+    crear O(n²) aristas. Las aristas explícitas con otras relaciones se guardan
+    en listas de adyacencia por título.
+    """
+
     def __init__(self):
         self.nodes = {}
-        self.edges = []
+        self.adjacency = {}  # título -> lista de aristas explícitas que lo tocan
+        # relación -> valor del atributo -> {título: libro}
+        self.buckets = {relation: {} for relation in ATTRIBUTE_RELATIONS}
         logger.info("Inicializado el Grafo de relaciones entre libros.")
 
+    @metrics.timed('graph.add_book')
     def add_book(self, book):
         if book.title not in self.nodes:
-            self.nodes[book.title] = book
-            logger.info(f"Added book '{book.title}' to the graph.")
+            self._add_node(book)
+            logger.debug("Added book '%s' to the graph.", book.title)
         else:
-            logger.warning(f"Book '{book.title}' already exists in the graph.")
+            logger.warning("Book '%s' already exists in the graph.", book.title)
+
+    def add_books(self, books):
+        added = 0
+        skipped = 0
+        for book in books:
+            if book.title in self.nodes:
+                skipped += 1
+            else:
+                self._add_node(book)
+                added += 1
+        logger.info(f"Added {added} books to the graph ({skipped} already present).")
+
+    def _add_node(self, book):
+        self.nodes[book.title] = book
+        for relation, attribute in ATTRIBUTE_RELATIONS.items():
+            self.buckets[relation].setdefault(getattr(book, attribute), {})[book.title] = book
+
+    @metrics.timed('graph.remove_book')
+    def remove_book(self, book_title):
+        """Quita el libro, sus cubetas y sus aristas explícitas; devuelve las aristas quitadas
+        como (libro1, libro2, relación) para poder restaurarlas con add_edges."""
+        book = self.nodes.pop(book_title, None)
+        if book is None:
+            logger.warning("Book '%s' not found in the graph.", book_title)
+            return []
+        for relation, attribute in ATTRIBUTE_RELATIONS.items():
+            value = getattr(book, attribute)
+            bucket = self.buckets[relation][value]
+            del bucket[book_title]
+            if not bucket:
+                del self.buckets[relation][value]
+        removed = []
+        for edge in dict.fromkeys(self.adjacency.pop(book_title, ())):  # Un lazo aparece dos veces
+            other = edge.to_book if edge.from_book.title == book_title else edge.from_book
+            if other.title != book_title:
+                edges = self.adjacency[other.title]
+                edges[:] = [kept for kept in edges if kept is not edge]
+                if not edges:
+                    del self.adjacency[other.title]
+            removed.append((edge.from_book, edge.to_book, edge.relation))
+        logger.debug("Removed book '%s' from the graph.", book_title)
+        return removed
 
     def connect_books(self, book1_title, book2_title):
+        """Devuelve las relaciones por atributo entre dos libros.
+
+        Ya no es necesario llamarlo para relacionarlos: las cubetas lo hacen al agregarlos.
+        """
         book1 = self.nodes.get(book1_title)
         book2 = self.nodes.get(book2_title)
         if not book1 or not book2:
             logger.warning("One or both books not found in the graph.")
-            return
+            return []
+        return [relation for relation, attribute in ATTRIBUTE_RELATIONS.items()
+                if getattr(book1, attribute) == getattr(book2, attribute)]
 
-        relations = []
-        if book1.author == book2.author:
-            relations.append('same_author')
-        if book1.genre == book2.genre:
-            relations.append('same_genre')
-        if book1.publication_year == book2.publication_year:
-            relations.append('same_publication_year')
+    def add_edge(self, book1, book2, relation):
+        edge = Edge(book1, book2, relation)
+        self.adjacency.setdefault(book1.title, []).append(edge)
+        self.adjacency.setdefault(book2.title, []).append(edge)
+        logger.debug("Connected '%s' and '%s' via '%s'.", book1.title, book2.title, relation)
+        return edge
 
-        for relation in relations:
-            edge = Edge(book1, book2, relation)
-            self.edges.append(edge)
-            logger.info(f"Connected '{book1.title}' and '{book2.title}' via '{relation}'.")
+    def add_edges(self, edges):
+        count = 0
+        for book1, book2, relation in edges:
+            self.add_edge(book1, book2, relation)
+            count += 1
+        logger.info(f"Restored {count} relations in the graph.")
 
+    def iter_edges(self):
+        # Cada arista explícita aparece en dos listas; se emite solo desde su origen
+        for title, edges in self.adjacency.items():
+            for edge in edges:
+                if edge.from_book.title == title:
+                    yield edge.from_book, edge.to_book, edge.relation
+
+    def neighbors(self, book_title, relation=None):
+        """Genera (título relacionado, relación) en O(grado), sin recorrer el grafo entero."""
+        book = self.nodes.get(book_title)
+        if book is None:
+            return
+        for edge in self.adjacency.get(book_title, ()):
+            if relation is None or edge.relation == relation:
+                other = edge.to_book if edge.from_book.title == book_title else edge.from_book
+                yield other.title, edge.relation
+        for name, attribute in ATTRIBUTE_RELATIONS.items():
+            if relation is not None and name != relation:
+                continue
+            for related_title in self.buckets[name].get(getattr(book, attribute), ()):
+                if related_title != book_title:
+                    yield related_title, name
+
+    @metrics.timed('graph.get_relations')
     def get_relations(self, book_title):
-        relations = []
-        for edge in self.edges:
-            if edge.from_book.title == book_title or edge.to_book.title == book_title:
-                related_title = edge.to_book.title if edge.from_book.title == book_title else edge.from_book.title
-                relations.append((related_title, edge.relation))
-        return relations
\ No newline at end of file
+        return list(self.neighbors(book_title))
+
+    @metrics.timed('graph.recommend')
+    def recommend(self, book_title, k=10, weights=None, depth=2, decay=0.5, beam=50, max_bucket=1000):
+        """Recomienda hasta k títulos mediante BFS ponderado y acotado a partir de book_title.
+
+        Cada salto reparte la masa del nodo entre sus vecinos según el peso de la
+        relación dividido por el tamaño de la cubeta (o de la lista de adyacencia).
+        Solo los beam nodos con más masa se expanden en el salto siguiente y cada
+        cubeta aporta como máximo max_bucket vecinos. Devuelve (título, puntuación).
+        """
+        if book_title not in self.nodes:
+            logger.warning("Book '%s' not found in the graph.", book_title)
+            return []
+        weights = {**RELATION_WEIGHTS, **(weights or {})}
+        scores = {}
+        frontier = {book_title: 1.0}
+        for _ in range(depth):
+            reached = {}
+            for title, mass in frontier.items():
+                for related_title, share in self._weighted_neighbors(title, weights, max_bucket):
+                    reached[related_title] = reached.get(related_title, 0.0) + mass * share
+            reached.pop(book_title, None)
+            for title, score in reached.items():
+                scores[title] = scores.get(title, 0.0) + score
+            frontier = {title: score * decay
+                        for title, score in heapq.nlargest(beam, reached.items(), key=itemgetter(1))}
+        return heapq.nlargest(k, scores.items(), key=itemgetter(1))
+
+    def _weighted_neighbors(self, book_title, weights, max_bucket):
+        book = self.nodes[book_title]
+        edges = self.adjacency.get(book_title, ())
+        for edge in edges:
+            other = edge.to_book if edge.from_book.title == book_title else edge.from_book
+            yield other.title, weights.get(edge.relation, DEFAULT_EDGE_WEIGHT) / len(edges)
+        for relation, attribute in ATTRIBUTE_RELATIONS.items():
+            weight = weights.get(relation, 0.0)
+            if not weight:
+                continue
+            bucket = self.buckets[relation][getattr(book, attribute)]
+            share = weight / len(bucket)
+            for related_title in islice(bucket, max_bucket):
+                if related_title != book_title:
+                    yield related_title, share
+
+    def recommend_all(self, k=10, weights=None, titles=None, alpha=0.15, iterations=20, block_size=32):
+        """Precalcula recomendaciones con PageRank personalizado vectorizado (requiere NumPy).
+
+        La matriz de transición nunca se materializa: cada relación por atributo se
+        aplica como suma por cubeta (np.add.reduceat) y difusión uniforme a sus
+        miembros, en O(n) por relación. Se procesan block_size orígenes a la vez;
+        el costo total es O(iterations * n * len(titles)). Devuelve un diccionario
+        título -> lista de (título, puntuación).
+        """
+        if np is None:
+            raise ImportError("Graph.recommend_all requiere NumPy (pip install numpy).")
+        weights = {**RELATION_WEIGHTS, **(weights or {})}
+        all_titles = list(self.nodes)
+        position = {title: i for i, title in enumerate(all_titles)}
+        count = len(all_titles)
+        if count == 0:
+            return {}
+
+        # Factores por relación: código de cubeta de cada libro y orden agrupado por cubeta
+        factors = []
+        out_weight = np.zeros(count)
+        for relation in ATTRIBUTE_RELATIONS:
+            weight = weights.get(relation, 0.0)
+            if not weight:
+                continue
+            codes = np.empty(count, dtype=np.int64)
+            code = 0
+            for members in self.buckets[relation].values():
+                if members:
+                    codes[[position[title] for title in members]] = code
+                    code += 1
+            order = np.argsort(codes, kind='stable')
+            sorted_codes = codes[order]
+            starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+            inverse_sizes = 1.0 / np.bincount(codes)[codes]
+            factors.append((weight, codes, order, starts, inverse_sizes))
+            out_weight += weight
+
+        # Aristas explícitas en ambos sentidos
+        sources, targets, edge_weights = [], [], []
+        for book1, book2, relation in self.iter_edges():
+            weight = weights.get(relation, DEFAULT_EDGE_WEIGHT)
+            i, j = position[book1.title], position[book2.title]
+            sources += [i, j]
+            targets += [j, i]
+            edge_weights += [weight, weight]
+        sources = np.array(sources, dtype=np.int64)
+        targets = np.array(targets, dtype=np.int64)
+        edge_weights = np.array(edge_weights)
+        np.add.at(out_weight, sources, edge_weights)
+        # Un libro sin relaciones conserva su masa
+        inverse_out = np.divide(1.0, out_weight, out=np.zeros(count), where=out_weight > 0)
+
+        requested = list(titles) if titles is not None else all_titles
+        results = {}
+        for start in range(0, len(requested), block_size):
+            block = [position[title] for title in requested[start:start + block_size]]
+            columns = np.arange(len(block))
+            restart = np.zeros((count, len(block)))
+            restart[block, columns] = 1.0
+            scores = restart.copy()
+            for _ in range(iterations):
+                outgoing = scores * inverse_out[:, None]
+                walked = scores * (out_weight == 0)[:, None]
+                for weight, codes, order, starts, inverse_sizes in factors:
+                    bucket_mass = np.add.reduceat(outgoing[order], starts, axis=0)
+                    walked += weight * bucket_mass[codes] * inverse_sizes[:, None]
+                if len(sources):
+                    np.add.at(walked, targets, edge_weights[:, None] * outgoing[sources])
+                scores = alpha * restart + (1 - alpha) * walked
+            scores[block, columns] = -np.inf
+            top = min(k, count - 1)
+            for column, source in enumerate(block):
+                if top <= 0:
+                    results[all_titles[source]] = []
+                    continue
+                candidates = np.argpartition(-scores[:, column], top - 1)[:top]
+                candidates = candidates[np.argsort(-scores[candidates, column], kind='stable')]
+                # Como recommend(), solo libros alcanzados: con pocos relacionados la lista no se rellena con ceros
+                results[all_titles[source]] = [(all_titles[i], float(scores[i, column])) for i in candidates
+                                               if scores[i, column] > 0]
+        logger.info(f"Precomputed recommendations for {len(results)} books.")
+        return results
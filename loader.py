@@ -0,0 +1,107 @@
+import csv
+import json
+import logging
+import time
+from itertools import islice
+from book import Book, checked_fields
+
+logger = logging.getLogger(__name__)
+
+# Carga en streaming de catálogos CSV/JSONL por bloques de tamaño fijo
+class LoadStats:
+    def __init__(self):
+        self.rows = 0
+        self.loaded = 0
+        self.skipped = 0
+        self.chunks = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        return (f"LoadStats(rows={self.rows}, loaded={self.loaded}, skipped={self.skipped}, "
+                f"chunks={self.chunks}, rows_per_second={self.rows_per_second:.0f})")
+
+def read_records(path, file_format=None):
+    """Genera diccionarios desde un archivo CSV (con encabezado) o JSONL, una fila a la vez.
+
+    Los campos esperados son los atributos de Book: title, author, genre,
+    publication_year, portada y vista_previa.
+    """
+    file_format = file_format or _detect_format(path)
+    with open(path, newline='', encoding='utf-8') as handle:
+        if file_format == 'csv':
+            yield from csv.DictReader(handle)
+        elif file_format == 'jsonl':
+            for line_number, line in enumerate(handle, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as error:
+                    logger.warning(f"Línea {line_number} de '{path}' no es JSON válido: {error}")
+                    yield None
+        else:
+            raise ValueError(f"Formato de catálogo '{file_format}' no soportado.")
+
+def _detect_format(path):
+    lowered = str(path).lower()
+    if lowered.endswith('.csv'):
+        return 'csv'
+    if lowered.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    raise ValueError(f"No se puede deducir el formato del catálogo '{path}'. Use file_format='csv' o 'jsonl'.")
+
+def parse_books(records, stats, include_payloads=False):
+    """Convierte registros en libros con las mismas reglas de tipos que add_book, descartando filas inválidas."""
+    for record in records:
+        stats.rows += 1
+        if not isinstance(record, dict) or not record.get('title'):
+            stats.skipped += 1
+            continue
+        fields = {'title': record['title'], 'publication_year': record.get('publication_year')}
+        for field in ('author', 'genre'):
+            value = record.get(field)
+            fields[field] = '' if value is None else value
+        for field in Book.PAYLOAD_FIELDS:
+            fields[field] = record.get(field) if include_payloads else None
+        try:
+            fields = checked_fields(fields)
+        except (TypeError, ValueError) as error:
+            logger.warning(f"Fila inválida para {record.get('title')!r}: {error} Fila omitida.")
+            stats.skipped += 1
+            continue
+        yield Book(**fields)
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def load_catalog(path, sink, chunk_size=50000, include_payloads=False, file_format=None):
+    """Lee el catálogo en bloques y entrega cada bloque de libros a sink (por ejemplo main.add_books).
+
+    Solo un bloque está en memoria a la vez, así que el pico de memoria del cargador no
+    depende del tamaño del archivo. Devuelve un LoadStats con filas por segundo.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size debe ser positivo.")
+    stats = LoadStats()
+    start = time.perf_counter()
+    books = parse_books(read_records(path, file_format), stats, include_payloads)
+    for chunk in chunked(books, chunk_size):
+        sink(chunk)
+        stats.loaded += len(chunk)
+        stats.chunks += 1
+        stats.seconds = time.perf_counter() - start
+        logger.debug(f"Bloque {stats.chunks} cargado: {stats.loaded} libros, {stats.rows_per_second:.0f} filas/s.")
+    stats.seconds = time.perf_counter() - start
+    logger.info(f"Catálogo '{path}' cargado: {stats.loaded} libros, {stats.skipped} filas omitidas, "
+                f"{stats.rows_per_second:.0f} filas/s.")
+    return stats
@@ -1,16 +1,41 @@
+import argparse
+import asyncio
+import gc
+import heapq
 import logging
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from itertools import islice
 from logging.handlers import RotatingFileHandler
 import matplotlib.pyplot as plt
 import tkinter as tk
+from operator import attrgetter
 from tkinter import messagebox, ttk
 from sorting import quick_sort, merge_sort, binary_search
 from graph import Graph
-from trees import Trie, TitleBST, RBTree, HashTable, NaryTree, BPlusTree
-from book import Book
+from trees import Trie, RadixTrie, TitleBST, RBTree, HashTable, NaryTree, BPlusTree
+from book import Book, checked_fields
+from bookstore import BookStore
+from textindex import TextIndex, TEXT_FIELDS, tokenize
+from querycache import QueryCache
+from loader import load_catalog
+from snapshot import save_snapshot, load_snapshot
+from metrics import metrics
+from service import QueryService, QueryClient, DEFAULT_HOST, DEFAULT_PORT
+from parallel import ParallelIndexBuilder
+from wal import WriteAheadLog, sync_directory
+from blobstore import BlobStore, BlobRef
 
 # Configuración avanzada del sistema de logueo
 logger = logging.getLogger('LibrarySystem')
-logger.setLevel(logging.DEBUG)
+# Los mensajes por libro son DEBUG; LIBRARY_LOG_LEVEL=DEBUG los muestra
+logger.setLevel(os.environ.get('LIBRARY_LOG_LEVEL', 'INFO'))
 
 # Formateador
 formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
@@ -29,18 +54,37 @@ console_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
+# Métricas por índice (desactivadas por defecto): LIBRARY_METRICS=1 las activa
+# y, opcionalmente, LIBRARY_METRICS_FILE indica dónde exportarlas en JSON al salir
+if os.environ.get('LIBRARY_METRICS'):
+    metrics.enable()
+
+# Cantidad máxima de resultados mostrados por búsqueda en la interfaz
+SEARCH_LIMIT = 25
+# Ediciones toleradas por palabra en la búsqueda aproximada ('Quijotte' -> 'Quijote'); menos en palabras cortas
+FUZZY_EDITS = 2
+# Usar Tries compactos (radix) para títulos y autores: mismo API y ~20 veces menos memoria
+COMPACT_TRIES = True
+# Importaciones a partir de este tamaño usan varios procesos si se piden (--workers)
+PARALLEL_MIN_BOOKS = 20000
+
 # Implementación de funciones de inserción y búsqueda
-title_trie = Trie()
-author_trie = Trie()
+title_trie = RadixTrie(cache_size=SEARCH_LIMIT) if COMPACT_TRIES else Trie(cache_size=SEARCH_LIMIT)
+author_trie = RadixTrie(cache_size=SEARCH_LIMIT) if COMPACT_TRIES else Trie(cache_size=SEARCH_LIMIT)
 title_bst = TitleBST()
 rb_tree = RBTree()
 hash_table = HashTable()
 nary_tree = NaryTree()
 bplus_tree = BPlusTree()
 graph = Graph()
+book_store = BookStore()
+text_index = TextIndex()
+query_cache = QueryCache()
 
 def add_book(book):
-    logger.info(f"Agregando libro '{book.title}' al sistema.")
+    logger.debug("Agregando libro '%s' al sistema.", book.title)
+    _check_book(book)
+    _log_books((book,))
     # Insertar en el Trie de títulos
     title_trie.insert(book.title, book)
     # Insertar en el Trie de autores
@@ -57,45 +101,728 @@ def add_book(book):
     bplus_tree.insert(book)
     # Agregar al Grafo
     graph.add_book(book)
-    logger.info(f"Libro '{book.title}' agregado exitosamente al sistema.")
+    # Agregar al almacén columnar
+    book_store.add(book)
+    # Agregar al índice de texto completo
+    text_index.add(book)
+    query_cache.bump(INDEXED_FIELDS)
+    _store_payloads((book,))
+    logger.debug("Libro '%s' agregado exitosamente al sistema.", book.title)
+
+def add_books(books, workers=1):
+    start = time.perf_counter()
+    books = list(books)
+    if not books:
+        return 0
+    for book in books:
+        _check_book(book)
+    _log_books(books)
+    if _use_parallel(books, workers):
+        with _gc_paused():
+            _publish(_build_parallel(books, workers))
+    else:
+        # Ordenar una sola vez por cada clave
+        by_title = sorted(books, key=attrgetter('title'))
+        by_year = sorted(by_title, key=attrgetter('publication_year'))
+        with _gc_paused():
+            _add_sorted(books, by_title, by_year)
+    _store_payloads(books)
+    elapsed = time.perf_counter() - start
+    logger.info(f"Agregados {len(books)} libros al sistema en {elapsed:.2f} s.")
+    return len(books)
+
+@contextmanager
+def _gc_paused():
+    # Las cargas masivas crean millones de nodos; el recolector cíclico los recorrería
+    # repetidamente sin encontrar basura
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def _add_sorted(books, by_title, by_year):
+    global title_bst, rb_tree, bplus_tree
+    title_bst, rb_tree, bplus_tree = _merged_trees(by_title, by_year)
+    _add_incremental(by_title)
+
+def _merged_trees(by_title, by_year):
+    # Reconstruye los árboles balanceados fusionando su contenido con las corridas ordenadas;
+    # solo lee los árboles actuales, que siguen sirviendo consultas hasta reemplazarlos
+    return (TitleBST.bulk_load(heapq.merge(title_bst.in_order_traversal(), by_title, key=attrgetter('title'))),
+            RBTree.bulk_load(heapq.merge(rb_tree.in_order_traversal(), by_title, key=attrgetter('title'))),
+            BPlusTree.bulk_load(
+                heapq.merge(bplus_tree.in_order_traversal(), by_year, key=attrgetter('publication_year')),
+                order=bplus_tree.order))
+
+def _restore_sorted(by_title, by_year):
+    # Resto de los índices cuando los Tries, la tabla hash, el Árbol N-ario y el índice de texto
+    # vienen ya construidos de una instantánea
+    global title_bst, rb_tree, bplus_tree
+    title_bst, rb_tree, bplus_tree = _merged_trees(by_title, by_year)
+    graph.add_books(by_title)
+    book_store.add_many(by_title)
+    query_cache.bump(INDEXED_FIELDS)
+
+def _add_incremental(books):
+    # Índices que crecen libro a libro sin reconstruirse
+    title_trie.insert_many((book.title, book) for book in books)
+    author_trie.insert_many((book.author, book) for book in books)
+    hash_table.insert_many(books)
+    nary_tree.insert_many(books)
+    graph.add_books(books)
+    book_store.add_many(books)
+    text_index.add_many(books)
+    query_cache.bump(INDEXED_FIELDS)
+
+# Libros por sección de escritura durante la ingesta concurrente con el servicio
+INGEST_BATCH = 500
+
+def ingest_books(service, books, workers=1):
+    """Agrega libros mientras el servicio atiende consultas.
+
+    A diferencia de add_books, las consultas nunca esperan más que INGEST_BATCH
+    inserciones: los árboles balanceados se reconstruyen bajo el cerrojo de
+    lectura y se publican de una vez al final, y el resto de los índices se
+    actualiza por tandas. Mientras dura la ingesta los libros nuevos pueden
+    aparecer en las búsquedas antes que en los listados por título o año.
+    Con el catálogo vacío y workers > 1 todos los índices se construyen en
+    paralelo y se publican juntos.
+    """
+    global title_bst, rb_tree, bplus_tree
+    start = time.perf_counter()
+    for book in books:
+        _check_book(book)
+    with service.writer(), _gc_paused():
+        _log_books(books)
+        if _use_parallel(books, workers):
+            indexes = _build_parallel(books, workers)
+            with service.lock.write():
+                _publish(indexes)
+            mode = f"con {workers} procesos"
+        else:
+            by_title = sorted(books, key=attrgetter('title'))
+            by_year = sorted(by_title, key=attrgetter('publication_year'))
+            with service.lock.read():
+                trees = _merged_trees(by_title, by_year)
+            for offset in range(0, len(by_title), INGEST_BATCH):
+                with service.lock.write():
+                    _add_incremental(by_title[offset:offset + INGEST_BATCH])
+            with service.lock.write():
+                title_bst, rb_tree, bplus_tree = trees
+                query_cache.bump(INDEXED_FIELDS)
+            mode = "sin detener las consultas"
+        _store_payloads(books)
+    sync_storage()
+    elapsed = time.perf_counter() - start
+    logger.info(f"Ingeridos {len(books)} libros en {elapsed:.2f} s {mode}.")
+    return len(books)
+
+def _use_parallel(books, workers):
+    # Solo una importación inicial grande compensa arrancar procesos y reconstruir todo
+    return workers > 1 and len(books) >= PARALLEL_MIN_BOOKS and not len(rb_tree)
+
+def _build_parallel(books, workers):
+    """Índices nuevos con books (ver ParallelIndexBuilder); no toca los índices publicados."""
+    with ParallelIndexBuilder(workers) as builder:
+        by_title = builder.sort(books, 'title')
+        trie_factory = RadixTrie if COMPACT_TRIES else Trie
+        builder.start(by_title, trie_factory, SEARCH_LIMIT)
+        # Mientras los procesos trabajan, este construye los índices que no se reparten
+        by_year = sorted(by_title, key=attrgetter('publication_year'))
+        indexes = {
+            'title_bst': TitleBST.bulk_load(by_title),
+            'rb_tree': RBTree.bulk_load(by_title),
+            'bplus_tree': BPlusTree.bulk_load(by_year, order=bplus_tree.order),
+            'hash_table': HashTable(),
+            'nary_tree': NaryTree(),
+            'graph': Graph(),
+            'book_store': BookStore(),
+        }
+        indexes['hash_table'].insert_many(by_title)
+        indexes['nary_tree'].insert_many(by_title)
+        indexes['graph'].add_books(by_title)
+        indexes['book_store'].add_many(by_title)
+        indexes['title_trie'], indexes['author_trie'], indexes['text_index'] = builder.result(
+            trie_factory(cache_size=SEARCH_LIMIT), trie_factory(cache_size=SEARCH_LIMIT), TextIndex())
+    return indexes
+
+def _publish(indexes):
+    global title_trie, author_trie, title_bst, rb_tree, hash_table, nary_tree, bplus_tree, graph, book_store, text_index
+    title_trie = indexes['title_trie']
+    author_trie = indexes['author_trie']
+    title_bst = indexes['title_bst']
+    rb_tree = indexes['rb_tree']
+    hash_table = indexes['hash_table']
+    nary_tree = indexes['nary_tree']
+    bplus_tree = indexes['bplus_tree']
+    graph = indexes['graph']
+    book_store = indexes['book_store']
+    text_index = indexes['text_index']
+    query_cache.bump(INDEXED_FIELDS)
+
+# Columnas del almacén y del grafo; el índice de texto usa TEXT_FIELDS y portada no se indexa
+COLUMN_FIELDS = ('title', 'author', 'genre', 'publication_year')
+INDEXED_FIELDS = COLUMN_FIELDS + tuple(field for field in TEXT_FIELDS if field not in COLUMN_FIELDS)
+
+def _check_book(book):
+    # Portada y vista previa ya guardadas como BlobRef no se vuelven a comprobar
+    fields = {field: book.stored(field) for field in Book.FIELDS}
+    fields = {field: value for field, value in fields.items() if not isinstance(value, BlobRef)}
+    book.publication_year = checked_fields(fields)['publication_year']
+
+def remove_book(title):
+    """Elimina del sistema el libro registrado con ese título y lo devuelve (o None)."""
+    book = hash_table.search(title)
+    if book is None:
+        logger.warning(f"Libro '{title}' no encontrado. Eliminación omitida.")
+        return None
+    _log_mutation('remove', [title])
+    _unindex(book, INDEXED_FIELDS)
+    _promote_duplicate(title)
+    logger.info(f"Libro '{title}' eliminado del sistema.")
+    return book
+
+def update_book(title, /, **fields):
+    """Modifica los atributos del libro registrado con ese título, reindexando solo lo afectado."""
+    fields = checked_fields(fields)
+    book = hash_table.search(title)
+    if book is None:
+        logger.warning(f"Libro '{title}' no encontrado. Actualización omitida.")
+        return None
+    _log_mutation('update', [title, *(item for pair in fields.items() for item in pair)])
+    changed = [field for field in INDEXED_FIELDS if field in fields and fields[field] != getattr(book, field)]
+    edges = _unindex(book, changed)
+    for field, value in fields.items():
+        setattr(book, field, value)
+    _index(book, changed)
+    _store_payloads((book,))
+    if edges:
+        if graph.nodes.get(book.title) is book:
+            graph.add_edges(edges)
+        else:
+            logger.warning(f"Se descartaron {len(edges)} relaciones de '{title}': el nuevo título ya existe.")
+    if 'title' in changed:
+        _promote_duplicate(title)
+    logger.info(f"Libro '{title}' actualizado ({', '.join(fields) or 'sin cambios'}).")
+    return book
+
+def _unindex(book, fields):
+    # Quita book solo de los índices que dependen de fields; devuelve sus relaciones explícitas
+    if not fields:
+        return []
+    query_cache.bump(fields)
+    if 'title' in fields:
+        title_trie.delete(book.title, book)
+        title_bst.delete(book)
+        rb_tree.delete(book)
+        if hash_table.search(book.title) is book:
+            hash_table.delete(book.title)
+    if 'author' in fields:
+        author_trie.delete(book.author, book)
+    if 'genre' in fields:
+        nary_tree.delete(book)
+    if 'publication_year' in fields:
+        bplus_tree.delete(book)
+    if any(field in TEXT_FIELDS for field in fields):
+        text_index.remove(book)
+    if not any(field in COLUMN_FIELDS for field in fields):
+        return []
+    book_store.remove(book)
+    # Las cubetas del grafo dependen de todas las columnas
+    if graph.nodes.get(book.title) is book:
+        return graph.remove_book(book.title)
+    return []
+
+def _index(book, fields):
+    # Inverso de _unindex, con los atributos ya actualizados
+    if not fields:
+        return
+    query_cache.bump(fields)
+    if 'title' in fields:
+        title_trie.insert(book.title, book)
+        title_bst.insert(book)
+        rb_tree.insert(book)
+        hash_table.insert(book)
+    if 'author' in fields:
+        author_trie.insert(book.author, book)
+    if 'genre' in fields:
+        nary_tree.insert(book)
+    if 'publication_year' in fields:
+        bplus_tree.insert(book)
+    if any(field in TEXT_FIELDS for field in fields):
+        text_index.add(book)
+    if not any(field in COLUMN_FIELDS for field in fields):
+        return
+    book_store.add(book)
+    if book.title not in graph.nodes:
+        graph.add_book(book)
+
+def _promote_duplicate(title):
+    # La tabla hash y el grafo guardan un libro por título; si queda otro con ese título, pasa a ocupar el lugar
+    other = rb_tree.search(title)
+    if other is not None and hash_table.search(title) is None:
+        hash_table.insert(other)
+        graph.add_book(other)
+
+def reset_indexes():
+    global title_trie, author_trie, title_bst, rb_tree, hash_table, nary_tree, bplus_tree, graph, book_store, text_index
+    title_trie = RadixTrie(cache_size=SEARCH_LIMIT) if COMPACT_TRIES else Trie(cache_size=SEARCH_LIMIT)
+    author_trie = RadixTrie(cache_size=SEARCH_LIMIT) if COMPACT_TRIES else Trie(cache_size=SEARCH_LIMIT)
+    title_bst = TitleBST()
+    rb_tree = RBTree()
+    hash_table = HashTable()
+    nary_tree = NaryTree()
+    bplus_tree = BPlusTree()
+    graph = Graph()
+    book_store = BookStore()
+    text_index = TextIndex()
+    query_cache.clear()
+
+# Persistencia: checkpoints (instantáneas) más el WAL con las mutaciones posteriores
+#
+# Estructura del directorio de datos:
+#   checkpoint-<lsn>/    instantánea (ver snapshot.py) con los registros del WAL anteriores a <lsn>
+#   wal/                 segmentos del WAL (ver wal.py)
+#   blobs/               portadas y vistas previas (ver blobstore.py); las instantáneas guardan su SHA-256
+CHECKPOINT_INTERVAL = 300.0  # Segundos máximos entre checkpoints si hubo mutaciones
+CHECKPOINT_RECORDS = 100000  # Registros del WAL que adelantan el checkpoint
+REPLAY_BULK_RATIO = 8  # Altas consecutivas del WAL que usan add_books: al menos 1/8 del catálogo
+_CHECKPOINT = re.compile(r'checkpoint-(\d+)$')
+
+wal = None  # WriteAheadLog en uso tras open_storage
+blob_store = None  # BlobStore con portadas y vistas previas tras open_storage
+storage_directory = None
+checkpoint_lsn = 0
+
+def _log_mutation(operation, values):
+    # Se registra antes de aplicar la mutación en memoria; al reaplicar el WAL, wal todavía es None
+    if wal is not None:
+        wal.append(operation, values)
+
+def _log_books(books):
+    if wal is not None:
+        wal.append_many(('add', [getattr(book, field) for field in Book.FIELDS]) for book in books)
+
+def _store_payloads(books):
+    # Una vez indexados, portada y vista_previa pasan al almacén de contenidos y el libro
+    # conserva solo un BlobRef (las cadenas vacías se quedan: ocupan menos que la referencia);
+    # el WAL ya guardó los valores, así que no hace falta fsync aquí
+    if blob_store is None:
+        return
+    for book in books:
+        for field in Book.PAYLOAD_FIELDS:
+            value = book.stored(field)
+            if value and not isinstance(value, BlobRef):
+                setattr(book, field, blob_store.put(value))
+
+def sync_storage():
+    """Espera a que las mutaciones registradas hasta ahora sean durables."""
+    if wal is not None:
+        wal.sync()
+
+def open_storage(directory):
+    """Restaura el último checkpoint de directory, reaplica el WAL posterior y registra las mutaciones siguientes.
+
+    Se llama al iniciar, antes de cualquier mutación: el checkpoint reemplaza los índices.
+    """
+    global wal, blob_store, storage_directory, checkpoint_lsn
+    if wal is not None:
+        raise RuntimeError("El almacenamiento ya está abierto.")
+    os.makedirs(directory, exist_ok=True)
+    blob_store = BlobStore(os.path.join(directory, 'blobs'))
+    checkpoints = _checkpoints(directory)
+    lsn = max(checkpoints, default=0)
+    if checkpoints:
+        load_state(checkpoints[lsn])
+    log = WriteAheadLog(os.path.join(directory, 'wal'))
+    start = time.perf_counter()
+    replayed = _replay(log.replay(since=lsn))
+    logger.info(f"Reaplicadas {replayed} mutaciones del WAL desde el LSN {lsn} "
+                f"en {time.perf_counter() - start:.2f} s.")
+    wal, storage_directory, checkpoint_lsn = log, directory, lsn
+    return replayed
+
+def _checkpoints(directory):
+    # LSN -> ruta de los checkpoints completos; los temporales de un checkpoint interrumpido se borran
+    checkpoints = {}
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        match = _CHECKPOINT.match(name)
+        if match and os.path.exists(os.path.join(path, 'manifest.json')):
+            checkpoints[int(match.group(1))] = path
+        elif name.startswith('checkpoint-'):
+            shutil.rmtree(path, ignore_errors=True)
+    return checkpoints
+
+def _replay(records):
+    # Un registro que no se puede aplicar se descarta con un error en el log: no debe impedir
+    # abrir el resto del almacenamiento
+    count = 0
+    added = []
+    for lsn, operation, values in records:
+        count += 1
+        try:
+            if operation == 'add':
+                book = Book(*values)
+                _check_book(book)
+                added.append(book)
+                continue
+            if added:
+                _replay_adds(added)
+                added = []
+            if operation == 'remove':
+                remove_book(values[0])
+            elif operation == 'update':
+                update_book(values[0], **dict(zip(values[1::2], values[2::2])))
+        except (TypeError, ValueError):
+            logger.exception(f"Registro {lsn} del WAL ({operation}) omitido: no se puede aplicar.")
+    if added:
+        _replay_adds(added)
+    return count
+
+def _replay_adds(books):
+    # add_books reconstruye los árboles balanceados completos: solo compensa si la tanda
+    # es grande frente al catálogo; si no, se insertan de a uno
+    if len(books) * REPLAY_BULK_RATIO >= len(rb_tree):
+        add_books(books)
+    else:
+        for book in books:
+            add_book(book)
+
+def checkpoint(service=None):
+    """Guarda una instantánea del estado y descarta el WAL que ya cubre.
+
+    Con service se excluyen las escrituras mientras dura, pero no las lecturas.
+    """
+    global checkpoint_lsn
+    if wal is None:
+        raise RuntimeError("No hay almacenamiento abierto (ver open_storage).")
+    with (service.writer() if service else nullcontext()), (service.lock.read() if service else nullcontext()):
+        lsn = wal.rotate()
+        if lsn == checkpoint_lsn:
+            return lsn
+        start = time.perf_counter()
+        path = os.path.join(storage_directory, f'checkpoint-{lsn}')
+        temporary = path + '.tmp'
+        shutil.rmtree(temporary, ignore_errors=True)
+        # Los contenidos que la instantánea referencia deben ser durables antes que ella
+        blob_store.flush()
+        save_state(temporary)
+        sync_directory(temporary)
+        os.rename(temporary, path)
+        sync_directory(storage_directory)
+    wal.discard_before(lsn)
+    for old_lsn, old_path in _checkpoints(storage_directory).items():
+        if old_lsn < lsn:
+            shutil.rmtree(old_path)
+    checkpoint_lsn = lsn
+    logger.info(f"Checkpoint en el LSN {lsn} guardado en {time.perf_counter() - start:.2f} s.")
+    return lsn
+
+def close_storage(service=None):
+    # Los libros conservan BlobRef al almacén cerrado: se llama al terminar
+    global wal, blob_store
+    if wal is None:
+        return
+    checkpoint(service)
+    wal.close()
+    blob_store.close()
+    wal = blob_store = None
+
+def _checkpoint_periodically(service, stop):
+    # Checkpoint cada CHECKPOINT_INTERVAL segundos, o antes si el WAL acumula CHECKPOINT_RECORDS registros
+    last = time.monotonic()
+    while not stop.wait(1.0):
+        pending = wal.next_lsn - checkpoint_lsn
+        if pending >= CHECKPOINT_RECORDS or (pending and time.monotonic() - last >= CHECKPOINT_INTERVAL):
+            try:
+                checkpoint(service)
+            except Exception:
+                # El hilo debe seguir: sin checkpoints el WAL crecería sin límite
+                logger.exception("Checkpoint fallido.")
+            last = time.monotonic()
+
+# Índices que la instantánea guarda completos; los árboles balanceados se recargan desde
+# el orden de la tabla, y el grafo y el almacén columnar se reconstruyen (son baratos)
+SNAPSHOT_INDEXES = ('title_trie', 'author_trie', 'hash_table', 'nary_tree', 'text_index')
+
+def save_state(directory):
+    indexes = {name: globals()[name] for name in SNAPSHOT_INDEXES}
+    save_snapshot(directory, rb_tree.in_order_traversal(), graph.iter_edges(), indexes)
+
+def load_state(directory):
+    # Reemplaza todos los índices por los de la instantánea, sin volver a ordenar
+    global title_trie, author_trie, hash_table, nary_tree, text_index
+    start = time.perf_counter()
+    with _gc_paused():
+        snapshot = load_snapshot(directory, blob_store)
+        reset_indexes()
+        indexes = snapshot.indexes
+        trie_type = RadixTrie if COMPACT_TRIES else Trie
+        if indexes is None or not isinstance(indexes.get('title_trie'), trie_type):
+            _add_sorted(snapshot.books, snapshot.books, snapshot.by_year)
+        else:
+            title_trie, author_trie, hash_table, nary_tree, text_index = (
+                indexes[name] for name in SNAPSHOT_INDEXES)
+            _restore_sorted(snapshot.books, snapshot.by_year)
+        graph.add_edges(snapshot.edges)
+        _store_payloads(snapshot.books)
+    elapsed = time.perf_counter() - start
+    logger.info(f"Estado restaurado desde '{directory}' con {len(snapshot.books)} libros en {elapsed:.2f} s.")
+    return len(snapshot.books)
+
+def list_books(page=0, page_size=SEARCH_LIMIT):
+    """Página page (desde 0) del catálogo ordenado por título, sin recorrer el resto."""
+    return rb_tree.page(page, page_size)
+
+# Atributos de los que depende cada tipo de búsqueda, para invalidar la caché con precisión
+SEARCH_DEPENDENCIES = {
+    'titulo': ('title',),
+    'autor': ('author',),
+    'año': ('publication_year',),
+    'género': ('genre',),
+    'texto': tuple(TEXT_FIELDS),
+    'aproximado': tuple(TEXT_FIELDS),
+}
+
+def search_books(parameter, value, limit=None):
+    dependencies = SEARCH_DEPENDENCIES.get(parameter)
+    if dependencies is None:
+        logger.warning(f"Parámetro de búsqueda '{parameter}' no reconocido.")
+        return []
+    key = (parameter, _normalize_query(parameter, value), limit)
+    return list(query_cache.get_or_compute(key, dependencies, lambda: _search_books(parameter, value, limit)))
+
+def _normalize_query(parameter, value):
+    # Dos valores con la misma forma normalizada dan el mismo resultado
+    if parameter == 'año':
+        return int(value)
+    if parameter in ('texto', 'aproximado'):
+        return ' '.join(tokenize(value))
+    return value.lower()
 
-def search_books(parameter, value):
+def _search_books(parameter, value, limit):
     if parameter == 'titulo':
-        return title_trie.search(value)
+        return title_trie.search(value, limit=limit)
     elif parameter == 'autor':
-        return author_trie.search(value)
+        return author_trie.search(value, limit=limit)
     elif parameter == 'año':
-        return bplus_tree.search(int(value))
+        return bplus_tree.search(int(value))[:limit]
     elif parameter == 'género':
-        return nary_tree.search(value)
-    else:
-        logger.warning(f"Parámetro de búsqueda '{parameter}' no reconocido.")
+        return nary_tree.search(value)[:limit]
+    elif parameter == 'texto':
+        return text_index.search(value, limit=limit)
+    elif parameter == 'aproximado':
+        # Cada palabra se reemplaza por el término más cercano del vocabulario y el texto
+        # corregido se busca como 'texto': 'Quijotte' -> 'quijote', 'Cervantez' -> 'cervantes'
+        corrected = []
+        for word in tokenize(value):
+            if word in text_index.postings:
+                corrected.append(word)
+                continue
+            candidates = text_index.vocabulary.fuzzy_search(word, _fuzzy_edits(word), limit=1)
+            corrected += candidates
+        return text_index.search(' '.join(corrected), limit=limit) if corrected else []
+
+def _fuzzy_edits(word):
+    # En palabras cortas dos ediciones coinciden con casi cualquier término
+    if len(word) <= 2:
+        return 0
+    return 1 if len(word) <= 5 else FUZZY_EDITS
+
+# Consultas compuestas: se parte del índice más selectivo y los demás filtros se comprueban libro a libro
+def plan_query(title=None, author=None, genre=None, year_from=None, year_to=None):
+    """Filtros presentes con su cardinalidad según los índices, del más al menos selectivo.
+
+    Cada estimación es exacta y barata: contadores de subárbol de los Tries,
+    tamaño del género en el Árbol N-ario y claves del rango en el B+ Tree.
+    """
+    plan = []
+    if title:
+        plan.append(('title', title_trie.count(title)))
+    if author:
+        plan.append(('author', author_trie.count(author)))
+    if genre:
+        plan.append(('genre', nary_tree.count(genre)))
+    if year_from is not None or year_to is not None:
+        plan.append(('publication_year', bplus_tree.count(*_year_bounds(year_from, year_to))))
+    plan.sort(key=lambda step: step[1])
+    return plan
+
+def _year_bounds(year_from, year_to):
+    return (int(year_from) if year_from is not None else float('-inf'),
+            int(year_to) if year_to is not None else float('inf'))
+
+def find_books(title=None, author=None, genre=None, year_from=None, year_to=None, limit=None):
+    """Libros que cumplen todos los filtros (prefijo de título y de autor, género, rango de años), por título."""
+    plan = plan_query(title, author, genre, year_from, year_to)
+    if not plan:
+        logger.warning("Consulta compuesta sin filtros.")
         return []
+    low, high = _year_bounds(year_from, year_to)
+    key = ('compuesta', title and title.lower(), author and author.lower(), genre and genre.lower(), low, high, limit)
+    dependencies = tuple(field for field, _ in plan)
+    return list(query_cache.get_or_compute(
+        key, dependencies, lambda: _find_books(plan, title, author, genre, low, high, limit)))
 
-def sort_books(books, key, method='quick'):
+def _find_books(plan, title, author, genre, low, high, limit):
+    driver, estimate = plan[0]
+    logger.debug("Plan de consulta: %s.", ', '.join(f"{field}~{count}" for field, count in plan))
+    if not estimate:
+        return []
+    # El costo es proporcional al conjunto más pequeño: solo se recorren los candidatos del índice conductor
+    if driver == 'title':
+        candidates = title_trie.search(title)
+    elif driver == 'author':
+        candidates = author_trie.search(author)
+    elif driver == 'genre':
+        candidates = nary_tree.search(genre)
+    else:
+        candidates = bplus_tree.range(low, high)
+    checks = {
+        'title': lambda book, prefix=(title or '').lower(): book.title.lower().startswith(prefix),
+        'author': lambda book, prefix=(author or '').lower(): book.author.lower().startswith(prefix),
+        'genre': lambda book, genre=(genre or '').lower(): book.genre.lower() == genre,
+        'publication_year': lambda book: low <= book.publication_year <= high,
+    }
+    rest = [checks[field] for field, _ in plan[1:]]
+    matches = (book for book in candidates if all(check(book) for check in rest))
+    if driver == 'title':
+        # El Trie de títulos ya entrega los candidatos en orden alfabético
+        return list(islice(matches, limit))
+    return sorted(matches, key=lambda book: book.title.lower())[:limit]
+
+def sort_books(books, key, method='quick', reverse=False):
+    # Sin lista de libros se ordena el catálogo completo sobre las columnas
+    if books is None:
+        sorted_books = book_store.books_for(_columnar_order(key, reverse))
+        logger.info(f"Catalog sorted by {key} using columnar argsort.")
+        return sorted_books
     if method == 'quick':
-        quick_sort(books, key)
+        quick_sort(books, key, reverse=reverse)
         logger.info(f"Books sorted by {key} using Quick Sort.")
     elif method == 'merge':
-        merge_sort(books, key)
+        merge_sort(books, key, reverse=reverse)
         logger.info(f"Books sorted by {key} using Merge Sort.")
     else:
         logger.warning(f"Sorting method '{method}' not recognized.")
 
+def _columnar_order(keys, directions):
+    # Varios atributos: pasadas estables de argsort del menos al más significativo
+    keys = (keys,) if isinstance(keys, str) else tuple(keys)
+    directions = (directions,) * len(keys) if isinstance(directions, bool) else tuple(directions)
+    order = None
+    for key, descending in reversed(list(zip(keys, directions))):
+        order = book_store.argsort(key, descending, ids=order)
+    return order
+
 def search_sorted_books(books, key, value):
-    result = binary_search(books, key, value)
+    # Sin lista de libros se busca directamente en las columnas del catálogo
+    if books is None:
+        book_id = book_store.find(key, value)
+        result = book_store.books[book_id] if book_id is not None else None
+    else:
+        result = binary_search(books, key, value)
     if result:
         logger.info(f"Book found: {result.title} by {result.author}")
     else:
         logger.info(f"No book found with {key} = {value}")
     return result
 
-# Implementación de la interfaz gráfica
+# Operaciones del servicio de consultas: reciben y devuelven valores serializables en JSON
+def _book_dict(book, payloads=False):
+    # Portada y vista previa solo cuando se piden: leerlas por cada resultado de un listado
+    # traería del almacén contenidos que nadie muestra
+    fields = Book.FIELDS if payloads else COLUMN_FIELDS
+    return {field: getattr(book, field) for field in fields}
+
+def _serve_search(parameter, value, limit=SEARCH_LIMIT):
+    return [_book_dict(book) for book in search_books(parameter, value, limit)]
+
+def _serve_find(limit=SEARCH_LIMIT, **filters):
+    return [_book_dict(book) for book in find_books(limit=limit, **filters)]
+
+def _serve_sort(key, reverse=False, offset=0, limit=SEARCH_LIMIT):
+    ids = _columnar_order(key, reverse)[offset:offset + limit]
+    return [_book_dict(book) for book in book_store.books_for(ids)]
+
+def _serve_page(page=0, size=SEARCH_LIMIT):
+    return {'books': [_book_dict(book) for book in list_books(page, size)], 'total': len(rb_tree)}
+
+def _serve_details(title):
+    book = hash_table.search(title)
+    return _book_dict(book, payloads=True) if book is not None else None
+
+def _serve_relations(title, limit=SEARCH_LIMIT):
+    return [[related, relation] for related, relation in islice(graph.neighbors(title), limit)]
+
+def _serve_recommend(title, k=10):
+    return [[related, score] for related, score in graph.recommend(title, k)]
+
+def _serve_genre_counts(subgenres=False):
+    return nary_tree.genre_counts(subgenres)
+
+def _serve_genre_page(genre, page=0, size=SEARCH_LIMIT):
+    return {'books': [_book_dict(book) for book in nary_tree.page(genre, page, size)],
+            'total': nary_tree.count(genre, subgenres=True)}
+
+def _serve_cache_stats():
+    return query_cache.stats()
+
+def _serve_add(book):
+    # Se comprueba todo antes de tocar los índices o el WAL: el JSON puede traer cualquier cosa
+    if not isinstance(book, dict):
+        raise TypeError("El libro debe ser un objeto JSON.")
+    missing = set(Book.FIELDS) - set(book)
+    if missing:
+        raise ValueError(f"Faltan atributos: {', '.join(sorted(missing))}.")
+    add_book(Book(**checked_fields(book)))
+    return True
+
+def _serve_remove(title):
+    if not isinstance(title, str):
+        raise TypeError("El título debe ser texto.")
+    book = remove_book(title)
+    return _book_dict(book) if book is not None else None
+
+def _serve_update(title, fields):
+    if not isinstance(title, str) or not isinstance(fields, dict):
+        raise TypeError("Se esperaba un título de texto y un objeto JSON de atributos.")
+    book = update_book(title, **checked_fields(fields))
+    return _book_dict(book) if book is not None else None
+
+SERVICE_ENDPOINTS = {
+    'search': (_serve_search, 'read'),
+    'find': (_serve_find, 'read'),
+    'sort': (_serve_sort, 'read'),
+    'page': (_serve_page, 'read'),
+    'details': (_serve_details, 'read'),
+    'relations': (_serve_relations, 'read'),
+    'recommend': (_serve_recommend, 'read'),
+    'genre_counts': (_serve_genre_counts, 'read'),
+    'genre_page': (_serve_genre_page, 'read'),
+    'cache_stats': (_serve_cache_stats, 'read'),
+    'add': (_serve_add, 'write'),
+    'remove': (_serve_remove, 'write'),
+    'update': (_serve_update, 'write'),
+}
+
+# Implementación de la interfaz gráfica: cliente del servicio de consultas
 class LibraryGUI:
-    def __init__(self, master):
+    def __init__(self, master, client):
         self.master = master
         self.master.title("Sistema de Biblioteca")
         self.master.geometry("800x600")
+        # Las consultas corren en un hilo aparte; sus resultados vuelven por una cola
+        # que el bucle de Tk revisa, así la ventana nunca queda congelada
+        self.client = client
+        self.pending = queue.Queue()
+        self.results = queue.Queue()
+        threading.Thread(target=self._worker, name='cliente-gui', daemon=True).start()
+        self.master.after(50, self._poll_results)
 
         # Search bar
         self.search_frame = tk.Frame(self.master)
@@ -118,6 +845,17 @@ class LibraryGUI:
         self.book_list.pack(fill=tk.BOTH, expand=True)
         self.book_list.bind("<Double-1>", self.show_book_details)
 
+        # Paginación del catálogo por título
+        self.page = 0
+        self.page_frame = tk.Frame(self.master)
+        self.page_frame.pack(pady=5)
+        self.prev_button = tk.Button(self.page_frame, text="< Anterior", command=lambda: self.show_page(self.page - 1))
+        self.prev_button.pack(side=tk.LEFT, padx=5)
+        self.page_label = tk.Label(self.page_frame, text="")
+        self.page_label.pack(side=tk.LEFT, padx=5)
+        self.next_button = tk.Button(self.page_frame, text="Siguiente >", command=lambda: self.show_page(self.page + 1))
+        self.next_button.pack(side=tk.LEFT, padx=5)
+
         # Book details
         self.details_frame = tk.Frame(self.master)
         self.details_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -132,42 +870,90 @@ class LibraryGUI:
         self.visualize_button = tk.Button(self.master, text="Visualizar Datos", command=self.visualize_data)
         self.visualize_button.pack(pady=5)
 
+    def _submit(self, callback, op, **params):
+        self.pending.put((callback, op, params))
+
+    def _worker(self):
+        while True:
+            callback, op, params = self.pending.get()
+            try:
+                result = self.client.request(op, **params)
+            except Exception as error:
+                logger.error(f"Consulta '{op}' fallida: {error}")
+                continue
+            self.results.put((callback, result))
+
+    def _poll_results(self):
+        while True:
+            try:
+                callback, result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            callback(result)
+        self.master.after(50, self._poll_results)
+
+    def _show_books(self, books):
+        self.book_list.delete(*self.book_list.get_children())
+        for book in books:
+            self.book_list.insert("", "end", values=(book['title'], book['author'], book['genre'], book['publication_year']))
+
+    def show_page(self, page=0):
+        self.page = max(page, 0)
+        self._submit(self._show_page, 'page', page=self.page, size=SEARCH_LIMIT)
+
+    def _show_page(self, result):
+        pages = max(-(-result['total'] // SEARCH_LIMIT), 1)
+        if self.page >= pages:
+            # Se pidió una página más allá del final: mostrar la última
+            self.show_page(pages - 1)
+            return
+        self._show_books(result['books'])
+        self.page_label.config(text=f"Página {self.page + 1} de {pages}")
+
     def search_books(self):
         query = self.search_entry.get()
         logger.info(f"Buscando libros con el término '{query}'")
-        results = search_books('titulo', query)  # Example search by title
-        self.book_list.delete(*self.book_list.get_children())
-        for book in results:
-            self.book_list.insert("", "end", values=(book.title, book.author, book.genre, book.publication_year))
+        # Palabras de título, autor o vista previa; sin resultados, títulos o autores parecidos
+        self._submit(lambda books: self._show_search(query, books), 'search',
+                     parameter='texto', value=query, limit=SEARCH_LIMIT)
+
+    def _show_search(self, query, books):
+        if books:
+            self._show_books(books)
+        else:
+            self._submit(self._show_books, 'search', parameter='aproximado', value=query, limit=SEARCH_LIMIT)
 
     def show_book_details(self, event):
         selected_item = self.book_list.selection()[0]
         book_title = self.book_list.item(selected_item, "values")[0]
-        book = search_books('titulo', book_title)[0]
+        self._submit(self._show_details, 'details', title=book_title)
+
+    def _show_details(self, book):
+        if book is None:
+            return
         self.details_text.delete(1.0, tk.END)
-        self.details_text.insert(tk.END, f"Título: {book.title}\n")
-        self.details_text.insert(tk.END, f"Autor: {book.author}\n")
-        self.details_text.insert(tk.END, f"Género: {book.genre}\n")
-        self.details_text.insert(tk.END, f"Año de Publicación: {book.publication_year}\n")
-        self.details_text.insert(tk.END, f"Vista Previa: {book.vista_previa}\n")
-        logger.info(f"Mostrando detalles del libro '{book.title}'")
+        self.details_text.insert(tk.END, f"Título: {book['title']}\n")
+        self.details_text.insert(tk.END, f"Autor: {book['author']}\n")
+        self.details_text.insert(tk.END, f"Género: {book['genre']}\n")
+        self.details_text.insert(tk.END, f"Año de Publicación: {book['publication_year']}\n")
+        self.details_text.insert(tk.END, f"Vista Previa: {book['vista_previa']}\n")
+        logger.info(f"Mostrando detalles del libro '{book['title']}'")
 
     def add_book_dialog(self):
         dialog = AddBookDialog(self.master)
         self.master.wait_window(dialog.top)
         if dialog.book:
-            add_book(dialog.book)
-            self.book_list.insert("", "end", values=(dialog.book.title, dialog.book.author, dialog.book.genre, dialog.book.publication_year))
-            logger.info(f"Libro '{dialog.book.title}' agregado desde la interfaz gráfica.")
+            book = _book_dict(dialog.book, payloads=True)
+            self._submit(lambda _: self._book_added(book), 'add', book=book)
+
+    def _book_added(self, book):
+        self.book_list.insert("", "end", values=(book['title'], book['author'], book['genre'], book['publication_year']))
+        logger.info(f"Libro '{book['title']}' agregado desde la interfaz gráfica.")
 
     def visualize_data(self):
-        genres = {}
-        for book in title_bst.in_order_traversal():
-            if book.genre in genres:
-                genres[book.genre] += 1
-            else:
-                genres[book.genre] = 1
+        self._submit(self._plot_genres, 'genre_counts')
 
+    def _plot_genres(self, genres):
         plt.figure(figsize=(10, 5))
         plt.bar(genres.keys(), genres.values())
         plt.xlabel('Género')
@@ -225,24 +1011,79 @@ class AddBookDialog:
         self.book = Book(title, author, genre, year, portada, vista_previa)
         self.top.destroy()
 
+def _load_in_background(service, path, workers=1):
+    # En paralelo el catálogo se lee en un solo bloque para construir los índices de una vez
+    chunk_size = sys.maxsize if workers > 1 else 50000
+    thread = threading.Thread(target=load_catalog,
+                              args=(path, lambda books: ingest_books(service, books, workers), chunk_size),
+                              name='carga-catalogo', daemon=True)
+    thread.start()
+    return thread
+
 def main():
-    root = tk.Tk()
-    app = LibraryGUI(root)
-    
-    # Ejemplo de adición de libro
-    book = Book("El Quijote", "Miguel de Cervantes", "Novela", 1605, "portada.jpg", "En un lugar de la Mancha...")
-    add_book(book)
-    
-    # Ejemplo de búsqueda
-    resultados = search_books('titulo', 'El Qui')
-    for libro in resultados:
-        print(libro.title, libro.author)
-    
-    # Ejemplo de ordenamiento
-    sorted_books = title_trst_in_order = []  # Implement in_order_traversal if needed
-    sort_books(sorted_books, 'title', method='quick')
-    
-    root.mainloop()
+    parser = argparse.ArgumentParser(description="Sistema de Biblioteca")
+    parser.add_argument('catalog', nargs='?', help="Catálogo opcional (CSV o JSONL)")
+    parser.add_argument('--serve', action='store_true', help="Solo el servicio de consultas, sin interfaz gráfica")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="0 elige un puerto libre")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Procesos para construir los índices al importar un catálogo grande")
+    parser.add_argument('--data-dir',
+                        help="Directorio de checkpoints, WAL y portadas; sin él nada se guarda al salir "
+                             "y portada y vista previa quedan en memoria")
+    args = parser.parse_args()
+
+    service = QueryService(SERVICE_ENDPOINTS, args.host, args.port, commit=sync_storage)
+    stop_checkpoints = threading.Event()
+    if args.data_dir:
+        open_storage(args.data_dir)
+        threading.Thread(target=_checkpoint_periodically, args=(service, stop_checkpoints),
+                         name='checkpoints', daemon=True).start()
+    if args.serve:
+        if args.catalog:
+            _load_in_background(service, args.catalog, args.workers)
+        try:
+            asyncio.run(service.serve())
+        except KeyboardInterrupt:
+            pass
+    else:
+        client = QueryClient(*service.start_in_thread())
+        root = tk.Tk()
+        app = LibraryGUI(root, client)
+        if args.catalog:
+            _load_in_background(service, args.catalog, args.workers)
+
+        # Ejemplo de adición de libro (con --data-dir puede estar guardado de una ejecución anterior)
+        book = Book("El Quijote", "Miguel de Cervantes", "Novela", 1605, "portada.jpg", "En un lugar de la Mancha...")
+        if client.request('details', title=book.title) is None:
+            client.request('add', book=_book_dict(book, payloads=True))
+
+        # Ejemplo de búsqueda
+        resultados = client.request('search', parameter='titulo', value='El Qui')
+        for libro in resultados:
+            print(libro['title'], libro['author'])
+
+        # Ejemplo de ordenamiento
+        for libro in client.request('sort', key='publication_year', limit=5):
+            print(libro['publication_year'], libro['title'])
+
+        app.show_page(0)
+        root.mainloop()
+        client.close()
+        service.stop()
+
+    stop_checkpoints.set()
+    close_storage(service)
+    for name, latency in service.stats().items():
+        logger.info(f"Servicio '{name}': {latency['count']} consultas, p50 {latency['p50_ms']:.2f} ms, "
+                    f"p99 {latency['p99_ms']:.2f} ms")
+    cache = query_cache.stats()
+    logger.info(f"Caché de consultas: {cache['size']} entradas, {cache['hits']} aciertos, "
+                f"{cache['misses']} fallos ({cache['hit_rate']:.0%}).")
+    if metrics.enabled:
+        metrics.dump(logger)
+        if os.environ.get('LIBRARY_METRICS_FILE'):
+            metrics.export_json(os.environ['LIBRARY_METRICS_FILE'])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,117 @@
+import functools
+import json
+import logging
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
+
+# Métricas de operaciones por índice: contadores e histogramas de latencia
+class Histogram:
+    """Histograma de latencias con cubetas logarítmicas (potencias de 2 en microsegundos)."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = []  # buckets[i]: observaciones con latencia < 2**i µs
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+        index = int(seconds * 1e6).bit_length()
+        if index >= len(self.buckets):
+            self.buckets.extend([0] * (index + 1 - len(self.buckets)))
+        self.buckets[index] += 1
+
+    def percentile(self, fraction):
+        """Cota superior (en segundos) de la cubeta que contiene el percentil pedido."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= target:
+                return min((2 ** index) / 1e6, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_seconds': self.total,
+            'mean_seconds': self.total / self.count if self.count else 0.0,
+            'min_seconds': self.min or 0.0,
+            'max_seconds': self.max or 0.0,
+            'p50_seconds': self.percentile(0.5),
+            'p99_seconds': self.percentile(0.99),
+            'buckets_us': {f'<{2 ** i}': hits for i, hits in enumerate(self.buckets) if hits},
+        }
+
+class MetricsRegistry:
+    """Registro de métricas desactivado por defecto; activarlo cuesta dos lecturas de reloj por operación."""
+
+    def __init__(self):
+        self.enabled = False
+        self.counters = {}
+        self.histograms = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.counters.clear()
+        self.histograms.clear()
+
+    def increment(self, name, value=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+    def timed(self, name):
+        """Decorador que cuenta y mide cada llamada bajo el nombre 'índice.operación'."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        return {
+            'counters': dict(self.counters),
+            'operations': {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())},
+        }
+
+    def dump(self, log=None):
+        log = log or logger
+        for name, histogram in sorted(self.histograms.items()):
+            log.info("%s: %d ops, media %.1f µs, p50 %.1f µs, p99 %.1f µs, máx %.1f µs",
+                     name, histogram.count, histogram.total / histogram.count * 1e6,
+                     histogram.percentile(0.5) * 1e6, histogram.percentile(0.99) * 1e6, histogram.max * 1e6)
+        for name, value in sorted(self.counters.items()):
+            log.info("%s: %d", name, value)
+
+    def export_json(self, path):
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.snapshot(), handle, indent=2)
+
+metrics = MetricsRegistry()
@@ -0,0 +1,247 @@
+import gc
+import logging
+import pickle
+import random
+import sys
+import threading
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from textindex import PostingList, TEXT_FIELDS, term_frequencies, tokenize
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_SIZE = 2000  # Claves muestreadas para repartir las particiones con tamaños parecidos
+RECURSION_LIMIT = 20000  # pickle recorre los Tries recursivamente, varios niveles por nodo
+_SEPARATOR = '\x00'
+
+# Arreglos de claves en memoria compartida
+class SharedStrings:
+    """Lista de cadenas publicada en un segmento de memoria compartida.
+
+    Los procesos del pool la leen por nombre (ver _shared_strings) en lugar de
+    recibir una copia serializada por cada tarea.
+    """
+
+    def __init__(self, strings):
+        data = _SEPARATOR.join(strings).encode('utf-8')
+        if data.count(_SEPARATOR.encode()) != max(len(strings) - 1, 0):
+            raise ValueError("Las cadenas compartidas no pueden contener el carácter nulo.")
+        self._memory = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+        self._memory.buf[:len(data)] = data
+        self.ref = (self._memory.name, len(data))
+
+    def release(self):
+        self._memory.close()
+        self._memory.unlink()
+
+_attached = {}  # En cada proceso del pool: nombre del segmento -> lista ya decodificada
+
+def _shared_strings(ref):
+    name, size = ref
+    strings = _attached.get(name)
+    if strings is None:
+        memory = shared_memory.SharedMemory(name=name)
+        try:
+            strings = _attached[name] = bytes(memory.buf[:size]).decode('utf-8').split(_SEPARATOR)
+        finally:
+            memory.close()
+    return strings
+
+# Referencias a libros entre procesos
+class _BookRef:
+    """Libro número index del proceso principal; al deserializar se reemplaza por el libro."""
+
+    __slots__ = ('index',)
+
+    def __init__(self, index):
+        self.index = index
+
+    def __reduce__(self):
+        return _resolve_book, (self.index,)
+
+_loading = threading.local()
+
+def _resolve_book(index):
+    return _loading.books[index]
+
+def _load_with_books(data, books):
+    _loading.books = books
+    try:
+        return pickle.loads(data)
+    finally:
+        del _loading.books
+
+# Particiones por rango de clave y por carácter inicial
+def _cut_points(keys, parts):
+    # Cortes tomados de una muestra ordenada; los repetidos se descartan para no crear corridas vacías
+    sample = sorted(random.Random(0).sample(keys, min(SAMPLE_SIZE, len(keys))))
+    return sorted({sample[len(sample) * i // parts] for i in range(1, parts)})
+
+def _char_groups(firsts, parts):
+    """Reparte caracteres iniciales en parts grupos de carga parecida: carácter -> grupo.
+
+    Los caracteres que no aparecen en la muestra van al grupo 0.
+    """
+    loads = [0] * parts
+    groups = {}
+    for char, count in Counter(firsts).most_common():
+        group = loads.index(min(loads))
+        groups[char] = group
+        loads[group] += count
+    return groups
+
+# Tareas que se ejecutan en los procesos del pool
+def _init_worker():
+    # Los procesos solo construyen estructuras sin ciclos: el recolector no encontraría basura
+    gc.disable()
+    sys.setrecursionlimit(RECURSION_LIMIT)
+
+def _sort_run(ref, low, high):
+    # Índices de las claves con low <= clave < high, ordenados (estable) por clave
+    keys = _shared_strings(ref)
+    run = [i for i, key in enumerate(keys) if (low is None or low <= key) and (high is None or key < high)]
+    run.sort(key=keys.__getitem__)
+    return array('I', run)
+
+def _build_trie(ref, factory, cache_size, groups, group):
+    keys = _shared_strings(ref)
+    trie = factory(cache_size=cache_size)
+    trie.insert_many((key, _BookRef(i)) for i, key in enumerate(keys)
+                     if key and groups.get(key.lower()[0], 0) == group)
+    return pickle.dumps(trie, pickle.HIGHEST_PROTOCOL)
+
+def _map_terms(refs, start, stop, groups, parts):
+    """Tokeniza los documentos start..stop-1 y reparte sus términos por grupo de carácter inicial.
+
+    Devuelve las longitudes ponderadas y, por grupo, un texto con una línea
+    'documento longitud término:frecuencia ...' por documento.
+    """
+    fields = [_shared_strings(ref) for ref in refs]
+    lengths = array('I')
+    lines = [[] for _ in range(parts)]
+    for doc in range(start, stop):
+        frequencies = term_frequencies(values[doc] for values in fields)
+        length = sum(frequencies.values())
+        lengths.append(length)
+        pairs = {}
+        for term, tf in frequencies.items():
+            pairs.setdefault(groups.get(term[0], 0), []).append(f"{term}:{tf}")
+        for group, group_pairs in pairs.items():
+            lines[group].append(f"{doc} {length} {' '.join(group_pairs)}")
+    return lengths, ['\n'.join(group_lines) for group_lines in lines]
+
+def _reduce_terms(texts):
+    # Postings de un grupo de términos; los textos llegan en orden de documento
+    postings = {}
+    for text in texts:
+        if not text:
+            continue
+        for line in text.split('\n'):
+            doc, length, *pairs = line.split(' ')
+            doc = int(doc)
+            length = int(length)
+            for pair in pairs:
+                term, tf = pair.split(':')
+                term_postings = postings.get(term)
+                if term_postings is None:
+                    term_postings = postings[term] = PostingList()
+                term_postings.append(doc, int(tf), length)
+    return pickle.dumps(postings, pickle.HIGHEST_PROTOCOL)
+
+# Construcción en paralelo de los índices más costosos
+class ParallelIndexBuilder:
+    """Construye los índices de una importación grande en un pool de procesos.
+
+    sort() ordena las claves por particiones de rango (corridas ordenadas que
+    se concatenan). start() lanza los Tries de títulos y autores, particionados
+    por carácter inicial, y el índice de texto en dos fases: cada proceso
+    tokeniza un tramo de documentos y luego cada uno arma los postings de un
+    grupo de caracteres iniciales. Las claves viajan en memoria
+    compartida y los libros nunca salen de este proceso: las estructuras vuelven
+    con referencias que result() resuelve y las injerta en índices vacíos.
+    Mientras tanto este proceso queda libre para construir el resto.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        self._planner = ThreadPoolExecutor(max_workers=1)  # Encadena las dos fases del índice de texto
+        self._shared = []
+        self._books = None
+        self._tries = None
+        self._text = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._planner.shutdown(cancel_futures=True)
+        self._executor.shutdown(cancel_futures=True)
+        for shared in self._shared:
+            shared.release()
+        self._shared.clear()
+
+    def _share(self, strings):
+        shared = SharedStrings(strings)
+        self._shared.append(shared)
+        return shared.ref
+
+    @metrics.timed('parallel.sort')
+    def sort(self, books, field):
+        """books ordenados (estable) por el atributo de texto field."""
+        keys = [getattr(book, field) for book in books]
+        if not keys:
+            return []
+        ref = self._share(keys)
+        cuts = _cut_points(keys, self.workers)
+        order = array('I')
+        for run in self._executor.map(_sort_run, [ref] * (len(cuts) + 1), [None] + cuts, cuts + [None]):
+            order.extend(run)
+        return [books[i] for i in order]
+
+    def start(self, books, trie_factory, cache_size):
+        """Lanza los Tries de títulos y autores y el índice de texto de books, en ese orden de documentos."""
+        self._books = books
+        sample = random.Random(0).sample(books, min(SAMPLE_SIZE, len(books)))
+        self._tries = []
+        for field in ('title', 'author'):
+            ref = self._share([getattr(book, field) for book in books])
+            groups = _char_groups((getattr(book, field).lower()[:1] for book in sample), self.workers)
+            self._tries.append([self._executor.submit(_build_trie, ref, trie_factory, cache_size, groups, group)
+                                for group in sorted(set(groups.values()) | {0})])
+        refs = [self._share([str(getattr(book, field) or '') for book in books]) for field in TEXT_FIELDS]
+        terms = (term for book in sample for field in TEXT_FIELDS
+                 for term in tokenize(str(getattr(book, field) or '')))
+        groups = _char_groups((term[0] for term in terms), self.workers)
+        parts = max(groups.values(), default=0) + 1
+        bounds = [len(books) * i // self.workers for i in range(self.workers + 1)]
+        maps = [self._executor.submit(_map_terms, refs, start, stop, groups, parts)
+                for start, stop in zip(bounds, bounds[1:]) if start < stop]
+        self._text = self._planner.submit(self._reduce_text, maps, parts)
+
+    def _reduce_text(self, maps, parts):
+        lengths = array('I')
+        texts = [[] for _ in range(parts)]
+        for future in maps:
+            map_lengths, map_texts = future.result()
+            lengths.extend(map_lengths)
+            for group, text in enumerate(map_texts):
+                texts[group].append(text)
+        return lengths, [self._executor.submit(_reduce_terms, group_texts) for group_texts in texts]
+
+    @metrics.timed('parallel.result')
+    def result(self, title_trie, author_trie, text_index):
+        """Espera las tareas e injerta sus resultados en los índices vacíos recibidos."""
+        for trie, futures in zip((title_trie, author_trie), self._tries):
+            for future in futures:
+                trie.graft(_load_with_books(future.result(), self._books))
+        # La clave vacía no pertenece a ninguna partición por carácter inicial
+        title_trie.insert_many((book.title, book) for book in self._books if not book.title)
+        author_trie.insert_many((book.author, book) for book in self._books if not book.author)
+        lengths, reduces = self._text.result()
+        text_index.graft(self._books, lengths, (pickle.loads(future.result()) for future in reduces))
+        logger.info(f"Índices de {len(self._books)} libros construidos con {self.workers} procesos.")
+        return title_trie, author_trie, text_index
@@ -0,0 +1,80 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Caché de resultados de consultas con invalidación por generaciones
+class QueryCache:
+    """Caché LRU con caducidad (TTL) para resultados de consultas.
+
+    Cada entrada recuerda la generación de las dependencias de las que salió
+    (p. ej. el atributo 'title' para una búsqueda por título). Las escrituras
+    incrementan la generación de los atributos que tocan con bump(), de modo
+    que solo se descartan las consultas afectadas y sin recorrer la caché: la
+    entrada vieja se detecta al consultarla.
+    """
+
+    def __init__(self, capacity=1024, ttl=300.0):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries = OrderedDict()  # clave -> (generaciones, vencimiento, resultado)
+        self._generations = {}  # dependencia -> contador
+        self._lock = threading.Lock()  # Las lecturas del servicio comparten la caché entre hilos
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, key, dependencies, compute):
+        """Resultado cacheado para key o, si falta o quedó obsoleto, el de compute()."""
+        now = time.monotonic()
+        with self._lock:
+            generations = tuple(self._generations.get(name, 0) for name in dependencies)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generations and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.increment('query_cache.hit')
+                return entry[2]
+            self.misses += 1
+        metrics.increment('query_cache.miss')
+        # Las generaciones se leen antes de calcular: si una escritura se cuela, la entrada nace obsoleta
+        result = compute()
+        with self._lock:
+            self._entries[key] = (generations, now + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def bump(self, dependencies):
+        """Invalida las entradas que dependen de alguno de los nombres dados."""
+        with self._lock:
+            for name in dependencies:
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+        }
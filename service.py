@@ -0,0 +1,225 @@
+import asyncio
+import json
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Cerrojo de lectores/escritor para los índices compartidos
+class RWLock:
+    """Varios lectores a la vez o un único escritor, con preferencia por el escritor.
+
+    Un escritor en espera impide que entren lectores nuevos y solo espera a
+    que terminen los que ya están leyendo; así un flujo continuo de consultas
+    no lo posterga indefinidamente. Las escrituras largas se parten en
+    secciones cortas (ver QueryService.writer) para que las consultas se
+    intercalen entre ellas. No es reentrante: un lector que vuelve a pedir
+    read() mientras un escritor espera quedaría bloqueado.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writing or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writing or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+class ServiceError(Exception):
+    """Error devuelto por el servicio de consultas."""
+
+# Servicio de consultas asyncio con protocolo de líneas JSON
+class QueryService:
+    """Servidor TCP local que atiende consultas sobre los índices en memoria.
+
+    Cada línea recibida es un objeto JSON {"id": ..., "op": ..., "params": {...}}
+    y se responde con {"id": ..., "ok": true, "result": ...} o
+    {"id": ..., "ok": false, "error": "..."}. Las peticiones de una misma
+    conexión se atienden concurrentemente, así que las respuestas pueden llegar
+    en otro orden; el id las identifica. Las operaciones se ejecutan en un pool
+    de hilos bajo el cerrojo de lectura o de escritura según su tipo, y la
+    operación 'stats' devuelve la latencia p50/p99 de cada operación.
+    """
+
+    def __init__(self, endpoints, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=4, commit=None):
+        self.endpoints = endpoints  # nombre -> (función, 'read' | 'write')
+        # Se llama tras cada escritura, ya sin cerrojos y antes de responder (p. ej. esperar al WAL);
+        # así las escrituras concurrentes comparten la espera
+        self.commit = commit
+        self.host = host
+        self.port = port
+        self.lock = RWLock()
+        self._writer = threading.Lock()  # Serializa escrituras, incluidas las de varias secciones
+        self.latency = MetricsRegistry()
+        self.latency.enable()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='consulta')
+        self._loop = None
+        self._server = None
+        self._ready = threading.Event()
+
+    def call(self, name, params):
+        func, kind = self.endpoints[name]
+        if kind == 'read':
+            with self.lock.read():
+                return func(**params)
+        result = self.write(func, **params)
+        if self.commit is not None:
+            self.commit()
+        return result
+
+    def write(self, func, *args, **kwargs):
+        """Ejecuta func con exclusión total, como cualquier operación de escritura del protocolo."""
+        with self._writer, self.lock.write():
+            return func(*args, **kwargs)
+
+    def writer(self):
+        """Reserva la escritura sin bloquear a los lectores.
+
+        Quien la tiene puede leer bajo lock.read() (p. ej. para construir
+        estructuras nuevas) y publicar cambios en secciones cortas bajo
+        lock.write(); ningún otro escritor interviene entre medio.
+        """
+        return self._writer
+
+    def stats(self):
+        return {name: {'count': histogram.count,
+                       'p50_ms': histogram.percentile(0.5) * 1e3,
+                       'p99_ms': histogram.percentile(0.99) * 1e3}
+                for name, histogram in sorted(self.latency.histograms.items())}
+
+    async def serve(self):
+        """Atiende conexiones hasta que se cancele la tarea o se llame a stop()."""
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Servicio de consultas escuchando en {self.host}:{self.port}.")
+        self._ready.set()
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+        logger.info("Servicio de consultas detenido.")
+
+    def start_in_thread(self):
+        """Arranca el servicio en un hilo propio y devuelve (host, puerto) cuando ya acepta conexiones."""
+        thread = threading.Thread(target=asyncio.run, args=(self.serve(),), name='servicio-consultas', daemon=True)
+        thread.start()
+        self._ready.wait()
+        return self.host, self.port
+
+    def stop(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+    async def _handle_connection(self, reader, writer):
+        send_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except asyncio.CancelledError:
+                    break  # El servicio se está deteniendo
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._respond(line, writer, send_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, line, writer, send_lock):
+        start = time.perf_counter()
+        request_id = None
+        name = 'invalid'
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            op = request['op']
+            # La latencia se agrupa por nombre: solo se acepta un texto ya conocido
+            if op == 'stats' or (isinstance(op, str) and op in self.endpoints):
+                name = op
+            else:
+                raise ValueError(f"Operación {op!r} no reconocida.")
+            if name == 'stats':
+                result = self.stats()
+            else:
+                params = request.get('params') or {}
+                result = await self._loop.run_in_executor(self._executor, self.call, name, params)
+            response = {'id': request_id, 'ok': True, 'result': result}
+        except Exception as error:
+            logger.warning(f"Consulta fallida ({name}): {error}")
+            response = {'id': request_id, 'ok': False, 'error': f"{type(error).__name__}: {error}"}
+        self.latency.observe(name, time.perf_counter() - start)
+        async with send_lock:
+            writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            await writer.drain()
+
+# Cliente bloqueante del servicio, seguro entre hilos
+class QueryClient:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=60):
+        self._socket = socket.create_connection((host, port), timeout)
+        self._stream = self._socket.makefile('rwb')
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def request(self, op, **params):
+        with self._lock:
+            self._next_id += 1
+            message = {'id': self._next_id, 'op': op, 'params': params}
+            self._stream.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+            self._stream.flush()
+            line = self._stream.readline()
+        if not line:
+            raise ServiceError("El servicio cerró la conexión.")
+        response = json.loads(line)
+        if not response['ok']:
+            raise ServiceError(response['error'])
+        return response['result']
+
+    def close(self):
+        self._stream.close()
+        self._socket.close()
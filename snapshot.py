@@ -0,0 +1,196 @@
+import json
+import logging
+import mmap
+import os
+import pickle
+from array import array
+from blobstore import BlobRef
+from book import Book
+
+logger = logging.getLogger(__name__)
+
+# Instantánea en disco de la tabla de libros y del orden de cada índice
+#
+# Estructura del directorio:
+#   manifest.json        versión, cantidad de libros y tabla de relaciones del grafo
+#   <columna>.txt        valores de texto concatenados en UTF-8 (tabla en orden de título)
+#   <columna>.off        desplazamientos int64 (n + 1) dentro de <columna>.txt
+#   <columna>.nul        un byte por fila: 1 si el valor es None, 2 si es el SHA-256 de un contenido del BlobStore
+#   years.i32            año de publicación por fila
+#   year_order.i32       filas ordenadas por año (estable), equivale a las hojas del B+ Tree
+#   edges.i32            tripletas (fila origen, fila destino, código de relación)
+#   indexes.pickle       estructuras de los índices que no se pueden derivar de un orden
+#                        (Tries, índice de texto, ...), con cada libro como su número de fila
+#
+# Los arreglos numéricos se leen con mmap, sin copiarlos a memoria. Portada y
+# vista previa guardadas en un BlobStore se escriben como referencia y se cargan
+# como BlobRef del mismo almacén, sin leer los contenidos. indexes.pickle evita
+# reconstruir esos índices inserción por inserción; depende de las clases de
+# trees.py y textindex.py, así que si no se puede leer se ignora y el llamador
+# los reconstruye desde la tabla de libros.
+SNAPSHOT_VERSION = 3
+READABLE_VERSIONS = (1, 2, 3)  # La 1 no tiene referencias a contenidos y la 1 y 2 no tienen índices
+_VALUE, _NULL, _BLOB = 0, 1, 2
+TEXT_COLUMNS = ('title', 'author', 'genre', 'portada', 'vista_previa')
+
+class Snapshot:
+    def __init__(self, books, by_year, edges, indexes=None):
+        self.books = books  # Libros en orden de título
+        self.by_year = by_year  # Los mismos libros en orden de año de publicación
+        self.edges = edges  # Tripletas (libro, libro, relación)
+        self.indexes = indexes  # nombre -> índice guardado, o None si hay que reconstruirlos
+
+class _IndexPickler(pickle.Pickler):
+    # Los libros se guardan como su fila en la tabla: las columnas ya los contienen
+    def __init__(self, handle, rows):
+        super().__init__(handle, pickle.HIGHEST_PROTOCOL)
+        self.rows = rows
+
+    def persistent_id(self, obj):
+        if type(obj) is not Book:
+            return None
+        row = self.rows.get(id(obj))
+        if row is None:
+            raise ValueError(f"El libro '{obj.title}' de un índice no está en la tabla de la instantánea.")
+        return row
+
+class _IndexUnpickler(pickle.Unpickler):
+    def __init__(self, handle, books):
+        super().__init__(handle)
+        self.books = books
+
+    def persistent_load(self, row):
+        return self.books[row]
+
+def save_snapshot(directory, books_by_title, edges=(), indexes=None):
+    """Escribe la instantánea; books_by_title debe venir ordenado por título (p. ej. RBTree.in_order_traversal).
+
+    indexes (nombre -> índice) se guarda tal cual; sus libros deben estar en books_by_title.
+    """
+    books = list(books_by_title)
+    os.makedirs(directory, exist_ok=True)
+    for column in TEXT_COLUMNS:
+        _write_text_column(directory, column, [book.stored(column) for book in books])
+    years = array('i', (book.publication_year for book in books))
+    _write_array(directory, 'years.i32', years)
+    _write_array(directory, 'year_order.i32', array('i', sorted(range(len(books)), key=years.__getitem__)))
+
+    rows = {id(book): row for row, book in enumerate(books)}
+    relations = []
+    edge_rows = array('i')
+    for from_book, to_book, relation in edges:
+        if relation not in relations:
+            relations.append(relation)
+        edge_rows.extend((rows[id(from_book)], rows[id(to_book)], relations.index(relation)))
+    _write_array(directory, 'edges.i32', edge_rows)
+    if indexes:
+        with open(os.path.join(directory, 'indexes.pickle'), 'wb') as handle:
+            _IndexPickler(handle, rows).dump(indexes)
+
+    manifest = {'version': SNAPSHOT_VERSION, 'count': len(books), 'relations': relations,
+                'indexes': sorted(indexes or ())}
+    # El manifiesto se escribe al final para que una instantánea incompleta no sea legible
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle)
+    logger.info(f"Instantánea guardada en '{directory}' con {len(books)} libros y {len(edge_rows) // 3} relaciones.")
+
+def load_snapshot(directory, blobs=None):
+    """Lee la instantánea; blobs es el BlobStore de los contenidos que referencia, si los hay."""
+    with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as handle:
+        manifest = json.load(handle)
+    if manifest.get('version') not in READABLE_VERSIONS:
+        raise ValueError(f"Versión de instantánea no soportada: {manifest.get('version')}.")
+    count = manifest['count']
+    columns = {column: _read_text_column(directory, column, count, blobs) for column in TEXT_COLUMNS}
+    with _MappedArray(directory, 'years.i32') as years:
+        books = [Book(title, author, genre, year, portada, vista_previa)
+                 for title, author, genre, year, portada, vista_previa
+                 in zip(columns['title'], columns['author'], columns['genre'], years,
+                        columns['portada'], columns['vista_previa'])]
+    with _MappedArray(directory, 'year_order.i32') as year_order:
+        by_year = [books[row] for row in year_order]
+    relations = manifest['relations']
+    with _MappedArray(directory, 'edges.i32') as edge_rows:
+        edges = [(books[edge_rows[i]], books[edge_rows[i + 1]], relations[edge_rows[i + 2]])
+                 for i in range(0, len(edge_rows), 3)]
+    indexes = _read_indexes(directory, books) if manifest.get('indexes') else None
+    logger.info(f"Instantánea cargada desde '{directory}' con {count} libros.")
+    return Snapshot(books, by_year, edges, indexes)
+
+def _read_indexes(directory, books):
+    try:
+        with open(os.path.join(directory, 'indexes.pickle'), 'rb') as handle:
+            return _IndexUnpickler(handle, books).load()
+    except Exception as error:
+        # Guardados por otra versión del código: se reconstruyen desde la tabla
+        logger.warning(f"Índices de la instantánea '{directory}' ignorados: {error}")
+        return None
+
+def _write_array(directory, name, values):
+    with open(os.path.join(directory, name), 'wb') as handle:
+        values.tofile(handle)
+
+def _write_text_column(directory, column, values):
+    offsets = array('q', [0])
+    nulls = bytearray(len(values))
+    with open(os.path.join(directory, f'{column}.txt'), 'wb') as handle:
+        position = 0
+        for row, value in enumerate(values):
+            if value is None:
+                nulls[row] = _NULL
+            else:
+                if isinstance(value, BlobRef):
+                    nulls[row] = _BLOB
+                    value = value.digest
+                elif not isinstance(value, str):
+                    # str() de unos bytes daría "b'...'" y el valor no se recuperaría al cargar
+                    raise TypeError(f"Columna '{column}', fila {row}: se esperaba texto y no "
+                                    f"{type(value).__name__}.")
+                encoded = value.encode('utf-8')
+                handle.write(encoded)
+                position += len(encoded)
+            offsets.append(position)
+    _write_array(directory, f'{column}.off', offsets)
+    with open(os.path.join(directory, f'{column}.nul'), 'wb') as handle:
+        handle.write(nulls)
+
+def _read_text_column(directory, column, count, blobs=None):
+    with open(os.path.join(directory, f'{column}.nul'), 'rb') as handle:
+        nulls = handle.read()
+    with open(os.path.join(directory, f'{column}.txt'), 'rb') as handle:
+        data = handle.read()
+    with _MappedArray(directory, f'{column}.off', 'q') as offsets:
+        if len(offsets) != count + 1:
+            raise ValueError(f"Columna '{column}' de la instantánea está incompleta.")
+        values = [None if nulls[row] == _NULL else data[offsets[row]:offsets[row + 1]].decode('utf-8')
+                  for row in range(count)]
+    if _BLOB in nulls:
+        if blobs is None:
+            raise ValueError(f"Columna '{column}' de la instantánea referencia contenidos y no se indicó el almacén.")
+        for row in range(count):
+            if nulls[row] == _BLOB:
+                values[row] = blobs.ref(values[row])
+    return values
+
+class _MappedArray:
+    """Arreglo binario de solo lectura mapeado en memoria; usar como administrador de contexto."""
+
+    def __init__(self, directory, name, typecode='i'):
+        self._file = open(os.path.join(directory, name), 'rb')
+        self._map = None
+        self._view = None
+        self.typecode = typecode
+
+    def __enter__(self):
+        if os.fstat(self._file.fileno()).st_size == 0:
+            # mmap no admite archivos vacíos
+            return array(self.typecode)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map).cast(self.typecode)
+        return self._view
+
+    def __exit__(self, *exc_info):
+        if self._view is not None:
+            self._view.release()
+            self._map.close()
+        self._file.close()
@@ -1,50 +1,170 @@
+from operator import attrgetter
+
 # Sorting Algorithms Implementation
-def quick_sort(books, key, low=0, high=None):
+#
+# Las claves se extraen una sola vez (transformación de Schwartz) en pares
+# (clave, posición): las comparaciones son entre tuplas en C, sin getattr, y la
+# posición desempata, así que ambos algoritmos resultan estables.
+INSERTION_CUTOFF = 16  # Segmentos de este tamaño o menores se ordenan por inserción
+MERGE_RUN = 32  # Tamaño de las corridas iniciales del merge sort ascendente
+
+def quick_sort(books, key, low=0, high=None, reverse=False):
     if high is None:
         high = len(books) - 1
     if low < high:
-        pi = partition(books, key, low, high)
-        quick_sort(books, key, low, pi - 1)
-        quick_sort(books, key, pi + 1, high)
-
-def partition(books, key, low, high):
-    pivot = getattr(books[high], key)
-    i = low - 1
-    for j in range(low, high):
-        if getattr(books[j], key) <= pivot:
-            i += 1
-            books[i], books[j] = books[j], books[i]
-    books[i + 1], books[high] = books[high], books[i + 1]
-    return i + 1
-
-def merge_sort(books, key):
-    if len(books) > 1:
-        mid = len(books) // 2
-        L = books[:mid]
-        R = books[mid:]
-
-        merge_sort(L, key)
-        merge_sort(R, key)
-
-        i = j = k = 0
-        while i < len(L) and j < len(R):
-            if getattr(L[i], key) < getattr(R[j], key):
-                books[k] = L[i]
-                i += 1
+        books[low:high + 1] = sort_by_key(books[low:high + 1], key, reverse=reverse, algorithm='intro')
+
+def merge_sort(books, key, reverse=False):
+    books[:] = sort_by_key(books, key, reverse=reverse, algorithm='merge')
+
+def sort_by_key(books, key, reverse=False, algorithm='intro'):
+    """Devuelve una lista nueva con los libros ordenados por uno o varios atributos.
+
+    key es un nombre de atributo o una secuencia de nombres; reverse es un bool o
+    una secuencia de bools, uno por atributo. algorithm es 'intro' o 'merge'.
+    """
+    keys = (key,) if isinstance(key, str) else tuple(key)
+    directions = (reverse,) * len(keys) if isinstance(reverse, bool) else tuple(reverse)
+    if len(directions) != len(keys):
+        raise ValueError("reverse debe tener un valor por cada atributo de key.")
+    sort = _SORTS.get(algorithm)
+    if sort is None:
+        raise ValueError(f"Algoritmo de ordenamiento '{algorithm}' no reconocido.")
+
+    items = list(books)
+    if len(set(directions)) == 1:
+        passes = [(keys, directions[0])]
+    else:
+        # Direcciones mixtas: una pasada estable por atributo, del menos al más significativo
+        passes = [((name,), descending) for name, descending in reversed(list(zip(keys, directions)))]
+    for names, descending in passes:
+        extract = attrgetter(*names)
+        if descending:
+            # Orden ascendente por (clave, -posición) invertido: descendente y estable
+            decorated = [(extract(book), -position) for position, book in enumerate(items)]
+        else:
+            decorated = [(extract(book), position) for position, book in enumerate(items)]
+        sort(decorated)
+        if descending:
+            decorated.reverse()
+            items = [items[-position] for _, position in decorated]
+        else:
+            items = [items[position] for _, position in decorated]
+    return items
+
+def _insertion_sort(items, low, high):
+    for i in range(low + 1, high + 1):
+        item = items[i]
+        j = i - 1
+        while j >= low and item < items[j]:
+            items[j + 1] = items[j]
+            j -= 1
+        items[j + 1] = item
+
+def _introsort(items):
+    # Quicksort iterativo con mediana de tres; si la profundidad se agota, heapsort
+    if len(items) < 2:
+        return
+    stack = [(0, len(items) - 1, 2 * len(items).bit_length())]
+    while stack:
+        low, high, depth = stack.pop()
+        while high - low >= INSERTION_CUTOFF:
+            if depth == 0:
+                _heap_sort(items, low, high)
+                break
+            depth -= 1
+            pivot = _partition(items, low, high)
+            # Se apila el lado mayor y se continúa con el menor: pila de O(log n)
+            if pivot - low < high - pivot:
+                stack.append((pivot + 1, high, depth))
+                high = pivot - 1
             else:
-                books[k] = R[j]
-                j += 1
-            k += 1
+                stack.append((low, pivot - 1, depth))
+                low = pivot + 1
+        else:
+            _insertion_sort(items, low, high)
 
-        while i < len(L):
-            books[k] = L[i]
+def _partition(items, low, high):
+    mid = (low + high) // 2
+    if items[mid] < items[low]:
+        items[low], items[mid] = items[mid], items[low]
+    if items[high] < items[low]:
+        items[low], items[high] = items[high], items[low]
+    if items[high] < items[mid]:
+        items[mid], items[high] = items[high], items[mid]
+    # items[low] <= pivote <= items[high] sirven de centinelas
+    items[mid], items[high - 1] = items[high - 1], items[mid]
+    pivot = items[high - 1]
+    i = low
+    j = high - 1
+    while True:
+        i += 1
+        while items[i] < pivot:
             i += 1
-            k += 1
+        j -= 1
+        while pivot < items[j]:
+            j -= 1
+        if i >= j:
+            break
+        items[i], items[j] = items[j], items[i]
+    items[i], items[high - 1] = items[high - 1], items[i]
+    return i
+
+def _heap_sort(items, low, high):
+    size = high - low + 1
+    for start in range(size // 2 - 1, -1, -1):
+        _sift_down(items, low, start, size)
+    for end in range(size - 1, 0, -1):
+        items[low], items[low + end] = items[low + end], items[low]
+        _sift_down(items, low, 0, end)
+
+def _sift_down(items, offset, root, size):
+    while True:
+        child = 2 * root + 1
+        if child >= size:
+            return
+        if child + 1 < size and items[offset + child] < items[offset + child + 1]:
+            child += 1
+        if not items[offset + root] < items[offset + child]:
+            return
+        items[offset + root], items[offset + child] = items[offset + child], items[offset + root]
+        root = child
+
+def _merge_sort(items):
+    # Merge sort ascendente (bottom-up) con un único búfer reutilizado en cada nivel
+    n = len(items)
+    for start in range(0, n, MERGE_RUN):
+        _insertion_sort(items, start, min(start + MERGE_RUN, n) - 1)
+    source = items
+    target = [None] * n
+    width = MERGE_RUN
+    while width < n:
+        for low in range(0, n, 2 * width):
+            mid = min(low + width, n)
+            high = min(low + 2 * width, n)
+            if mid >= high or not source[mid] < source[mid - 1]:
+                # Corrida única o ya ordenada respecto a la siguiente: copia directa
+                target[low:high] = source[low:high]
+                continue
+            i, j, k = low, mid, low
+            while i < mid and j < high:
+                if source[j] < source[i]:
+                    target[k] = source[j]
+                    j += 1
+                else:
+                    target[k] = source[i]
+                    i += 1
+                k += 1
+            if i < mid:
+                target[k:high] = source[i:mid]
+            else:
+                target[k:high] = source[j:high]
+        source, target = target, source
+        width *= 2
+    if source is not items:
+        items[:] = source
 
-        while j < len(R):
-            books[k] = R[j]
-            j += 1
-            k += 1
+_SORTS = {'intro': _introsort, 'merge': _merge_sort}
 
 def binary_search(books, key, value):
     low = 0
@@ -58,4 +178,4 @@ def binary_search(books, key, value):
             low = mid + 1
         else:
             high = mid - 1
-    return None
\ No newline at end of file
+    return None
@@ -0,0 +1,46 @@
+"""Almacén de contenidos: deduplicación, reapertura y caché LRU acotada en bytes."""
+import os
+import tempfile
+import unittest
+from blobstore import BlobStore
+
+
+class BlobStoreTest(unittest.TestCase):
+    def setUp(self):
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.directory = os.path.join(temporary.name, 'blobs')
+
+    def open(self, **kwargs):
+        store = BlobStore(self.directory, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_cache_eviction_with_non_ascii_text(self):
+        # Cada texto ocupa más bytes UTF-8 que caracteres: la caché debe descontar bytes
+        store = self.open(cache_bytes=100)
+        texts = [f"Canción número {i}: ñandú, corazón, pingüino" for i in range(50)]
+        refs = [store.put(text) for text in texts]
+        for _ in range(3):
+            for ref, text in zip(refs, texts):
+                self.assertEqual(ref.load(), text)
+                stats = store.stats()
+                self.assertLessEqual(stats['cached_bytes'], 100)
+                self.assertGreater(stats['cached'], 0)
+
+    def test_deduplicates_and_survives_reopen(self):
+        store = BlobStore(self.directory)
+        text_ref = store.put("Vista previa con acentos: áéíóú")
+        bytes_ref = store.put(b'\x89PNG portada')
+        self.assertEqual(store.put("Vista previa con acentos: áéíóú").index, text_ref.index)
+        digests = text_ref.digest, bytes_ref.digest
+        store.close()
+
+        reopened = self.open()
+        self.assertEqual(len(reopened), 2)
+        self.assertEqual(reopened.ref(digests[0]).load(), "Vista previa con acentos: áéíóú")
+        self.assertEqual(reopened.ref(digests[1]).load(), b'\x89PNG portada')
+
+
+if __name__ == '__main__':
+    unittest.main()
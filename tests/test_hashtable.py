@@ -0,0 +1,82 @@
+"""Tabla hash de trees.py con factor de carga alto, en modo directo e incremental."""
+import pickle
+import random
+import threading
+import unittest
+from book import Book
+from trees import HashTable
+
+
+def make_book(title):
+    return Book(title, "Autor", "Novela", 2000, None, None)
+
+
+class HashTableTest(unittest.TestCase):
+    def run_bounded(self, func, seconds=10):
+        # Una tabla sin posiciones vacías hacía que el sondeo no terminara nunca
+        errors = []
+        thread = threading.Thread(target=lambda: errors.extend(_capture(func)), daemon=True)
+        thread.start()
+        thread.join(seconds)
+        self.assertFalse(thread.is_alive(), "La operación sobre la tabla hash no terminó.")
+        if errors:
+            raise errors[0]
+
+    def test_small_table_high_load_factor(self):
+        def run():
+            for incremental in (False, True):
+                table = HashTable(size=8, load_factor=0.99, incremental=incremental, rehash_step=1)
+                for i in range(8):
+                    table.insert(make_book(f"Libro {i}"))
+                self.assertIsNone(table.search("Ausente"))
+                self.assertFalse(table.delete("Ausente"))
+                self.assertEqual(len(table), 8)
+                for i in range(8):
+                    self.assertEqual(table.search(f"Libro {i}").title, f"Libro {i}")
+        self.run_bounded(run)
+
+    def test_random_operations_match_dict(self):
+        def run():
+            rng = random.Random(0)
+            for _ in range(200):
+                table = HashTable(size=rng.choice([2, 4, 8]), load_factor=rng.choice([0.5, 0.9, 0.99]),
+                                  incremental=rng.random() < 0.7, rehash_step=rng.choice([1, 2, 32]))
+                expected = {}
+                for _ in range(300):
+                    title = f"Libro {rng.randint(0, 60)}"
+                    operation = rng.random()
+                    if operation < 0.5:
+                        table.insert(make_book(title))
+                        expected.setdefault(title, True)
+                    elif operation < 0.8:
+                        self.assertEqual(table.search(title) is not None, title in expected)
+                    else:
+                        self.assertEqual(table.delete(title), title in expected)
+                        expected.pop(title, None)
+                    self.assertEqual(len(table), len(expected))
+        self.run_bounded(run)
+
+    def test_pickle_keeps_only_live_books(self):
+        table = HashTable(size=8, load_factor=0.9, incremental=True, rehash_step=1)
+        for i in range(20):
+            table.insert(make_book(f"Libro {i}"))
+        for i in range(0, 20, 2):
+            table.delete(f"Libro {i}")
+        restored = pickle.loads(pickle.dumps(table))
+        self.assertEqual(len(restored), 10)
+        self.assertTrue(restored.incremental)
+        for i in range(20):
+            self.assertEqual(restored.search(f"Libro {i}") is not None, i % 2 == 1)
+        self.assertIsNone(restored._old_keys)
+
+
+def _capture(func):
+    try:
+        func()
+    except BaseException as error:
+        return [error]
+    return []
+
+
+if __name__ == '__main__':
+    unittest.main()
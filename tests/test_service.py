@@ -0,0 +1,41 @@
+"""Protocolo JSON por líneas de QueryService: respuestas de error ante peticiones mal formadas."""
+import json
+import socket
+import unittest
+from service import QueryService, QueryClient, ServiceError
+
+
+def echo(**params):
+    return params
+
+
+class QueryServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.service = QueryService({'echo': (echo, 'read')}, port=0, workers=2)
+        self.address = self.service.start_in_thread()
+        self.addCleanup(self.service.stop)
+        self.client = QueryClient(*self.address, timeout=10)
+        self.addCleanup(self.client.close)
+
+    def test_malformed_op_gets_error_response(self):
+        for op in (["echo"], {'name': 'echo'}, 5, None, 'desconocida'):
+            with self.subTest(op=op), self.assertRaises(ServiceError):
+                self.client.request(op)
+        self.assertEqual(self.client.request('echo', a=1), {'a': 1})
+        stats = self.client.request('stats')
+        self.assertEqual(stats['invalid']['count'], 5)
+        self.assertEqual(stats['echo']['count'], 1)
+
+    def test_malformed_lines_keep_connection_open(self):
+        with socket.create_connection(self.address, timeout=10) as connection:
+            stream = connection.makefile('rwb')
+            for line in (b'no es json', b'[1, 2]', b'{"id": 7}', b'{"id": 8, "op": ["x"]}'):
+                stream.write(line + b'\n')
+                stream.flush()
+                response = json.loads(stream.readline())
+                self.assertFalse(response['ok'])
+            self.assertEqual(response['id'], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Ida y vuelta de una instantánea entre procesos con distinta semilla de hash (PYTHONHASHSEED)."""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cada fase corre en un proceso nuevo: los índices se restauran de la instantánea y
+# hash() de los títulos no coincide con el del proceso que la escribió
+WRITE = textwrap.dedent('''
+    import sys
+    import main
+    from book import Book
+    main.open_storage(sys.argv[1])
+    main.add_books([Book(f"Libro {i}", f"Autor {i % 3}", "Novela", 1900 + i, None, f"Vista {i}")
+                    for i in range(40)])
+    for i in range(10):
+        main.remove_book(f"Libro {i}")
+    main.close_storage()
+''')
+
+READ = textwrap.dedent('''
+    import json
+    import logging
+    import sys
+    import main
+
+    class Warnings(logging.Handler):
+        records = []
+
+        def emit(self, record):
+            self.records.append(record.getMessage())
+
+    logging.getLogger('snapshot').addHandler(Warnings(logging.WARNING))
+    main.open_storage(sys.argv[1])
+    found = [title for title in (f"Libro {i}" for i in range(40)) if main._serve_details(title) is not None]
+    details = main._serve_details("Libro 20")
+    removed = main.remove_book(sys.argv[2]) is not None
+    main.close_storage()
+    print(json.dumps({'found': found, 'details': details, 'removed': removed,
+                      'warnings': Warnings.records}))
+''')
+
+
+class SnapshotRoundTripTest(unittest.TestCase):
+    def run_phase(self, script, seed, *args):
+        env = dict(os.environ, PYTHONHASHSEED=str(seed),
+                   PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+        result = subprocess.run([sys.executable, '-c', script, *args], cwd=self.directory,
+                                env=env, capture_output=True, text=True, timeout=300)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def setUp(self):
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.directory = temporary.name
+        self.data = os.path.join(self.directory, 'datos')
+
+    def test_reload_with_another_hash_seed(self):
+        self.run_phase(WRITE, 1, self.data)
+        first = json.loads(self.run_phase(READ, 2, self.data, "Libro 30"))
+        self.assertEqual(first['warnings'], [])
+        self.assertEqual(first['found'], [f"Libro {i}" for i in range(10, 40)])
+        self.assertEqual(first['details']['author'], "Autor 2")
+        self.assertEqual(first['details']['vista_previa'], "Vista 20")
+        self.assertTrue(first['removed'])
+
+        second = json.loads(self.run_phase(READ, 3, self.data, "Libro 31"))
+        self.assertEqual(second['warnings'], [])
+        self.assertEqual(second['found'], [f"Libro {i}" for i in range(10, 40) if i != 30])
+        self.assertTrue(second['removed'])
+
+        third = json.loads(self.run_phase(READ, 4, self.data, "Libro 30"))
+        self.assertNotIn("Libro 31", third['found'])
+        self.assertFalse(third['removed'])
+
+
+if __name__ == '__main__':
+    unittest.main()
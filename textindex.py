@@ -0,0 +1,445 @@
+import heapq
+import logging
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from itertools import islice
+from trees import _edit_row
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Campos indexados y peso de cada aparición de un término en ellos
+TEXT_FIELDS = {
+    'title': 3,
+    'author': 2,
+    'vista_previa': 1,
+}
+BLOCK_SIZE = 128  # Postings por bloque comprimido
+MAX_EXPANSIONS = 50  # Términos del vocabulario en que se expande una palabra incompleta
+MERGE_SIZE = 1024  # Términos nuevos mínimos antes de fusionarlos con el vocabulario ordenado
+MERGE_FRACTION = 8  # ... o 1/8 del vocabulario, para que el costo total de fusionar sea lineal
+
+_TOKEN = re.compile(r'\w+')
+
+def fold(text):
+    """Minúsculas y sin acentos: 'Canción' -> 'cancion'."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+def tokenize(text):
+    return _TOKEN.findall(fold(text))
+
+def term_frequencies(values):
+    """Frecuencias ponderadas {término: peso} de los valores de los campos, en el orden de TEXT_FIELDS."""
+    frequencies = {}
+    for value, weight in zip(values, TEXT_FIELDS.values()):
+        if not value:
+            continue
+        for term in tokenize(str(value)):
+            frequencies[term] = frequencies.get(term, 0) + weight
+    return frequencies
+
+def _encode_varint(value, out):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _decode_block(data, base):
+    # Bloque: pares (delta de documento, frecuencia) en varint; base es el último documento del bloque anterior
+    docs = []
+    tfs = []
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value)
+        value = shift = 0
+    doc = base
+    for i in range(0, len(values), 2):
+        doc += values[i]
+        docs.append(doc)
+        tfs.append(values[i + 1])
+    return docs, tfs
+
+# Lista de postings de un término, comprimida por bloques
+class PostingList:
+    """Postings de un término: bloques cerrados de BLOCK_SIZE documentos y un bloque abierto.
+
+    El bloque abierto también se guarda en varint, así que la mayoría de los
+    términos, que nunca llenan un bloque, ocupan unos pocos bytes y no listas.
+    """
+
+    __slots__ = ('blocks', 'block_last', 'tail', 'tail_size', 'last_doc', 'df', 'max_tf', 'min_length')
+
+    def __init__(self):
+        self.blocks = ()  # bytes por bloque cerrado; tupla vacía compartida hasta cerrar el primero
+        self.block_last = ()  # Último documento de cada bloque cerrado, para saltar sin descomprimir
+        self.tail = b''  # Bloque abierto, en el mismo formato que los cerrados
+        self.tail_size = 0
+        self.last_doc = 0  # Último documento agregado: base del próximo delta
+        self.df = 0  # Documentos vivos que contienen el término
+        self.max_tf = 0  # Cotas para la puntuación máxima del término
+        self.min_length = None
+
+    def append(self, doc, tf, length):
+        data = bytearray()
+        _encode_varint(doc - self.last_doc, data)
+        _encode_varint(tf, data)
+        self.tail += data
+        self.tail_size += 1
+        self.last_doc = doc
+        self.df += 1
+        self.max_tf = max(self.max_tf, tf)
+        self.min_length = length if self.min_length is None else min(self.min_length, length)
+        if self.tail_size == BLOCK_SIZE:
+            if not self.blocks:
+                self.blocks = []
+                self.block_last = array('I')
+            self.blocks.append(self.tail)
+            self.block_last.append(doc)
+            self.tail = b''
+            self.tail_size = 0
+
+    def load(self, block):
+        # Documentos y frecuencias del bloque indicado; el bloque abierto es el último
+        base = self.block_last[block - 1] if block else 0
+        if block < len(self.blocks):
+            return _decode_block(self.blocks[block], base)
+        return _decode_block(self.tail, base)
+
+def _fuzzy_terms(terms, word, max_edits):
+    """(distancia, término) de los términos ordenados a lo sumo a max_edits ediciones de word.
+
+    Recorre la lista como si fuera un Trie: las filas de Levenshtein del prefijo
+    común con el término anterior se reutilizan, y si un prefijo ya supera
+    max_edits se saltan por bisección todos los términos que lo comparten.
+    """
+    matches = []
+    rows = [list(range(len(word) + 1))]  # rows[i]: fila tras los primeros i caracteres de previous
+    previous = ''
+    i = 0
+    while i < len(terms):
+        term = terms[i]
+        common = 0
+        limit = min(len(previous), len(term), len(rows) - 1)
+        while common < limit and previous[common] == term[common]:
+            common += 1
+        del rows[common + 1:]
+        dead = None
+        for depth in range(common, len(term)):
+            row = _edit_row(word, rows[-1], term[depth])
+            rows.append(row)
+            if min(row) > max_edits:
+                dead = depth + 1
+                break
+        if dead is None:
+            if rows[-1][-1] <= max_edits:
+                matches.append((rows[-1][-1], term))
+            previous = term
+            i += 1
+        else:
+            previous = term[:dead]
+            i = bisect_left(terms, previous + '\U0010ffff', i + 1)
+    return matches
+
+# Vocabulario ordenado para expandir prefijos y corregir palabras
+class SortedTerms:
+    """Términos en una lista ordenada, consultados por bisección.
+
+    Cuesta un puntero por término (las cadenas son las mismas claves del
+    diccionario de postings). Los términos nuevos van a una lista pendiente,
+    también ordenada, que se fusiona con la principal cuando alcanza MERGE_SIZE
+    términos o 1/MERGE_FRACTION del vocabulario, para no desplazar toda la
+    lista en cada inserción.
+    """
+
+    def __init__(self):
+        self.terms = []
+        self.pending = []
+
+    def __len__(self):
+        return len(self.terms) + len(self.pending)
+
+    def insert(self, term):
+        insort(self.pending, term)
+        if len(self.pending) >= max(MERGE_SIZE, len(self.terms) // MERGE_FRACTION):
+            self._merge()
+
+    def update(self, terms):
+        self.pending.extend(terms)
+        self._merge()
+
+    def _merge(self):
+        # Timsort fusiona en tiempo lineal las dos corridas ya ordenadas
+        self.terms += self.pending
+        self.terms.sort()
+        self.pending = []
+
+    def search(self, prefix, limit=None):
+        """Términos que empiezan por prefix, en orden alfabético."""
+        found = heapq.merge(self._with_prefix(self.terms, prefix), self._with_prefix(self.pending, prefix))
+        return list(islice(found, limit))
+
+    def fuzzy_search(self, word, max_edits=2, limit=None):
+        """Términos a lo sumo a max_edits ediciones de word, por distancia y luego alfabéticamente."""
+        matches = _fuzzy_terms(self.terms, word, max_edits) + _fuzzy_terms(self.pending, word, max_edits)
+        matches = sorted(matches) if limit is None else heapq.nsmallest(limit, matches)
+        return [term for _, term in matches]
+
+    @staticmethod
+    def _with_prefix(terms, prefix):
+        for i in range(bisect_left(terms, prefix), len(terms)):
+            if not terms[i].startswith(prefix):
+                return
+            yield terms[i]
+
+class _Cursor:
+    """Recorre una lista de postings en orden de documento, descomprimiendo un bloque a la vez."""
+
+    __slots__ = ('postings', 'idf', 'upper_bound', 'block', 'docs', 'tfs', 'position', 'doc')
+
+    def __init__(self, postings, idf, upper_bound):
+        self.postings = postings
+        self.idf = idf
+        self.upper_bound = upper_bound
+        self.block = -1
+        self.docs = self.tfs = ()
+        self.position = 0
+        self.doc = None
+        self._enter(0)
+
+    def _enter(self, block):
+        last = len(self.postings.blocks)
+        while block <= last:
+            docs, tfs = self.postings.load(block)
+            if docs:
+                self.block, self.docs, self.tfs, self.position = block, docs, tfs, 0
+                self.doc = docs[0]
+                return
+            block += 1
+        self.doc = None
+
+    def next(self):
+        self.position += 1
+        if self.position < len(self.docs):
+            self.doc = self.docs[self.position]
+        else:
+            self._enter(self.block + 1)
+
+    def seek(self, target):
+        """Avanza hasta el primer documento >= target, saltando bloques enteros."""
+        if self.doc is None or self.doc >= target:
+            return
+        block_last = self.postings.block_last
+        if self.block < len(block_last) and block_last[self.block] < target:
+            self._enter(bisect_left(block_last, target, self.block + 1))
+            if self.doc is None:
+                return
+        self.position = bisect_left(self.docs, target, self.position)
+        if self.position < len(self.docs):
+            self.doc = self.docs[self.position]
+        else:
+            self._enter(self.block + 1)
+
+    @property
+    def tf(self):
+        return self.tfs[self.position]
+
+# Índice invertido de texto completo con puntuación BM25
+class TextIndex:
+    """Índice invertido sobre título, autor y vista previa con ranking BM25.
+
+    Los términos se normalizan sin acentos ni mayúsculas y cada campo pondera
+    sus apariciones según TEXT_FIELDS. Las listas de postings se comprimen en
+    bloques de BLOCK_SIZE documentos (deltas en varint). La recuperación top-k
+    usa MaxScore: los términos cuya cota superior no alcanza a superar el umbral
+    actual dejan de generar candidatos y solo se consultan saltando bloques.
+    La última palabra de la consulta se expande por prefijo sobre el vocabulario,
+    así que una palabra a medio escribir no requiere recorrer el catálogo.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # término -> PostingList
+        self.vocabulary = SortedTerms()  # Términos, para expandir prefijos
+        self.docs = []  # documento -> libro, o None si fue eliminado
+        self.lengths = array('I')  # documento -> longitud ponderada
+        self._doc_ids = {}  # id(libro) -> documento
+        self.total_length = 0
+        logger.info("Inicializado el índice de texto completo.")
+
+    def __len__(self):
+        return len(self._doc_ids)
+
+    def __getstate__(self):
+        # _doc_ids usa id() de los libros, que cambia al deserializarlos
+        state = self.__dict__.copy()
+        del state['_doc_ids']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._doc_ids = {id(book): doc for doc, book in enumerate(self.docs) if book is not None}
+
+    @metrics.timed('text_index.add')
+    def add(self, book):
+        self._add(book)
+        logger.debug("Libro '%s' agregado al índice de texto.", book.title)
+
+    def add_many(self, books):
+        count = 0
+        for book in books:
+            self._add(book)
+            count += 1
+        logger.info(f"Indexados {count} libros en el índice de texto ({len(self.postings)} términos).")
+
+    def _add(self, book):
+        frequencies = self._frequencies(book)
+        length = sum(frequencies.values())
+        doc = len(self.docs)
+        self.docs.append(book)
+        self.lengths.append(length)
+        self._doc_ids[id(book)] = doc
+        self.total_length += length
+        for term, tf in frequencies.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = PostingList()
+                self.vocabulary.insert(term)
+            postings.append(doc, tf, length)
+
+    @staticmethod
+    def _frequencies(book):
+        return term_frequencies(getattr(book, field) for field in TEXT_FIELDS)
+
+    def graft(self, books, lengths, shards):
+        """Carga un índice construido por partes (ver parallel.py); este índice debe estar vacío.
+
+        books[i] es el documento i, lengths su longitud ponderada y cada parte es
+        un diccionario de postings con términos que no aparecen en las demás.
+        """
+        if self.docs:
+            raise ValueError("Solo se pueden injertar partes en un índice de texto vacío.")
+        self.docs = list(books)
+        self.lengths = lengths
+        self._doc_ids = {id(book): doc for doc, book in enumerate(self.docs)}
+        self.total_length = sum(lengths)
+        for postings in shards:
+            self.postings.update(postings)
+        self.vocabulary.update(self.postings)
+        logger.info(f"Injertados {len(self.docs)} libros en el índice de texto ({len(self.postings)} términos).")
+
+    @metrics.timed('text_index.remove')
+    def remove(self, book):
+        """Marca el documento de book como eliminado; sus postings se ignoran al consultar."""
+        doc = self._doc_ids.pop(id(book), None)
+        if doc is None:
+            return False
+        self.docs[doc] = None
+        self.total_length -= self.lengths[doc]
+        for term in self._frequencies(book):
+            self.postings[term].df -= 1
+        logger.debug("Libro '%s' eliminado del índice de texto.", book.title)
+        return True
+
+    @metrics.timed('text_index.search')
+    def search(self, query, limit=None):
+        """Libros que coinciden con query, de mayor a menor puntuación BM25."""
+        return [book for book, _ in self.scored(query, limit)]
+
+    def scored(self, query, limit=None):
+        """Pares (libro, puntuación) de los limit mejores resultados; None los devuelve todos."""
+        tokens = tokenize(query)
+        count = len(self._doc_ids)
+        if not tokens or not count or limit == 0:
+            return []
+        average_length = self.total_length / count
+        weights = {}
+        for term in tokens[:-1]:
+            weights[term] = weights.get(term, 0) + 1
+        # La última palabra puede estar incompleta: si no es un término, se expande por prefijo
+        last = tokens[-1]
+        if last in self.postings:
+            weights[last] = weights.get(last, 0) + 1
+        else:
+            for term in self.vocabulary.search(last, limit=MAX_EXPANSIONS):
+                weights.setdefault(term, 1)
+
+        cursors = []
+        for term, weight in weights.items():
+            postings = self.postings.get(term)
+            if postings is None or not postings.df:
+                continue
+            idf = weight * math.log(1 + (count - postings.df + 0.5) / (postings.df + 0.5))
+            upper_bound = idf * self._saturation(postings.max_tf, postings.min_length, average_length)
+            cursors.append(_Cursor(postings, idf, upper_bound))
+        if not cursors:
+            logger.debug("Sin resultados de texto para '%s'.", query)
+            return []
+        return self._max_score(cursors, limit, average_length)
+
+    def _saturation(self, tf, length, average_length):
+        return tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / average_length))
+
+    def _max_score(self, cursors, limit, average_length):
+        cursors.sort(key=lambda cursor: cursor.upper_bound)
+        # bounds[i]: cota de la suma de los cursores 0..i
+        bounds = []
+        total = 0.0
+        for cursor in cursors:
+            total += cursor.upper_bound
+            bounds.append(total)
+        docs = self.docs
+        lengths = self.lengths
+        saturation = self._saturation
+        heap = []  # (puntuación, -documento) de los mejores hasta ahora
+        threshold = 0.0
+        essential = 0  # cursors[:essential] no pueden superar el umbral por sí solos
+        while True:
+            doc = None
+            for cursor in cursors[essential:]:
+                if cursor.doc is not None and (doc is None or cursor.doc < doc):
+                    doc = cursor.doc
+            if doc is None:
+                break
+            alive = docs[doc] is not None
+            length = lengths[doc]
+            score = 0.0
+            for cursor in cursors[essential:]:
+                if cursor.doc == doc:
+                    if alive:
+                        score += cursor.idf * saturation(cursor.tf, length, average_length)
+                    cursor.next()
+            if not alive:
+                continue
+            for i in range(essential - 1, -1, -1):
+                if score + bounds[i] <= threshold:
+                    break
+                cursor = cursors[i]
+                cursor.seek(doc)
+                if cursor.doc == doc:
+                    score += cursor.idf * saturation(cursor.tf, length, average_length)
+            if limit is None:
+                heap.append((score, -doc))
+            elif len(heap) < limit:
+                heapq.heappush(heap, (score, -doc))
+            elif score > threshold:
+                heapq.heapreplace(heap, (score, -doc))
+            else:
+                continue
+            if limit is not None and len(heap) == limit:
+                threshold = heap[0][0]
+                while essential < len(cursors) and bounds[essential] <= threshold:
+                    essential += 1
+        heap.sort(reverse=True)
+        return [(docs[-negative_doc], score) for score, negative_doc in heap]
@@ -1,12 +1,25 @@
+import heapq
 import logging
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain, islice
 from book import Book
+from metrics import metrics
 
-# Configuración del logger
-logging.basicConfig(level=logging.INFO)
+# Configuración del logger: sin handlers propios; los mensajes por operación van a DEBUG
 logger = logging.getLogger(__name__)
 
+def _sorted_list(sorted_books, key):
+    # Materializa la secuencia y verifica que esté ordenada por el atributo indicado
+    books = list(sorted_books)
+    for i in range(1, len(books)):
+        if getattr(books[i], key) < getattr(books[i - 1], key):
+            raise ValueError(f"bulk_load requiere libros ordenados por '{key}'.")
+    return books
+
 # Árbol binario de búsqueda por título
 class TitleBSTNode:
+    __slots__ = ('book', 'left', 'right')
+
     def __init__(self, book):
         self.book = book
         self.left = None
@@ -16,8 +29,30 @@ class TitleBST:
     def __init__(self):
         self.root = None
 
+    @classmethod
+    def bulk_load(cls, sorted_books):
+        """Construye un árbol balanceado a partir de libros ordenados por título, en O(n)."""
+        tree = cls()
+        books = _sorted_list(sorted_books, 'title')
+        if not books:
+            return tree
+
+        def build(low, high):
+            if low > high:
+                return None
+            mid = (low + high) // 2
+            node = TitleBSTNode(books[mid])
+            node.left = build(low, mid - 1)
+            node.right = build(mid + 1, high)
+            return node
+
+        tree.root = build(0, len(books) - 1)
+        logger.info(f"Árbol por título cargado en bloque con {len(books)} libros.")
+        return tree
+
+    @metrics.timed('title_bst.insert')
     def insert(self, book):
-        logger.info(f"Insertando libro '{book.title}' en el árbol por título")
+        logger.debug("Insertando libro '%s' en el árbol por título", book.title)
         if self.root is None:
             self.root = TitleBSTNode(book)
         else:
@@ -35,8 +70,9 @@ class TitleBST:
             else:
                 self._insert(node.right, book)
 
+    @metrics.timed('title_bst.search')
     def search(self, title):
-        logger.info(f"Buscando libro '{title}' en el árbol por título")
+        logger.debug("Buscando libro '%s' en el árbol por título", title)
         return self._search(self.root, title)
 
     def _search(self, node, title):
@@ -49,24 +85,120 @@ class TitleBST:
         else:
             return self._search(node.right, title)
 
+    @metrics.timed('title_bst.delete')
+    def delete(self, book):
+        """Elimina el nodo que contiene exactamente book (comparado por identidad)."""
+        parent, node = self._find_node(book)
+        if node is None:
+            logger.debug("Libro '%s' no encontrado en el árbol por título.", book.title)
+            return False
+        if node.left is not None and node.right is not None:
+            # Se sustituye por el sucesor en orden y se elimina el sucesor, que no tiene hijo izquierdo
+            successor_parent, successor = node, node.right
+            while successor.left is not None:
+                successor_parent, successor = successor, successor.left
+            node.book = successor.book
+            parent, node = successor_parent, successor
+        child = node.left if node.left is not None else node.right
+        if parent is None:
+            self.root = child
+        elif parent.left is node:
+            parent.left = child
+        else:
+            parent.right = child
+        logger.debug("Libro '%s' eliminado del árbol por título.", book.title)
+        return True
+
+    def _find_node(self, book):
+        # Los títulos repetidos pueden quedar a ambos lados (bulk_load), así que se exploran los dos
+        title = book.title
+        stack = [(None, self.root)]
+        while stack:
+            parent, node = stack.pop()
+            if node is None:
+                continue
+            if title < node.book.title:
+                stack.append((node, node.left))
+            elif title > node.book.title:
+                stack.append((node, node.right))
+            elif node.book is book:
+                return parent, node
+            else:
+                stack.append((node, node.left))
+                stack.append((node, node.right))
+        return None, None
+
+    def in_order_traversal(self):
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.book
+            node = node.right
+
 # Red-Black Tree implementation for storing books by title
 class RBTreeNode:
+    __slots__ = ('book', 'red', 'left', 'right', 'parent', 'size')
+
     def __init__(self, book):
         self.book = book
-        self.title = book.title
-        self.color = 'red'  # New nodes are initially red
+        self.red = True  # New nodes are initially red
         self.left = None
         self.right = None
         self.parent = None
+        self.size = 1  # Nodes in this subtree, for rank/select
 
 class RBTree:
+    """Árbol Rojo-Negro por título con estadísticos de orden.
+
+    Cada nodo guarda el tamaño de su subárbol, así que rank(), select() y la
+    paginación por posición cuestan O(log n) más el tamaño de la página.
+    """
+
     def __init__(self):
         self.NIL = RBTreeNode(Book('', '', '', '', '', ''))  # Sentinel node
-        self.NIL.color = 'black'
+        self.NIL.red = False
+        self.NIL.size = 0
         self.root = self.NIL
 
+    def __len__(self):
+        return self.root.size
+
+    @classmethod
+    def bulk_load(cls, sorted_books):
+        """Construye un árbol balanceado a partir de libros ordenados por título, en O(n).
+
+        Todos los niveles salvo el más profundo quedan completos, así que basta con
+        colorear de rojo los nodos del último nivel para cumplir las propiedades.
+        """
+        tree = cls()
+        books = _sorted_list(sorted_books, 'title')
+        if not books:
+            return tree
+        red_depth = len(books).bit_length() - 1
+
+        def build(low, high, depth, parent):
+            if low > high:
+                return tree.NIL
+            mid = (low + high) // 2
+            node = RBTreeNode(books[mid])
+            node.parent = parent
+            node.red = depth == red_depth and depth > 0
+            node.left = build(low, mid - 1, depth + 1, node)
+            node.right = build(mid + 1, high, depth + 1, node)
+            node.size = high - low + 1
+            return node
+
+        tree.root = build(0, len(books) - 1, 0, None)
+        logger.info(f"Árbol Rojo-Negro cargado en bloque con {len(books)} libros.")
+        return tree
+
+    @metrics.timed('rb_tree.insert')
     def insert(self, book):
-        logger.info(f"Inserting book '{book.title}' into Red-Black Tree")
+        logger.debug("Inserting book '%s' into Red-Black Tree", book.title)
         node = RBTreeNode(book)
         node.left = self.NIL
         node.right = self.NIL
@@ -75,9 +207,10 @@ class RBTree:
         parent = None
         current = self.root
 
-        while current != self.NIL:
+        while current is not self.NIL:
             parent = current
-            if node.title < current.title:
+            current.size += 1
+            if node.book.title < current.book.title:
                 current = current.left
             else:
                 current = current.right
@@ -85,283 +218,1275 @@ class RBTree:
         node.parent = parent
         if parent is None:
             self.root = node
-        elif node.title < parent.title:
+        elif node.book.title < parent.book.title:
             parent.left = node
         else:
             parent.right = node
 
-        node.color = 'red'
+        node.red = True
         self._insert_fixup(node)
 
     def _insert_fixup(self, node):
-        while node.parent and node.parent.color == 'red':
-            if node.parent == node.parent.parent.left:
+        while node.parent and node.parent.red:
+            if node.parent is node.parent.parent.left:
                 uncle = node.parent.parent.right
-                if uncle and uncle.color == 'red':
-                    node.parent.color = 'black'
-                    uncle.color = 'black'
-                    node.parent.parent.color = 'red'
+                if uncle and uncle.red:
+                    node.parent.red = False
+                    uncle.red = False
+                    node.parent.parent.red = True
                     node = node.parent.parent
                 else:
-                    if node == node.parent.right:
+                    if node is node.parent.right:
                         node = node.parent
                         self._left_rotate(node)
-                    node.parent.color = 'black'
-                    node.parent.parent.color = 'red'
+                    node.parent.red = False
+                    node.parent.parent.red = True
                     self._right_rotate(node.parent.parent)
             else:
                 uncle = node.parent.parent.left
-                if uncle and uncle.color == 'red':
-                    node.parent.color = 'black'
-                    uncle.color = 'black'
-                    node.parent.parent.color = 'red'
+                if uncle and uncle.red:
+                    node.parent.red = False
+                    uncle.red = False
+                    node.parent.parent.red = True
                     node = node.parent.parent
                 else:
-                    if node == node.parent.left:
+                    if node is node.parent.left:
                         node = node.parent
                         self._right_rotate(node)
-                    node.parent.color = 'black'
-                    node.parent.parent.color = 'red'
+                    node.parent.red = False
+                    node.parent.parent.red = True
                     self._left_rotate(node.parent.parent)
-        self.root.color = 'black'
+        self.root.red = False
 
     def _left_rotate(self, x):
         y = x.right
         x.right = y.left
-        if y.left != self.NIL:
+        if y.left is not self.NIL:
             y.left.parent = x
         y.parent = x.parent
         if x.parent is None:
             self.root = y
-        elif x == x.parent.left:
+        elif x is x.parent.left:
             x.parent.left = y
         else:
             x.parent.right = y
         y.left = x
         x.parent = y
-        logger.debug(f"Performed left rotation on '{x.title}'")
+        y.size = x.size
+        x.size = x.left.size + x.right.size + 1
+        logger.debug("Performed left rotation on '%s'", x.book.title)
 
     def _right_rotate(self, y):
         x = y.left
         y.left = x.right
-        if x.right != self.NIL:
+        if x.right is not self.NIL:
             x.right.parent = y
         x.parent = y.parent
         if y.parent is None:
             self.root = x
-        elif y == y.parent.right:
+        elif y is y.parent.right:
             y.parent.right = x
         else:
             y.parent.left = x
         x.right = y
         y.parent = x
-        logger.debug(f"Performed right rotation on '{y.title}'")
+        x.size = y.size
+        y.size = y.left.size + y.right.size + 1
+        logger.debug("Performed right rotation on '%s'", y.book.title)
 
-    def search(self, title):
-        logger.info(f"Searching for book '{title}' in Red-Black Tree")
-        return self._search(self.root, title)
+    @metrics.timed('rb_tree.delete')
+    def delete(self, book):
+        """Elimina el nodo que contiene exactamente book (comparado por identidad)."""
+        node = self._find_node(book)
+        if node is None:
+            logger.debug("Book '%s' not found in Red-Black Tree", book.title)
+            return False
+        logger.debug("Deleting book '%s' from Red-Black Tree", book.title)
+        # El nodo que sale físicamente de su posición es node o su sucesor; sus ancestros pierden uno
+        moved = node
+        if node.left is not self.NIL and node.right is not self.NIL:
+            moved = node.right
+            while moved.left is not self.NIL:
+                moved = moved.left
+        ancestor = moved.parent
+        while ancestor is not None:
+            ancestor.size -= 1
+            ancestor = ancestor.parent
+        removed_red = node.red
+        if node.left is self.NIL:
+            child = node.right
+            self._transplant(node, child)
+        elif node.right is self.NIL:
+            child = node.left
+            self._transplant(node, child)
+        else:
+            successor = node.right
+            while successor.left is not self.NIL:
+                successor = successor.left
+            removed_red = successor.red
+            child = successor.right
+            if successor.parent is node:
+                child.parent = successor  # Válido también si child es el centinela
+            else:
+                self._transplant(successor, child)
+                successor.right = node.right
+                successor.right.parent = successor
+            self._transplant(node, successor)
+            successor.left = node.left
+            successor.left.parent = successor
+            successor.red = node.red
+            successor.size = node.size
+        if not removed_red:
+            self._delete_fixup(child)
+        self.NIL.parent = None
+        return True
 
-    def _search(self, node, title):
-        if node == self.NIL or node is None:
-            return None
-        if title == node.title:
-            return node.book
-        elif title < node.title:
-            return self._search(node.left, title)
+    def _find_node(self, book):
+        title = book.title
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is self.NIL:
+                continue
+            if title < node.book.title:
+                stack.append(node.left)
+            elif title > node.book.title:
+                stack.append(node.right)
+            elif node.book is book:
+                return node
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
+        return None
+
+    def _transplant(self, old, new):
+        if old.parent is None:
+            self.root = new
+        elif old is old.parent.left:
+            old.parent.left = new
         else:
-            return self._search(node.right, title)
+            old.parent.right = new
+        new.parent = old.parent
+
+    def _delete_fixup(self, node):
+        while node is not self.root and not node.red:
+            parent = node.parent
+            if node is parent.left:
+                sibling = parent.right
+                if sibling.red:
+                    sibling.red = False
+                    parent.red = True
+                    self._left_rotate(parent)
+                    sibling = parent.right
+                if not sibling.left.red and not sibling.right.red:
+                    sibling.red = True
+                    node = parent
+                else:
+                    if not sibling.right.red:
+                        sibling.left.red = False
+                        sibling.red = True
+                        self._right_rotate(sibling)
+                        sibling = parent.right
+                    sibling.red = parent.red
+                    parent.red = False
+                    sibling.right.red = False
+                    self._left_rotate(parent)
+                    node = self.root
+            else:
+                sibling = parent.left
+                if sibling.red:
+                    sibling.red = False
+                    parent.red = True
+                    self._right_rotate(parent)
+                    sibling = parent.left
+                if not sibling.right.red and not sibling.left.red:
+                    sibling.red = True
+                    node = parent
+                else:
+                    if not sibling.left.red:
+                        sibling.right.red = False
+                        sibling.red = True
+                        self._left_rotate(sibling)
+                        sibling = parent.left
+                    sibling.red = parent.red
+                    parent.red = False
+                    sibling.left.red = False
+                    self._right_rotate(parent)
+                    node = self.root
+        node.red = False
+
+    @metrics.timed('rb_tree.search')
+    def search(self, title):
+        logger.debug("Searching for book '%s' in Red-Black Tree", title)
+        node = self.root
+        while node is not self.NIL:
+            if title == node.book.title:
+                return node.book
+            node = node.left if title < node.book.title else node.right
+        return None
+
+    def rank(self, title):
+        """Cantidad de libros con título menor que title: posición del primero >= title."""
+        rank = 0
+        node = self.root
+        while node is not self.NIL:
+            if node.book.title < title:
+                rank += node.left.size + 1
+                node = node.right
+            else:
+                node = node.left
+        return rank
+
+    def select(self, index):
+        """Libro en la posición index (desde 0) del orden por título."""
+        if not 0 <= index < self.root.size:
+            raise IndexError("Posición fuera del rango del Árbol Rojo-Negro.")
+        node = self.root
+        while True:
+            left_size = node.left.size
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.book
+            else:
+                index -= left_size + 1
+                node = node.right
+
+    def range(self, title_from=None, title_to=None):
+        """Genera los libros con title_from <= título <= title_to; None deja el extremo abierto."""
+        for book in self._iter_stack(self._stack_from_title(title_from)):
+            if title_to is not None and book.title > title_to:
+                return
+            yield book
+
+    def iter_from(self, title, n=None):
+        """Hasta n libros en orden por título a partir del primero con título >= title."""
+        return islice(self._iter_stack(self._stack_from_title(title)), n)
+
+    def page(self, number, size):
+        """Libros de la página number (desde 0) de tamaño size, en O(log n + size)."""
+        start = number * size
+        if start >= self.root.size:
+            return []
+        return list(islice(self._iter_stack(self._stack_from_index(start)), size))
+
+    def _stack_from_title(self, title):
+        # Camino hasta el primer nodo >= title; la pila guarda los nodos aún no emitidos
+        stack = []
+        node = self.root
+        while node is not self.NIL:
+            if title is None or not node.book.title < title:
+                stack.append(node)
+                node = node.left
+            else:
+                node = node.right
+        return stack
+
+    def _stack_from_index(self, index):
+        stack = []
+        node = self.root
+        while node is not self.NIL:
+            left_size = node.left.size
+            if index <= left_size:
+                stack.append(node)
+                if index == left_size:
+                    break
+                node = node.left
+            else:
+                index -= left_size + 1
+                node = node.right
+        return stack
+
+    def _iter_stack(self, stack):
+        # Recorrido en orden iterativo que continúa desde una pila ya preparada
+        while stack:
+            node = stack.pop()
+            yield node.book
+            node = node.right
+            while node is not self.NIL:
+                stack.append(node)
+                node = node.left
+
+    def in_order_traversal(self):
+        return self._iter_stack(self._stack_from_title(None))
 
 # Implementación del Trie para búsqueda por prefijo
+def _cache_top(top, entry, cache_size):
+    # Mantiene en top las cache_size entradas menores (clave, secuencia, libro)
+    if len(top) < cache_size:
+        insort(top, entry)
+    elif cache_size and entry < top[-1]:
+        insort(top, entry)
+        top.pop()
+
+def _refresh_top(node, children, cache_size):
+    # Recalcula top tras un borrado: las entradas propias preceden a las de los hijos
+    # y el top-k de la unión está contenido en la unión de los top-k de los hijos
+    merged = heapq.merge(*(child.top for child in children)) if children else ()
+    node.top = list(islice(chain(node.entries or (), merged), cache_size))
+
+def _remove_entry(entries, book):
+    for i, entry in enumerate(entries):
+        if entry[2] is book:
+            return entries.pop(i)
+    return None
+
+def _edit_row(query, row, char):
+    # Siguiente fila de la matriz de Levenshtein al extender la clave con char
+    new_row = [row[0] + 1]
+    for j, query_char in enumerate(query, 1):
+        new_row.append(min(row[j] + 1, new_row[j - 1] + 1, row[j - 1] + (query_char != char)))
+    return new_row
+
+def _ranked_matches(matches, limit):
+    # matches: (distancia, clave, secuencia, libro); la secuencia evita comparar libros
+    matches = sorted(matches) if limit is None else heapq.nsmallest(limit, matches)
+    return [book for _, _, _, book in matches]
+
 class TrieNode:
+    __slots__ = ('children', 'is_end_of_word', 'entries', 'top', 'count')
+
     def __init__(self):
         self.children = {}
         self.is_end_of_word = False
-        self.books = []
+        self.entries = []  # (clave, secuencia, libro) de las claves que terminan aquí
+        self.top = []  # Primeros resultados del subárbol en orden alfabético: (clave, secuencia, libro)
+        self.count = 0  # Libros en el subárbol, para estimar la selectividad de un prefijo
 
 class Trie:
-    def __init__(self):
+    def __init__(self, cache_size=10):
         self.root = TrieNode()
+        self.cache_size = cache_size
+        self._sequence = 0
 
+    @metrics.timed('trie.insert')
     def insert(self, key, book):
+        self._insert(key, book)
+        logger.debug("Insertado '%s' en el Trie.", key)
+
+    def insert_many(self, items):
+        count = 0
+        for key, book in items:
+            self._insert(key, book)
+            count += 1
+        logger.info(f"Insertadas {count} claves en el Trie.")
+
+    def _insert(self, key, book):
+        key_lower = key.lower()
+        # La secuencia desempata claves iguales por orden de inserción y evita comparar libros
+        entry = (key_lower, self._sequence, book)
+        self._sequence += 1
         node = self.root
-        for char in key.lower():
+        self._cache_entry(node, entry)
+        node.count += 1
+        for char in key_lower:
             if char not in node.children:
                 node.children[char] = TrieNode()
             node = node.children[char]
+            self._cache_entry(node, entry)
+            node.count += 1
         node.is_end_of_word = True
-        node.books.append(book)
-        logger.info(f"Insertado '{key}' en el Trie.")
+        node.entries.append(entry)
+
+    def _cache_entry(self, node, entry):
+        _cache_top(node.top, entry, self.cache_size)
+
+    @metrics.timed('trie.delete')
+    def delete(self, key, book):
+        """Elimina book de la clave key, podando los nodos que queden vacíos."""
+        key_lower = key.lower()
+        path = [self.root]
+        for char in key_lower:
+            node = path[-1].children.get(char)
+            if node is None:
+                return False
+            path.append(node)
+        entry = _remove_entry(path[-1].entries, book)
+        if entry is None:
+            return False
+        path[-1].is_end_of_word = bool(path[-1].entries)
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            node.count -= 1
+            if depth and not node.entries and not node.children:
+                del path[depth - 1].children[key_lower[depth - 1]]
+            elif any(cached is entry for cached in node.top):
+                _refresh_top(node, node.children.values(), self.cache_size)
+        logger.debug("Eliminado '%s' del Trie.", key)
+        return True
+
+    @metrics.timed('trie.fuzzy_search')
+    def fuzzy_search(self, query, max_edits=2, limit=None):
+        """Libros cuya clave está a lo sumo a max_edits ediciones de query, por distancia y luego alfabéticamente.
+
+        Cada nodo visitado extiende una fila de la matriz de Levenshtein; si su mínimo
+        supera max_edits ninguna clave del subárbol puede coincidir y no se recorre.
+        """
+        query = query.lower()
+        matches = []
+        stack = [(self.root, list(range(len(query) + 1)))]
+        while stack:
+            node, row = stack.pop()
+            if node.entries and row[-1] <= max_edits:
+                matches.extend((row[-1], key, sequence, book) for key, sequence, book in node.entries)
+            for char, child in node.children.items():
+                child_row = _edit_row(query, row, char)
+                if min(child_row) <= max_edits:
+                    stack.append((child, child_row))
+        logger.debug("Búsqueda aproximada de '%s': %s coincidencias.", query, len(matches))
+        return _ranked_matches(matches, limit)
+
+    @metrics.timed('trie.search')
+    def search(self, prefix, limit=None):
+        node = self._find_prefix(prefix)
+        if node is None:
+            logger.debug("No se encontraron libros con el prefijo '%s'.", prefix)
+            return []
+        if limit is None:
+            return list(self._iter_books(node))
+        if limit <= self.cache_size:
+            return [book for _, _, book in node.top[:limit]]
+        return list(islice(self._iter_books(node), limit))
+
+    def count(self, prefix):
+        """Cantidad de libros cuya clave empieza por prefix, sin recorrerlos."""
+        node = self._find_prefix(prefix)
+        return node.count if node is not None else 0
+
+    def graft(self, other):
+        """Incorpora las ramas de other, construido aparte con el mismo cache_size.
 
-    def search(self, prefix):
+        Sus claves deben empezar por caracteres que este Trie aún no tiene (p. ej.
+        una partición por carácter inicial, ver parallel.py); la clave vacía no se injerta.
+        """
+        if other.root.entries:
+            raise ValueError("No se puede injertar un Trie con la clave vacía.")
+        for char, child in other.root.children.items():
+            if char in self.root.children:
+                raise ValueError(f"El Trie ya tiene claves que empiezan por '{char}'.")
+            self.root.children[char] = child
+        self.root.count += other.root.count
+        _refresh_top(self.root, self.root.children.values(), self.cache_size)
+        # Las secuencias nuevas deben seguir siendo mayores que todas las injertadas
+        self._sequence = max(self._sequence, other._sequence)
+
+    def _find_prefix(self, prefix):
         node = self.root
         for char in prefix.lower():
-            if char not in node.children:
-                logger.info(f"No se encontraron libros con el prefijo '{prefix}'.")
-                return []
-            node = node.children[char]
-        return self._collect_books(node)
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _iter_books(self, node):
+        # Recorrido iterativo en orden alfabético; mismo orden que las listas cacheadas
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for _, _, book in node.entries:
+                yield book
+            for char in sorted(node.children, reverse=True):
+                stack.append(node.children[char])
+
+# Implementación del Trie compacto (radix) con nodos de bajo consumo de memoria
+class RadixTrieNode:
+    __slots__ = ('label', 'children', 'entries', 'top', 'count')
+
+    def __init__(self, label=''):
+        self.label = label  # Fragmento de la clave en la arista que llega a este nodo
+        self.children = None  # Diccionario primer carácter -> nodo, creado al necesitarlo
+        self.entries = None  # Lista de (clave, secuencia, libro) si una clave termina aquí
+        self.top = []  # Igual que TrieNode.top
+        self.count = 0  # Igual que TrieNode.count
 
-    def _collect_books(self, node):
-        books = []
-        if node.is_end_of_word:
-            books.extend(node.books)
-        for child in node.children.values():
-            books.extend(self._collect_books(child))
-        return books
+class RadixTrie:
+    """Trie con compresión de caminos: cada arista guarda una subcadena en lugar de un carácter."""
+
+    def __init__(self, cache_size=10):
+        self.root = RadixTrieNode()
+        self.cache_size = cache_size
+        self._sequence = 0
+
+    @metrics.timed('radix_trie.insert')
+    def insert(self, key, book):
+        self._insert(key, book)
+        logger.debug("Insertado '%s' en el Trie compacto.", key)
+
+    def insert_many(self, items):
+        count = 0
+        for key, book in items:
+            self._insert(key, book)
+            count += 1
+        logger.info(f"Insertadas {count} claves en el Trie compacto.")
+
+    def _insert(self, key, book):
+        key_lower = key.lower()
+        entry = (key_lower, self._sequence, book)
+        self._sequence += 1
+        node = self.root
+        _cache_top(node.top, entry, self.cache_size)
+        node.count += 1
+        i = 0
+        while i < len(key_lower):
+            child = node.children.get(key_lower[i]) if node.children else None
+            if child is None:
+                child = RadixTrieNode(key_lower[i:])
+                if node.children is None:
+                    node.children = {}
+                node.children[key_lower[i]] = child
+                node = child
+                _cache_top(node.top, entry, self.cache_size)
+                node.count += 1
+                break
+            label = child.label
+            common = 0
+            limit = min(len(label), len(key_lower) - i)
+            while common < limit and label[common] == key_lower[i + common]:
+                common += 1
+            if common < len(label):
+                # Dividir la arista en el punto donde las claves divergen
+                middle = RadixTrieNode(label[:common])
+                child.label = label[common:]
+                middle.children = {child.label[0]: child}
+                middle.top = list(child.top)
+                middle.count = child.count
+                node.children[key_lower[i]] = middle
+                child = middle
+            node = child
+            _cache_top(node.top, entry, self.cache_size)
+            node.count += 1
+            i += common
+        if node.entries is None:
+            node.entries = []
+        node.entries.append(entry)
+
+    @metrics.timed('radix_trie.delete')
+    def delete(self, key, book):
+        """Elimina book de la clave key; poda nodos vacíos y vuelve a fusionar aristas."""
+        key_lower = key.lower()
+        path = [self.root]
+        i = 0
+        while i < len(key_lower):
+            node = path[-1]
+            child = node.children.get(key_lower[i]) if node.children else None
+            if child is None or not key_lower.startswith(child.label, i):
+                return False
+            path.append(child)
+            i += len(child.label)
+        node = path[-1]
+        entry = _remove_entry(node.entries, book) if node.entries else None
+        if entry is None:
+            return False
+        if not node.entries:
+            node.entries = None
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            node.count -= 1
+            if depth and node.entries is None and not node.children:
+                parent = path[depth - 1]
+                del parent.children[node.label[0]]
+                if not parent.children:
+                    parent.children = None
+                continue
+            if depth and node.entries is None and len(node.children) == 1:
+                # Un nodo sin claves propias y con un solo hijo se fusiona con él
+                (child,) = node.children.values()
+                node.label += child.label
+                node.children = child.children
+                node.entries = child.entries
+                node.top = child.top
+                continue
+            if any(cached is entry for cached in node.top):
+                _refresh_top(node, node.children.values() if node.children else (), self.cache_size)
+        logger.debug("Eliminado '%s' del Trie compacto.", key)
+        return True
+
+    @metrics.timed('radix_trie.fuzzy_search')
+    def fuzzy_search(self, query, max_edits=2, limit=None):
+        """Igual que Trie.fuzzy_search; la fila se extiende carácter a carácter por cada etiqueta."""
+        query = query.lower()
+        matches = []
+        stack = [(self.root, list(range(len(query) + 1)))]
+        while stack:
+            node, row = stack.pop()
+            if node.entries and row[-1] <= max_edits:
+                matches.extend((row[-1], key, sequence, book) for key, sequence, book in node.entries)
+            if not node.children:
+                continue
+            for child in node.children.values():
+                child_row = row
+                for char in child.label:
+                    child_row = _edit_row(query, child_row, char)
+                    if min(child_row) > max_edits:
+                        break
+                else:
+                    stack.append((child, child_row))
+        logger.debug("Búsqueda aproximada de '%s': %s coincidencias.", query, len(matches))
+        return _ranked_matches(matches, limit)
+
+    @metrics.timed('radix_trie.search')
+    def search(self, prefix, limit=None):
+        node = self._find_prefix(prefix)
+        if node is None:
+            logger.debug("No se encontraron libros con el prefijo '%s'.", prefix)
+            return []
+        if limit is None:
+            return list(self._iter_books(node))
+        if limit <= self.cache_size:
+            return [book for _, _, book in node.top[:limit]]
+        return list(islice(self._iter_books(node), limit))
+
+    def count(self, prefix):
+        """Cantidad de libros cuya clave empieza por prefix, sin recorrerlos."""
+        node = self._find_prefix(prefix)
+        return node.count if node is not None else 0
+
+    def graft(self, other):
+        """Igual que Trie.graft."""
+        if other.root.entries:
+            raise ValueError("No se puede injertar un Trie compacto con la clave vacía.")
+        if other.root.children:
+            if self.root.children is None:
+                self.root.children = {}
+            for char, child in other.root.children.items():
+                if char in self.root.children:
+                    raise ValueError(f"El Trie compacto ya tiene claves que empiezan por '{char}'.")
+                self.root.children[char] = child
+        self.root.count += other.root.count
+        _refresh_top(self.root, self.root.children.values() if self.root.children else (), self.cache_size)
+        self._sequence = max(self._sequence, other._sequence)
+
+    def _find_prefix(self, prefix):
+        # Nodo cuyo subárbol contiene exactamente las claves con ese prefijo; puede acabar a mitad de etiqueta
+        prefix_lower = prefix.lower()
+        node = self.root
+        i = 0
+        while i < len(prefix_lower):
+            child = node.children.get(prefix_lower[i]) if node.children else None
+            if child is None:
+                return None
+            rest = prefix_lower[i:]
+            if rest.startswith(child.label):
+                i += len(child.label)
+            elif not child.label.startswith(rest):
+                return None
+            else:
+                i = len(prefix_lower)
+            node = child
+        return node
+
+    def _iter_books(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.entries:
+                for _, _, book in node.entries:
+                    yield book
+            if node.children:
+                for char in sorted(node.children, reverse=True):
+                    stack.append(node.children[char])
 
 # Implementación de la Tabla Hash para almacenar libros
-class HashTableNode:
-    def __init__(self, key, book):
-        self.key = key
-        self.book = book
-        self.next = None
+_DELETED = object()  # Lápida: marca una posición borrada sin cortar las secuencias de sondeo
 
 class HashTable:
-    def __init__(self, size=100):
-        self.size = size
-        self.table = [None] * self.size
+    """Tabla hash de direccionamiento abierto (sondeo lineal) sobre arreglos paralelos.
+
+    La capacidad es siempre potencia de 2 y se duplica cuando las posiciones
+    ocupadas (incluidas las lápidas) superan load_factor. Con incremental=True
+    el redimensionamiento no copia toda la tabla de una vez: cada operación
+    posterior migra rehash_step posiciones de la tabla anterior, y mientras
+    tanto las búsquedas consultan ambas.
+    """
+
+    def __init__(self, size=128, load_factor=0.7, incremental=False, rehash_step=32):
+        if not 0 < load_factor < 1:
+            raise ValueError("load_factor debe estar entre 0 y 1.")
+        self.load_factor = load_factor
+        self.incremental = incremental
+        self.rehash_step = rehash_step
+        self.size = _next_power_of_two(size)
+        self.keys = [None] * self.size
+        self.values = [None] * self.size
+        self.count = 0  # Libros vivos en ambas tablas
+        self.used = 0  # Posiciones no vacías (vivas o lápidas) en la tabla actual
+        self._old_keys = None  # Tabla anterior durante un redimensionamiento incremental
+        self._old_values = None
+        self._migrated = 0
         logger.info("Inicializada la Tabla Hash.")
 
-    def _hash(self, key):
-        return hash(key) % self.size
+    def __len__(self):
+        return self.count
+
+    def __getstate__(self):
+        # Las posiciones dependen de hash(), que cambia en cada proceso (PYTHONHASHSEED), y
+        # _DELETED no sobrevive a la serialización: solo se guardan los pares vivos
+        items = [(key, value)
+                 for keys, values in ((self.keys, self.values), (self._old_keys, self._old_values))
+                 if keys is not None
+                 for key, value in zip(keys, values) if key is not None and key is not _DELETED]
+        return {'load_factor': self.load_factor, 'incremental': self.incremental,
+                'rehash_step': self.rehash_step, 'items': items}
+
+    def __setstate__(self, state):
+        items = state['items']
+        HashTable.__init__(self, load_factor=state['load_factor'], incremental=state['incremental'],
+                           rehash_step=state['rehash_step'])
+        self.reserve(len(items))
+        for key, value in items:
+            self._insert(key, value)
+
+    def _probe(self, keys, key):
+        # Devuelve (posición, encontrado); si no está, la primera lápida o vacía del recorrido
+        # Se recorre a lo sumo toda la tabla: una tabla sin vacías no debe colgar la búsqueda
+        mask = len(keys) - 1
+        index = hash(key) & mask
+        tombstone = None
+        for _ in range(len(keys)):
+            current = keys[index]
+            if current is None:
+                return (index if tombstone is None else tombstone), False
+            if current is _DELETED:
+                if tombstone is None:
+                    tombstone = index
+            elif current == key:
+                return index, True
+            index = (index + 1) & mask
+        return tombstone, False
+
+    def reserve(self, capacity):
+        """Redimensiona de inmediato para que capacity libros quepan bajo el factor de carga."""
+        size = _next_power_of_two(int(capacity / self.load_factor) + 1)
+        if size > self.size:
+            self._finish_migration()
+            self._rehash(size)
+
+    def _rehash(self, size):
+        old_keys, old_values = self.keys, self.values
+        self.size = size
+        self.keys = [None] * size
+        self.values = [None] * size
+        self.used = 0
+        if self.incremental and self.count:
+            self._old_keys, self._old_values = old_keys, old_values
+            self._migrated = 0
+            logger.info(f"Tabla Hash en redimensionamiento incremental a {self.size} posiciones.")
+            return
+        for key, value in zip(old_keys, old_values):
+            if key is not None and key is not _DELETED:
+                self._place(key, value)
+        logger.info(f"Tabla Hash redimensionada a {self.size} posiciones.")
+
+    def _place(self, key, value):
+        # Inserta una clave que se sabe ausente
+        mask = self.size - 1
+        index = hash(key) & mask
+        keys = self.keys
+        while keys[index] is not None:
+            index = (index + 1) & mask
+        keys[index] = key
+        self.values[index] = value
+        self.used += 1
+
+    def _migrate(self, steps):
+        old_keys, old_values = self._old_keys, self._old_values
+        end = min(self._migrated + steps, len(old_keys))
+        for index in range(self._migrated, end):
+            key = old_keys[index]
+            if key is not None and key is not _DELETED:
+                self._place(key, old_values[index])
+                # Lápida en la tabla anterior: la clave ya solo vive en la nueva
+                old_keys[index] = _DELETED
+                old_values[index] = None
+        self._migrated = end
+        if end == len(old_keys):
+            self._old_keys = self._old_values = None
+            logger.info(f"Tabla Hash redimensionada a {self.size} posiciones.")
+
+    def _finish_migration(self):
+        if self._old_keys is not None:
+            self._migrate(len(self._old_keys))
 
+    def _insert(self, key, book):
+        if self._old_keys is not None:
+            self._migrate(self.rehash_step)
+            if self._old_keys is not None and self._probe(self._old_keys, key)[1]:
+                return False
+        index, found = self._probe(self.keys, key)
+        if found:
+            return False
+        if self.keys[index] is None:
+            self.used += 1
+        self.keys[index] = key
+        self.values[index] = book
+        self.count += 1
+        # Siempre queda una posición vacía, aunque load_factor sea casi 1 y la tabla pequeña
+        if self.used > self.size * self.load_factor or self.used + 1 >= self.size:
+            # No se encadenan redimensionamientos: se termina el anterior primero
+            self._finish_migration()
+            # Si lo que llena la tabla son lápidas, basta con reconstruirla del mismo tamaño
+            grow = self.count > self.size * self.load_factor / 2
+            self._rehash(self.size * 2 if grow else self.size)
+        return True
+
+    @metrics.timed('hash_table.insert')
     def insert(self, book):
         key = book.title
-        index = self._hash(key)
-        logger.info(f"Insertando libro '{key}' en la Tabla Hash en el índice {index}.")
-        new_node = HashTableNode(key, book)
-        if self.table[index] is None:
-            self.table[index] = new_node
-            logger.debug(f"Libro '{key}' insertado en una posición vacía.")
+        if self._insert(key, book):
+            logger.debug("Libro '%s' insertado en la Tabla Hash.", key)
         else:
-            current = self.table[index]
-            while current.next:
-                if current.key == key:
-                    logger.warning(f"Libro '{key}' ya existe en la Tabla Hash. Inserción omitida.")
-                    return
-                current = current.next
-            if current.key == key:
-                logger.warning(f"Libro '{key}' ya existe en la Tabla Hash. Inserción omitida.")
-            else:
-                current.next = new_node
-                logger.debug(f"Libro '{key}' enlazado al final de la cadena en el índice {index}.")
+            logger.warning("Libro '%s' ya existe en la Tabla Hash. Inserción omitida.", key)
 
+    def insert_many(self, books):
+        books = list(books)
+        self.reserve(self.count + len(books))
+        inserted = 0
+        for book in books:
+            if self._insert(book.title, book):
+                inserted += 1
+        logger.info(f"Insertados {inserted} libros en la Tabla Hash ({len(books) - inserted} duplicados omitidos).")
+
+    @metrics.timed('hash_table.search')
     def search(self, key):
-        index = self._hash(key)
-        logger.info(f"Buscando libro '{key}' en la Tabla Hash en el índice {index}.")
-        current = self.table[index]
-        while current:
-            if current.key == key:
-                logger.info(f"Libro '{key}' encontrado en la Tabla Hash.")
-                return current.book
-            current = current.next
-        logger.info(f"Libro '{key}' no encontrado en la Tabla Hash.")
+        if self._old_keys is not None:
+            self._migrate(self.rehash_step)
+        index, found = self._probe(self.keys, key)
+        if found:
+            logger.debug("Libro '%s' encontrado en la Tabla Hash.", key)
+            return self.values[index]
+        if self._old_keys is not None:
+            index, found = self._probe(self._old_keys, key)
+            if found:
+                logger.debug("Libro '%s' encontrado en la Tabla Hash.", key)
+                return self._old_values[index]
+        logger.debug("Libro '%s' no encontrado en la Tabla Hash.", key)
         return None
 
+    @metrics.timed('hash_table.delete')
     def delete(self, key):
-        index = self._hash(key)
-        logger.info(f"Eliminando libro '{key}' de la Tabla Hash en el índice {index}.")
-        current = self.table[index]
-        prev = None
-        while current:
-            if current.key == key:
-                if prev:
-                    prev.next = current.next
-                else:
-                    self.table[index] = current.next
-                logger.info(f"Libro '{key}' eliminado de la Tabla Hash.")
+        if self._old_keys is not None:
+            self._migrate(self.rehash_step)
+        for keys, values in ((self.keys, self.values), (self._old_keys, self._old_values)):
+            if keys is None:
+                continue
+            index, found = self._probe(keys, key)
+            if found:
+                keys[index] = _DELETED
+                values[index] = None
+                self.count -= 1
+                logger.debug("Libro '%s' eliminado de la Tabla Hash.", key)
                 return True
-            prev = current
-            current = current.next
-        logger.warning(f"Libro '{key}' no encontrado en la Tabla Hash. Eliminación fallida.")
+        logger.warning("Libro '%s' no encontrado en la Tabla Hash. Eliminación fallida.", key)
         return False
 
+def _next_power_of_two(value):
+    return 1 << max(value - 1, 1).bit_length()
+
 # Implementación del Árbol N-ario para almacenar libros por género
 class NaryTreeNode:
+    __slots__ = ('genre', 'children', 'books', 'count')
+
     def __init__(self, genre):
         self.genre = genre
         self.children = {}
         self.books = []
+        self.count = 0  # Libros de este género y de todos sus subgéneros
 
 class NaryTree:
+    """Géneros jerárquicos ('novela/historica') con contadores por subárbol.
+
+    Los contadores permiten responder cuántos libros hay bajo un género,
+    histogramas y páginas de un género con subgéneros en función del número
+    de géneros y del tamaño de la página, sin recorrer los libros.
+    """
+
     def __init__(self):
         self.root = NaryTreeNode("Sin Género")
         logger.info("Inicializado el Árbol N-ario para géneros.")
 
+    @metrics.timed('nary_tree.insert')
     def insert(self, book):
+        current = self._insert(book)
+        logger.debug("Libro '%s' insertado bajo el género '%s'.", book.title, current.genre)
+
+    def insert_many(self, books):
+        count = 0
+        for book in books:
+            self._insert(book)
+            count += 1
+        logger.info(f"Insertados {count} libros en el Árbol N-ario.")
+
+    def _insert(self, book):
         genres = book.genre.lower().split('/')
         current = self.root
+        current.count += 1
         for genre in genres:
             if genre not in current.children:
                 current.children[genre] = NaryTreeNode(genre)
-                logger.info(f"Género '{genre}' añadido al Árbol N-ario.")
+                logger.debug("Género '%s' añadido al Árbol N-ario.", genre)
             current = current.children[genre]
+            current.count += 1
         current.books.append(book)
-        logger.info(f"Libro '{book.title}' insertado bajo el género '{current.genre}'.")
+        return current
+
+    @metrics.timed('nary_tree.delete')
+    def delete(self, book):
+        """Quita book de su género y poda los géneros que queden vacíos."""
+        path = [self.root]
+        for genre in book.genre.lower().split('/'):
+            node = path[-1].children.get(genre)
+            if node is None:
+                return False
+            path.append(node)
+        books = path[-1].books
+        for i, candidate in enumerate(books):
+            if candidate is book:
+                del books[i]
+                break
+        else:
+            return False
+        for node in path:
+            node.count -= 1
+        for depth in range(len(path) - 1, 0, -1):
+            node = path[depth]
+            if node.count:
+                break
+            del path[depth - 1].children[node.genre]
+            logger.debug("Género '%s' eliminado del Árbol N-ario.", node.genre)
+        logger.debug("Libro '%s' eliminado del género '%s'.", book.title, path[-1].genre)
+        return True
 
+    @metrics.timed('nary_tree.search')
     def search(self, genre):
-        genres = genre.lower().split('/')
-        current = self.root
-        for g in genres:
-            if g in current.children:
-                current = current.children[g]
-            else:
-                logger.info(f"Género '{genre}' no encontrado en el Árbol N-ario.")
-                return []
-        logger.info(f"Buscando libros bajo el género '{genre}'.")
+        """Libros del género exacto genre; iter_books incluye además los subgéneros."""
+        current = self._find(genre)
+        if current is None:
+            logger.debug("Género '%s' no encontrado en el Árbol N-ario.", genre)
+            return []
+        logger.debug("Buscando libros bajo el género '%s'.", genre)
         return current.books
 
+    def count(self, genre, subgenres=False):
+        """Cantidad de libros del género (y de sus subgéneros si subgenres), sin recorrerlos."""
+        current = self._find(genre)
+        if current is None:
+            return 0
+        return current.count if subgenres else len(current.books)
+
+    def iter_books(self, genre=None, offset=0):
+        """Genera los libros del género y de sus subgéneros (None: todo el catálogo).
+
+        Orden: los libros del propio género y luego cada subgénero en orden
+        alfabético. Los subárboles se abren a medida que se consumen y offset
+        salta subárboles enteros gracias a los contadores.
+        """
+        node = self.root if genre is None else self._find(genre)
+        if node is None:
+            return
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if offset >= node.count:
+                offset -= node.count
+                continue
+            books = node.books
+            if offset < len(books):
+                for i in range(offset, len(books)):
+                    yield books[i]
+                offset = 0
+            else:
+                offset -= len(books)
+            for name in sorted(node.children, reverse=True):
+                stack.append(node.children[name])
+
+    @metrics.timed('nary_tree.page')
+    def page(self, genre, number, size):
+        """Página number (desde 0) de iter_books(genre): O(géneros + size)."""
+        return list(islice(self.iter_books(genre, number * size), size))
+
+    def genre_counts(self, subgenres=False):
+        """Histograma {'novela/historica': cantidad} recorriendo solo los géneros.
+
+        Con subgenres cada género acumula los libros de sus subgéneros.
+        """
+        counts = {}
+        stack = [(name, child) for name, child in self.root.children.items()]
+        while stack:
+            path, node = stack.pop()
+            count = node.count if subgenres else len(node.books)
+            if count:
+                counts[path] = count
+            stack.extend((f"{path}/{name}", child) for name, child in node.children.items())
+        return dict(sorted(counts.items()))
+
+    def _find(self, genre):
+        current = self.root
+        for g in genre.lower().split('/'):
+            current = current.children.get(g)
+            if current is None:
+                return None
+        return current
+
 # Implementación de B+ Tree para almacenar libros por año de publicación
 class BPlusTreeNode:
+    __slots__ = ('leaf', 'keys', 'children', 'next')
+
     def __init__(self, leaf=False):
         self.leaf = leaf
         self.keys = []
+        # En nodos internos: hijos; en hojas: lista de libros por cada clave
         self.children = []
+        self.next = None  # Enlace a la siguiente hoja (solo hojas)
 
 class BPlusTree:
     def __init__(self, order=4):
+        if order < 3:
+            raise ValueError("El orden del B+ Tree debe ser al menos 3.")
         self.root = BPlusTreeNode(leaf=True)
         self.order = order
         logger.info("Inicializado el B+ Tree para años de publicación.")
 
+    @classmethod
+    def bulk_load(cls, sorted_books, order=4):
+        """Construye el árbol de abajo hacia arriba a partir de libros ordenados por año, en O(n)."""
+        tree = cls(order)
+        keys = []
+        buckets = []
+        for book in sorted_books:
+            year = book.publication_year
+            if keys and year == keys[-1]:
+                buckets[-1].append(book)
+                continue
+            if keys and year < keys[-1]:
+                raise ValueError("bulk_load requiere libros ordenados por año de publicación.")
+            keys.append(year)
+            buckets.append([book])
+        if not keys:
+            return tree
+
+        # Nivel de hojas, enlazadas de izquierda a derecha
+        level = []
+        prev = None
+        for start, end in cls._even_chunks(len(keys), order - 1):
+            leaf = BPlusTreeNode(leaf=True)
+            leaf.keys = keys[start:end]
+            leaf.children = buckets[start:end]
+            if prev is not None:
+                prev.next = leaf
+            prev = leaf
+            level.append((leaf.keys[0], leaf))
+
+        # Niveles internos hasta llegar a una única raíz
+        while len(level) > 1:
+            parents = []
+            for start, end in cls._even_chunks(len(level), order):
+                node = BPlusTreeNode()
+                group = level[start:end]
+                node.children = [child for _, child in group]
+                node.keys = [min_key for min_key, _ in group[1:]]
+                parents.append((group[0][0], node))
+            level = parents
+
+        tree.root = level[0][1]
+        logger.info(f"B+ Tree cargado en bloque con {len(keys)} años distintos.")
+        return tree
+
+    @staticmethod
+    def _even_chunks(count, capacity):
+        # Reparte count elementos en el mínimo de grupos de tamaño <= capacity, con tamaños parejos
+        groups = -(-count // capacity)
+        base, extra = divmod(count, groups)
+        start = 0
+        for i in range(groups):
+            end = start + base + (1 if i < extra else 0)
+            yield start, end
+            start = end
+
+    @metrics.timed('bplus_tree.insert')
     def insert(self, book):
-        logger.info(f"Insertando libro '{book.title}' en el B+ Tree bajo el año {book.publication_year}.")
-        root = self.root
-        if len(root.keys) == (self.order - 1):
-            new_root = BPlusTreeNode()
-            new_root.children.append(self.root)
-            self._split_child(new_root, 0)
-            self.root = new_root
-        self._insert_non_full(self.root, book)
-
-    def _insert_non_full(self, node, book):
+        logger.debug("Insertando libro '%s' en el B+ Tree bajo el año %s.", book.title, book.publication_year)
+        year = book.publication_year
+        path = []
+        node = self.root
+        while not node.leaf:
+            index = bisect_right(node.keys, year)
+            path.append((node, index))
+            node = node.children[index]
+
+        index = bisect_left(node.keys, year)
+        if index < len(node.keys) and node.keys[index] == year:
+            node.children[index].append(book)
+            logger.debug("Libro '%s' agregado a la clave existente %s.", book.title, year)
+            return
+        node.keys.insert(index, year)
+        node.children.insert(index, [book])
+        logger.debug("Libro '%s' insertado en una hoja del B+ Tree.", book.title)
+
+        # Propagar divisiones hacia la raíz mientras haya desbordamiento
+        while len(node.keys) >= self.order:
+            separator, new_node = self._split(node)
+            if not path:
+                new_root = BPlusTreeNode()
+                new_root.keys = [separator]
+                new_root.children = [node, new_node]
+                self.root = new_root
+                break
+            parent, index = path.pop()
+            parent.keys.insert(index, separator)
+            parent.children.insert(index + 1, new_node)
+            node = parent
+
+    def _split(self, node):
+        new_node = BPlusTreeNode(leaf=node.leaf)
+        mid = len(node.keys) // 2
         if node.leaf:
-            node.keys.append(book)
-            node.keys.sort(key=lambda x: x.publication_year)
-            logger.debug(f"Libro '{book.title}' insertado en una hoja del B+ Tree.")
+            new_node.keys = node.keys[mid:]
+            new_node.children = node.children[mid:]
+            node.keys = node.keys[:mid]
+            node.children = node.children[:mid]
+            new_node.next = node.next
+            node.next = new_node
+            separator = new_node.keys[0]
         else:
-            # Simplificación: siempre insertar en el primer hijo
-            self._insert_non_full(node.children[0], book)
+            separator = node.keys[mid]
+            new_node.keys = node.keys[mid + 1:]
+            new_node.children = node.children[mid + 1:]
+            node.keys = node.keys[:mid]
+            node.children = node.children[:mid + 1]
+        logger.debug("Nodo dividido en el B+ Tree. Nueva clave de separación: %s.", separator)
+        return separator, new_node
 
-    def _split_child(self, parent, index):
+    @metrics.timed('bplus_tree.delete')
+    def delete(self, book):
+        """Quita book de su año; si el año queda vacío se elimina la clave y se reequilibra."""
+        year = book.publication_year
+        path = []
+        node = self.root
+        while not node.leaf:
+            index = bisect_right(node.keys, year)
+            path.append((node, index))
+            node = node.children[index]
+
+        index = bisect_left(node.keys, year)
+        if index == len(node.keys) or node.keys[index] != year:
+            return False
+        books = node.children[index]
+        for i, candidate in enumerate(books):
+            if candidate is book:
+                del books[i]
+                break
+        else:
+            return False
+        logger.debug("Libro '%s' eliminado del año %s en el B+ Tree.", book.title, year)
+        if books:
+            return True
+        del node.keys[index]
+        del node.children[index]
+
+        # Corregir el subdesbordamiento subiendo hacia la raíz
+        while path and len(node.keys) < self._min_keys(node):
+            parent, index = path.pop()
+            self._rebalance(parent, index)
+            node = parent
+        if not self.root.leaf and not self.root.keys:
+            self.root = self.root.children[0]
+        return True
+
+    def _min_keys(self, node):
+        # Una hoja dividida conserva order // 2 claves; un nodo interno, ceil(order / 2) hijos
+        return self.order // 2 if node.leaf else (self.order + 1) // 2 - 1
+
+    def _rebalance(self, parent, index):
         node = parent.children[index]
-        split_point = len(node.keys) // 2
-        new_node = BPlusTreeNode(leaf=node.leaf)
-        new_node.keys = node.keys[split_point:]
-        node.keys = node.keys[:split_point]
-        parent.children.insert(index + 1, new_node)
-        parent.keys.append(new_node.keys[0].publication_year)
-        parent.keys.sort()
-        logger.debug(f"Nodo dividido en el B+ Tree. Nueva clave de separación: {new_node.keys[0].publication_year}.")
+        left = parent.children[index - 1] if index > 0 else None
+        right = parent.children[index + 1] if index + 1 < len(parent.children) else None
+        if left is not None and len(left.keys) > self._min_keys(left):
+            # Tomar prestada la última clave del hermano izquierdo
+            if node.leaf:
+                node.keys.insert(0, left.keys.pop())
+                node.children.insert(0, left.children.pop())
+                parent.keys[index - 1] = node.keys[0]
+            else:
+                node.keys.insert(0, parent.keys[index - 1])
+                node.children.insert(0, left.children.pop())
+                parent.keys[index - 1] = left.keys.pop()
+        elif right is not None and len(right.keys) > self._min_keys(right):
+            # Tomar prestada la primera clave del hermano derecho
+            if node.leaf:
+                node.keys.append(right.keys.pop(0))
+                node.children.append(right.children.pop(0))
+                parent.keys[index] = right.keys[0]
+            else:
+                node.keys.append(parent.keys[index])
+                node.children.append(right.children.pop(0))
+                parent.keys[index] = right.keys.pop(0)
+        elif left is not None:
+            self._merge(parent, index - 1)
+        else:
+            self._merge(parent, index)
 
-    def search(self, year):
-        logger.info(f"Buscando libros publicados en el año {year} en el B+ Tree.")
+    def _merge(self, parent, index):
+        # Fusiona parent.children[index + 1] dentro de parent.children[index]
+        node = parent.children[index]
+        sibling = parent.children.pop(index + 1)
+        separator = parent.keys.pop(index)
+        if node.leaf:
+            node.next = sibling.next
+        else:
+            node.keys.append(separator)
+        node.keys.extend(sibling.keys)
+        node.children.extend(sibling.children)
+        logger.debug("Nodos fusionados en el B+ Tree. Clave de separación retirada: %s.", separator)
+
+    def _find_leaf(self, year):
         node = self.root
         while not node.leaf:
-            node = node.children[0]
-        results = [book for book in node.keys if book.publication_year == year]
-        if results:
-            logger.info(f"Encontrados {len(results)} libros publicados en el año {year}.")
-        else:
-            logger.info(f"No se encontraron libros publicados en el año {year}.")
-        return results
\ No newline at end of file
+            node = node.children[bisect_right(node.keys, year)]
+        return node
+
+    @metrics.timed('bplus_tree.search')
+    def search(self, year):
+        logger.debug("Buscando libros publicados en el año %s en el B+ Tree.", year)
+        leaf = self._find_leaf(year)
+        index = bisect_left(leaf.keys, year)
+        if index < len(leaf.keys) and leaf.keys[index] == year:
+            results = list(leaf.children[index])
+            logger.debug("Encontrados %s libros publicados en el año %s.", len(results), year)
+            return results
+        logger.debug("No se encontraron libros publicados en el año %s.", year)
+        return []
+
+    def in_order_traversal(self):
+        leaf = self.root
+        while not leaf.leaf:
+            leaf = leaf.children[0]
+        while leaf is not None:
+            for books in leaf.children:
+                yield from books
+            leaf = leaf.next
+
+    def range(self, year_from, year_to):
+        """Genera los libros con year_from <= año <= year_to recorriendo la cadena de hojas."""
+        leaf = self._find_leaf(year_from)
+        index = bisect_left(leaf.keys, year_from)
+        while leaf is not None:
+            for i in range(index, len(leaf.keys)):
+                if leaf.keys[i] > year_to:
+                    return
+                yield from leaf.children[i]
+            leaf = leaf.next
+            index = 0
+
+    def count(self, year_from, year_to):
+        """Cantidad de libros con year_from <= año <= year_to; recorre solo las claves (años) del rango."""
+        total = 0
+        leaf = self._find_leaf(year_from)
+        index = bisect_left(leaf.keys, year_from)
+        while leaf is not None:
+            for i in range(index, len(leaf.keys)):
+                if leaf.keys[i] > year_to:
+                    return total
+                total += len(leaf.children[i])
+            leaf = leaf.next
+            index = 0
+        return total
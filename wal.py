@@ -0,0 +1,251 @@
+import logging
+import os
+import re
+import struct
+import threading
+import zlib
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Registro de escritura anticipada (WAL) de las mutaciones del catálogo
+#
+# Estructura del directorio:
+#   wal-<lsn>.log        segmento con registros consecutivos a partir del número de secuencia <lsn>
+#
+# Cada registro es una cabecera <IIB (longitud de la carga, CRC32 de la carga,
+# operación) seguida de la carga: valores etiquetados (ver _encode_values).
+# Un registro incompleto o con CRC inválido al final del último segmento es una
+# escritura interrumpida por una caída y se descarta al abrir el registro.
+OPERATIONS = {'add': 1, 'remove': 2, 'update': 3}
+_OPERATION_NAMES = {code: name for name, code in OPERATIONS.items()}
+_HEADER = struct.Struct('<IIB')
+_INTEGER = struct.Struct('<q')
+_LENGTH = struct.Struct('<I')
+_NONE, _INT, _STR = 0, 1, 2
+_SEGMENT = re.compile(r'wal-(\d+)\.log$')
+
+def _encode_values(values, out):
+    for value in values:
+        if value is None:
+            out.append(_NONE)
+        elif isinstance(value, int):
+            out.append(_INT)
+            out += _INTEGER.pack(value)
+        elif isinstance(value, str):
+            encoded = value.encode('utf-8')
+            out.append(_STR)
+            out += _LENGTH.pack(len(encoded))
+            out += encoded
+        else:
+            raise TypeError(f"Valor no admitido en el WAL: {type(value).__name__}.")
+
+def _decode_values(data):
+    values = []
+    position = 0
+    while position < len(data):
+        tag = data[position]
+        position += 1
+        if tag == _NONE:
+            values.append(None)
+        elif tag == _INT:
+            values.append(_INTEGER.unpack_from(data, position)[0])
+            position += _INTEGER.size
+        elif tag == _STR:
+            (length,) = _LENGTH.unpack_from(data, position)
+            position += _LENGTH.size
+            values.append(data[position:position + length].decode('utf-8'))
+            position += length
+        else:
+            raise ValueError(f"Etiqueta de valor desconocida en el WAL: {tag}.")
+    return values
+
+def _encode_record(operation, values):
+    payload = bytearray()
+    _encode_values(values, payload)
+    return _HEADER.pack(len(payload), zlib.crc32(payload), OPERATIONS[operation]) + payload
+
+def _read_records(path):
+    """Genera (desplazamiento final, operación, valores) de cada registro válido del segmento."""
+    with open(path, 'rb') as handle:
+        data = handle.read()
+    position = 0
+    while position + _HEADER.size <= len(data):
+        length, checksum, code = _HEADER.unpack_from(data, position)
+        start = position + _HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum or code not in _OPERATION_NAMES:
+            return
+        position = start + length
+        yield position, _OPERATION_NAMES[code], _decode_values(payload)
+
+def sync_directory(path):
+    """fsync de los archivos de path y del propio directorio, para que sobrevivan a una caída."""
+    for name in os.listdir(path):
+        file_path = os.path.join(path, name)
+        if os.path.isfile(file_path):
+            with open(file_path, 'rb') as handle:
+                os.fsync(handle.fileno())
+    descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+class WriteAheadLog:
+    """Registro binario de solo anexado con commit en grupo.
+
+    append() solo copia el registro a un búfer en memoria y devuelve su número
+    de secuencia (LSN); un hilo lo escribe y hace fsync. Lo que se acumula
+    mientras un fsync está en curso se escribe junto en el siguiente, así que
+    muchas escrituras comparten cada fsync y el rendimiento de la ingesta no
+    queda limitado por el disco. sync() espera a que todo lo anexado hasta el
+    momento sea durable. rotate() abre un segmento nuevo para que, tras un
+    checkpoint, discard_before() borre los segmentos que este ya cubre.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._segments = sorted(int(match.group(1)) for match in map(_SEGMENT.match, os.listdir(directory))
+                                if match)
+        self._next_lsn = self._recover_tail()
+        self._durable_lsn = self._next_lsn
+        if not self._segments:
+            self._segments.append(self._next_lsn)
+        self._file = open(self._segment_path(self._segments[-1]), 'ab')
+        self._buffer = bytearray()
+        self._condition = threading.Condition()
+        self._io_lock = threading.Lock()  # Escritura y fsync del segmento actual, o su rotación
+        self._closed = False
+        self._error = None
+        self._flusher = threading.Thread(target=self._flush_loop, name='wal-fsync', daemon=True)
+        self._flusher.start()
+        logger.info(f"WAL abierto en '{directory}': {len(self._segments)} segmentos, próximo LSN {self._next_lsn}.")
+
+    @property
+    def next_lsn(self):
+        return self._next_lsn
+
+    def _segment_path(self, start):
+        return os.path.join(self.directory, f'wal-{start:020d}.log')
+
+    def _recover_tail(self):
+        # Cuenta los registros del último segmento y recorta una escritura interrumpida al final
+        if not self._segments:
+            return 0
+        path = self._segment_path(self._segments[-1])
+        count = 0
+        end = 0
+        for end, _, _ in _read_records(path):
+            count += 1
+        if end < os.path.getsize(path):
+            logger.warning(f"WAL '{path}': se descartan {os.path.getsize(path) - end} bytes de un registro incompleto.")
+            with open(path, 'r+b') as handle:
+                handle.truncate(end)
+                os.fsync(handle.fileno())
+        return self._segments[-1] + count
+
+    def replay(self, since=0):
+        """Genera (lsn, operación, valores) de los registros con lsn >= since, en orden."""
+        for i, start in enumerate(self._segments):
+            following = self._segments[i + 1] if i + 1 < len(self._segments) else None
+            if following is not None and following <= since:
+                continue
+            lsn = start
+            for _, operation, values in _read_records(self._segment_path(start)):
+                if lsn >= since:
+                    yield lsn, operation, values
+                lsn += 1
+            if following is not None and lsn != following:
+                raise ValueError(f"Segmento del WAL dañado: '{self._segment_path(start)}'.")
+
+    def append(self, operation, values):
+        return self.append_many(((operation, values),))
+
+    def append_many(self, records):
+        """Anexa los pares (operación, valores) y devuelve el LSN del último."""
+        data = bytearray()
+        count = 0
+        for operation, values in records:
+            data += _encode_record(operation, values)
+            count += 1
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("El WAL está cerrado.")
+            self._buffer += data
+            self._next_lsn += count
+            lsn = self._next_lsn - 1
+            self._condition.notify_all()
+        metrics.increment('wal.records', count)
+        return lsn
+
+    def sync(self, lsn=None):
+        """Espera a que el registro lsn (por defecto, el último anexado) esté en disco."""
+        with self._condition:
+            target = self._next_lsn if lsn is None else lsn + 1
+            while self._durable_lsn < target and self._error is None:
+                self._condition.wait()
+            if self._durable_lsn < target:
+                raise self._error
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                while not self._buffer and not self._closed:
+                    self._condition.wait()
+                if not self._buffer:
+                    return
+            try:
+                self._write_pending()
+            except OSError as error:
+                logger.error(f"Error al escribir el WAL: {error}")
+                with self._condition:
+                    self._error = error
+                    self._condition.notify_all()
+                return
+
+    @metrics.timed('wal.commit')
+    def _write_pending(self):
+        with self._io_lock:
+            with self._condition:
+                data = self._buffer
+                self._buffer = bytearray()
+                lsn = self._next_lsn
+            if data:
+                self._file.write(data)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            with self._condition:
+                self._durable_lsn = lsn
+                self._condition.notify_all()
+
+    def rotate(self):
+        """Hace durable lo pendiente y empieza un segmento nuevo; devuelve su primer LSN.
+
+        Todo registro anterior al LSN devuelto ya está en disco, en segmentos anteriores.
+        """
+        self._write_pending()
+        with self._io_lock:
+            lsn = self._durable_lsn
+            if self._segments[-1] < lsn:
+                self._file.close()
+                self._segments.append(lsn)
+                self._file = open(self._segment_path(lsn), 'ab')
+                sync_directory(self.directory)
+        return lsn
+
+    def discard_before(self, lsn):
+        """Borra los segmentos cuyos registros son todos anteriores a lsn (ya cubiertos por un checkpoint)."""
+        with self._io_lock:
+            while len(self._segments) > 1 and self._segments[1] <= lsn:
+                os.remove(self._segment_path(self._segments.pop(0)))
+                logger.debug("Segmento del WAL descartado tras el checkpoint %s.", lsn)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._flusher.join()
+        self._file.close()
+        logger.info(f"WAL cerrado en el LSN {self._durable_lsn}.")